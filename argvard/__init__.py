@@ -20,16 +20,18 @@
     :license: Apache License 2.0, see LICENSE for more details
 """
 from __future__ import print_function
+import os
 import sys
-import textwrap
 from functools import partial
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
-from argvard.utils import unique
+from argvard.utils import unique, clean_docstring, NgramIndex
 from argvard.signature import Signature
 from argvard.annotations import annotations
 from argvard.exceptions import UnexpectedArgument, UsageError, InvalidSignature
-from argvard._compat import implements_iterator, iteritems, itervalues
+from argvard._compat import (
+    implements_iterator, iteritems, itervalues
+)
 
 
 __version__ = '0.3.1-dev'
@@ -52,59 +54,167 @@ class ExecutableBase(object):
             return instance
         return decorate
 
-    def __init__(self, defaults=None):
+    def __init__(self, defaults=None, config_files=None, config_cache=None):
         self.defaults = {} if defaults is None else defaults
+        self.config_files = [] if config_files is None else list(config_files)
+        self.config_cache = config_cache
 
         self.main_func = None
         self.main_signature = None
-        self.options = OrderedDict()
+        self.options = OptionTable()
+        self.environment_options = OrderedDict()
         self.commands = OrderedDict()
-        self.description = None
+        self.command_index = NgramIndex()
+        self.completers = {}
+        self._description = None
+        self._docstring = None
 
         self.add_help_option()
 
+    @property
+    def description(self):
+        """
+        The description shown in the help, the cleaned up docstring of the
+        main function by default.
+        """
+        # Docstrings are only cleaned up, once they are needed to show help.
+        if self._docstring is not None:
+            self._description = clean_docstring(self._docstring)
+            self._docstring = None
+        return self._description
+
+    @description.setter
+    def description(self, description):
+        self._description = description
+        self._docstring = None
+
     def add_help_option(self):
         @self.option('-h|--help', overrideable=True)
         def help(context):
             """
             Show this text.
             """
-            print(u'usage: %s' % context.caller.get_usage(context))
-            if self.description:
-                print()
-                print(self.description)
-            if self.options:
-                print()
-                print(u'options:')
-                for option in unique(itervalues(self.options)):
-                    print(u', '.join(option.names))
-                    if option.description:
-                        print(
-                            u''.join(
-                                u' ' * 4 + line
-                                for line in option.description.splitlines(True)
-                            )
-                        )
-            if self.commands:
-                print()
-                print(u'commands:')
-                for name, command in iteritems(self.commands):
-                    print(name)
-                    if command.description:
-                        print(u' ' * 4 + command.description.splitlines()[0])
+            text = None
+            help_directory = context.argvard.help_directory
+            if help_directory is not None:
+                from argvard import pages
+                text = pages.load(help_directory, context.command_path)
+            if text is None:
+                text = self.format_help(context)
+            sys.stdout.write(text)
             sys.exit(1)
 
+    def add_profile_option(self, limit=20):
+        """
+        Adds a ``--profile`` option, that profiles everything following it,
+        and prints the `limit` functions with the highest cumulative time as
+        well as the time spent in argvard itself, once the application is
+        done. ``--profile-to path`` additionally writes the statistics to
+        `path`, which can be loaded with :class:`pstats.Stats`.
+
+        See :mod:`argvard.profiling`.
+
+        .. versionadded:: 0.3.1
+        """
+        @self.option('--profile', overrideable=True)
+        def profile(context):
+            """
+            Profile this command and print a summary.
+            """
+            from argvard import profiling
+            profiling.start(context, limit=limit)
+
+        @self.option('--profile-to path', overrideable=True)
+        def profile_to(context, path):
+            """
+            Profile this command and write the statistics to path.
+            """
+            from argvard import profiling
+            profiling.start(context, path=path, limit=limit)
+
+        # Allows argvard.freeze to add these options again.
+        profile.limit = profile_to.limit = limit
+
+    def add_stats_option(self, environment_variable=None, callback=None):
+        """
+        Adds a ``--stats`` option, that measures the wall and CPU time, the
+        peak resident set size and - if :mod:`tracemalloc` is tracing - the
+        allocated memory from the time it is called until the application is
+        done. The results are written to stderr as a line of JSON or passed
+        to `callback` as a dictionary, see :class:`argvard.stats.Recorder`.
+
+        Pass an `environment_variable` to enable the option for every call of
+        the application run with that variable set.
+
+        .. versionadded:: 0.3.1
+        """
+        @self.option(
+            '--stats', overrideable=True,
+            environment_variable=environment_variable
+        )
+        def stats(context):
+            """
+            Report the time and memory used by this command.
+            """
+            from argvard.stats import start
+            start(context, callback=callback)
+
+        # Allows argvard.freeze to add this option again.
+        stats.callback = callback
+
+    def format_help(self, context):
+        """
+        Returns the text ``--help`` shows.
+
+        .. versionadded:: 0.3.1
+        """
+        lines = [u'usage: %s' % context.caller.get_usage(context)]
+        if self.description:
+            lines.extend([u'', self.description])
+        if self.options:
+            lines.extend([u'', u'options:'])
+            for option in self.options.distinct():
+                names = u', '.join(option.names)
+                if option.environment_variable is not None:
+                    names += u' ($%s)' % option.environment_variable
+                lines.append(names)
+                if option.description:
+                    lines.append(u''.join(
+                        u' ' * 4 + line
+                        for line in option.description.splitlines(True)
+                    ))
+        if self.commands:
+            lines.extend([u'', u'commands:'])
+            for name, command in iteritems(self.commands):
+                lines.append(name)
+                if command.description:
+                    lines.append(u' ' * 4 + command.description.splitlines()[0])
+        return u'\n'.join(lines) + u'\n'
+
     def get_usage(self, context):
         usage = u' '.join(context.command_path)
         if self.options:
             usage += u' ' + ' '.join(
                 u'[%s]' % option.usage
-                for option in unique(itervalues(self.options))
+                for option in self.options.distinct()
             )
         if self.main_signature and self.main_signature.usage:
             usage += u' ' + self.main_signature.usage
         return usage
 
+    def load_config(self):
+        """
+        Returns a dictionary with the merged content of the configuration
+        files, that have been passed as `config_files`.
+
+        .. versionadded:: 0.3.1
+        """
+        if not self.config_files:
+            return {}
+        # Only import the parsers, if there is something to parse.
+        from argvard import config
+        return config.load(self.config_files, cache=self.config_cache)
+
     def register_command(self, name, command):
         """
         Registers the `command` with the given `name`.
@@ -115,8 +225,31 @@ class ExecutableBase(object):
         if name in self.commands:
             raise RuntimeError('%s is already defined' % name)
         self.commands[name] = command
+        self.command_index.add(name)
+
+    def load_plugins(self, group, cache=None):
+        """
+        Registers the commands, that installed distributions provide as entry
+        points in the given `group`, using the name of each entry point as
+        the name of the command. Entry points with a name that is already in
+        use are ignored.
+
+        Commands are only imported once they are used. The entry points are
+        cached in a :class:`~argvard.plugins.PluginCache`, which is `cache`
+        or the default one, so the installed distributions are only scanned,
+        if they have changed.
+
+        .. versionadded:: 0.3.1
+        """
+        from argvard import plugins
+        if cache is None:
+            cache = plugins.get_default_cache()
+        for name, target in cache.load(group):
+            if name not in self.commands:
+                self.register_command(name, plugins.PluginCommand(name, target))
 
-    def option(self, signature, overrideable=False):
+    def option(self, signature, overrideable=False, environment_variable=None,
+               action=None, key=None, const=True, description=None):
         """
         A decorator for registering an option with the given `signature`::
 
@@ -129,9 +262,61 @@ class ExecutableBase(object):
         option, a :exc:`RuntimeError` is raised unless the registered option
         has been defined with `overrideable` set to `True`.
 
+        If an `environment_variable` is given and the option is not used on the
+        command line, the option is called with the value of that variable, if
+        it is set. Options without arguments are called unless the value is
+        empty, ``0``, ``n``, ``no`` or ``false``. The value is passed as is to
+        an option with a single argument and split on whitespace for an option
+        with several arguments.
+
+        Options that only store something in the context don't need a
+        function, instead you can pass one of the following as `action`, in
+        which case the option is registered immediately and returned:
+
+        ``'store'``
+           Stores the argument - or a tuple of the arguments, if there are
+           several - under `key`.
+
+        ``'append'``
+           Like ``'store'`` but appends to a list under `key`, so the option
+           can be given several times.
+
+        ``'store_const'``
+           Stores `const` under `key`.
+
+        ``'count'``
+           Stores how often the option has been given under `key`.
+
+        ::
+
+            app.option('-I|--include path', action='append')
+            app.option('-v|--verbose', action='count', key='verbosity')
+
         :param signature: The signature of the option as a string.
         :param overrideable: If `True` the registered option can be overridden.
+        :param environment_variable: The name of an environment variable, that
+                                     is used if the option is not given.
+        :param action: One of the actions described above.
+        :param key: The key in the context an action stores the value under,
+                    by default the first long name of the option without the
+                    prefix and with dashes replaced by underscores.
+        :param const: The value stored by ``'store_const'``.
+        :param description: Shown in the help, instead of the docstring of
+                            the function.
+
+        .. versionchanged:: 0.3.1
+           Added `environment_variable`, `action`, `key`, `const` and
+           `description`.
         """
+        if action is not None:
+            option = Option.from_string(
+                signature, None, overrideable=overrideable,
+                environment_variable=environment_variable, action=action,
+                key=key, const=const, description=description
+            )
+            self.add_option(option)
+            return option
+
         def decorator(function):
             try:
                 function = annotations()(function)
@@ -139,12 +324,59 @@ class ExecutableBase(object):
                 pass
 
             option = Option.from_string(
-                signature, function, overrideable=overrideable
+                signature, function, overrideable=overrideable,
+                environment_variable=environment_variable,
+                description=description
             )
-            for name in option.names:
-                if name in self.options and not self.options[name].overrideable:
-                    raise RuntimeError('%s is already defined' % name)
-            self.options.update((name, option) for name in option.names)
+            self.add_option(option)
+            return function
+        return decorator
+
+    def add_option(self, option):
+        """
+        Registers an :class:`Option` object, see :meth:`option`.
+        """
+        variable = option.environment_variable
+        if variable is not None:
+            existing = self.environment_options.get(variable)
+            if existing is not None and not existing.overrideable:
+                raise RuntimeError('%s is already used by another option' % variable)
+        replaced = [self.options.get(name) for name in option.names]
+        self.options.add(option)
+        for existing in replaced:
+            if (
+                existing is None or
+                existing.environment_variable is None or
+                any(self.options.get(name) is existing for name in existing.names)
+            ):
+                continue
+            # The replaced option must not be reachable through its variable
+            # either.
+            if self.environment_options.get(existing.environment_variable) is existing:
+                del self.environment_options[existing.environment_variable]
+        if variable is not None:
+            self.environment_options[variable] = option
+
+    def completer(self, name, ttl=None):
+        """
+        A decorator for registering a function, that completes values for the
+        arguments with the given `name` of the options or the main function::
+
+            @app.completer('branch', ttl=60)
+            def complete_branch(context):
+                return list_branches()
+
+        The function is called with the `context` and returns an iterable of
+        all possible values, which are filtered by what has been typed so far.
+        If `ttl` is given, the values are cached on disk and reused for that
+        many seconds.
+
+        See :mod:`argvard.completion` for details.
+
+        .. versionadded:: 0.3.1
+        """
+        def decorator(function):
+            self.completers[name] = function, ttl
             return function
         return decorator
 
@@ -174,41 +406,163 @@ class ExecutableBase(object):
             self.main_func = function
             self.main_signature = signature
             if function.__doc__:
-                self.description = textwrap.dedent(function.__doc__).strip()
+                self._docstring = function.__doc__
             return function
         return decorator
 
+    def parse_options(self, context, argv):
+        """
+        Returns an iterator over `(option, arguments)` tuples for the options
+        at the current position in `argv`, followed by those options that have
+        not been given but are set in the environment of the `context`.
+
+        If `argv` permutes arguments, options may be interleaved with
+        positional arguments, which are collected in :attr:`Argv.positionals`.
+        Everything after ``--`` is positional.
+
+        Each option is only parsed, once the iterator reaches it.
+        """
+        given = set()
+        arguments = argv.argv
+        positionals = argv.positionals
+        while argv.position < len(arguments):
+            argument = arguments[argv.position]
+            option = self.options.get(argument)
+            if option is None:
+                if positionals is None:
+                    break
+                elif argument == '--':
+                    positionals.extend(arguments[argv.position + 1:])
+                    argv.position = len(arguments)
+                    break
+                elif len(positionals) == 1 and argument in self.commands:
+                    # Commands can only be called before any positional
+                    # arguments.
+                    break
+                positionals.append(argument)
+                argv.position += 1
+                continue
+            argv.position += 1
+            yield option, option.signature.parse(argv)
+            given.add(option)
+        if self.environment_options:
+            environ = context.environ
+            for variable, option in iteritems(self.environment_options):
+                if option not in given and variable in environ:
+                    arguments = option.parse_value(environ[variable])
+                    if arguments is not None:
+                        yield option, arguments
+
     def call_options(self, context, argv):
-        for argument in argv:
-            if argument in self.options:
-                option = self.options[argument]
-                option.call(context, argv)
-            else:
-                argv.position -= 1
-                break
+        call = _call_option if context.tracer is None else _trace_option
+        for option, arguments in self.parse_options(context, argv):
+            call(context, option, arguments)
+
+    def parse_command(self, argv):
+        """
+        Returns the name of the command at the current position in `argv` or
+        `None`, if there is none.
+        """
+        argument = argv.peek()
+        if argument in self.commands:
+            argv.position += 1
+            return argument
+        return None
 
     def call_commands(self, context, argv):
-        try:
-            argument = next(argv)
-        except StopIteration:
-            pass
+        name = self.parse_command(argv)
+        if name is None:
+            return False
+        context.command_path.append(name)
+        self.commands[name](context, argv)
+        return True
+
+    def get_suggestions(self, argument):
+        """
+        Returns a list of the option names, if `argument` looks like an option,
+        or command names closest to `argument`, that might have been meant
+        instead.
+
+        The names are looked up in an index that is updated as options and
+        commands are registered, so this is cheap even for a large number of
+        names.
+
+        .. versionadded:: 0.3.1
+        """
+        name = argument.lstrip('-')
+        if len(name) < 2:
+            return []
+        max_distance = 1 if len(name) <= 3 else 2
+        if argument.startswith('-'):
+            index = self.options.index
+        else:
+            index = self.command_index
+        matches = index.search(argument, max_distance)
+        return [
+            match for distance, match in matches if distance == matches[0][0]
+        ]
+
+    def parse_main(self, argv):
+        """
+        Parses the remaining `argv` according to the signature of the main
+        function and returns the arguments.
+
+        Raises :exc:`UnexpectedArgument`, if there are arguments left over.
+        Without a main function, there are no arguments and `None` is
+        returned.
+        """
+        if argv.positionals is not None:
+            argv = Argv(argv.positionals)
+        position = argv.position
+        if self.main_signature is None:
+            # Anything left over is most likely a mistyped command.
+            maximum = 0
         else:
-            if argument in self.commands:
-                context.command_path.append(argument)
-                self.commands[argument](context, argv)
-                return True
+            maximum = self.main_signature.maximum
+        if maximum is not None and len(argv.argv) - position > maximum:
+            # Matching would consume exactly `maximum` arguments and leave the
+            # others, so there is no need to match anything to reject this.
+            argv.position = position + maximum
+            arguments = None
+        elif self.main_signature is None:
+            return None
+        else:
+            arguments = self.main_signature.parse(argv)
+        argument = argv.peek()
+        if argument is not None:
+            # A mistyped option is taken for a positional argument, so it may
+            # have been consumed and left something else over.
+            for given in argv.argv[position:]:
+                if given == '--':
+                    break
+                if given.startswith('-') and given not in self.options:
+                    suggestions = self.get_suggestions(given)
+                    if suggestions:
+                        raise UnexpectedArgument(
+                            _get_unexpected_message(given, suggestions)
+                        )
+            # Commands can only be called before any positional arguments.
+            if argv.position > position:
+                suggestions = []
             else:
-                argv.position -= 1
-                return False
+                suggestions = self.get_suggestions(argument)
+            raise UnexpectedArgument(
+                _get_unexpected_message(argument, suggestions)
+            )
+        return arguments
 
     def call_main(self, context, argv):
+        arguments = self.parse_main(argv)
         if self.main_func is None:
             self.options['--help'].function(context)
-        arguments = self.main_signature.parse(argv)
-        remaining = list(argv)
-        if remaining:
-            raise UnexpectedArgument('unexpected argument "%s"' % remaining[0])
-        self.main_func(context, **arguments)
+        if context.tracer is None:
+            self.main_func(context, **arguments)
+        else:
+            with context.tracer.span(
+                u'argvard.main', command_path=list(context.command_path),
+                arguments=len(arguments)
+            ):
+                self.main_func(context, **arguments)
 
     def normalize_argv(self, argv):
         rv = []
@@ -247,26 +601,244 @@ class Argvard(ExecutableBase):
 
     :param defaults: A dictionary containing the initial values for the
                      `context`.
+    :param config_files: A list of paths to INI, JSON or TOML files, whose
+                         content overrides the `defaults`. Files that do
+                         not exist are ignored.
+    :param config_cache: The :class:`~argvard.config.ConfigCache` used to
+                         load the `config_files`.
+
+    :param defer_options: If `True`, the entire command line is parsed before
+                          any option is called, so that expensive options are
+                          not called, if the command line turns out to be
+                          invalid. By default options are called as soon as
+                          they are encountered.
+    :param permute: If `True`, options may follow the positional arguments of
+                    the main function, like with GNU ``getopt``. By default
+                    the first positional argument ends the options.
+    :param help_directory: A directory containing help pages generated with
+                           :mod:`argvard.pages`, which ``--help`` shows
+                           instead of generating the help, as long as they
+                           are up to date.
+    :param tracer: A :class:`~argvard.tracing.Tracer`, that records spans
+                   around calls of the application, its commands, options
+                   and main functions. If this is `None` and the environment
+                   variable ``ARGVARD_TRACE`` is set, spans are appended to
+                   the file it names as lines of JSON.
+
+    .. versionchanged:: 0.3.1
+       Added `config_files`, `config_cache`, `defer_options`, `permute`,
+       `help_directory` and `tracer`.
     """
-    def create_context(self, argv):
-        context = Context(self, argv[0])
+    def __init__(self, defaults=None, config_files=None, config_cache=None,
+                 defer_options=False, permute=False, help_directory=None,
+                 tracer=None):
+        super(Argvard, self).__init__(
+            defaults=defaults, config_files=config_files,
+            config_cache=config_cache
+        )
+        self.defer_options = defer_options
+        self.permute = permute
+        self.help_directory = help_directory
+        self.tracer = tracer
+
+    def get_tracer(self, environ=None):
+        """
+        Returns the tracer used for a call of the application with the given
+        `environ`, :data:`os.environ` by default, or `None`.
+
+        .. versionadded:: 0.3.1
+        """
+        if self.tracer is not None:
+            return self.tracer
+        path = (os.environ if environ is None else environ).get('ARGVARD_TRACE')
+        if path:
+            from argvard.tracing import Tracer, JSONLinesExporter
+            return Tracer(JSONLinesExporter(path))
+        return None
+
+    def create_context(self, argv, environ=None):
+        context = Context(self, argv[0], environ=environ)
         context.update(self.defaults)
+        context.tracer = self.get_tracer(environ)
         return context
 
-    def __call__(self, argv=None):
+    def __call__(self, argv=None, environ=None):
+        """
+        Runs the application with the given `argv`, :data:`sys.argv` by
+        default.
+
+        `environ` is the mapping options look up their environment variables
+        in, a copy of :data:`os.environ` taken once per call by default.
+
+        If the environment variable named after the application, like
+        ``_TOOL_COMPLETE`` for ``tool``, is set, completions for the last
+        argument are printed instead, see :mod:`argvard.completion`.
+        """
+        if argv is None:
+            argv = sys.argv
+        variable = get_completion_variable(argv[0])
+        if (os.environ if environ is None else environ).get(variable):
+            from argvard.completion import complete
+            for candidate in complete(self, argv, environ=environ):
+                print(candidate)
+            return
+        argv = Argv(self.normalize_argv(argv), permute=self.permute)
+        context = self.create_context(argv, environ=environ)
+        if context.tracer is not None:
+            from argvard.tracing import trace_call
+            trace_call(context, arguments=len(argv.argv) - 1)
+        with context:
+            if self.defer_options:
+                try:
+                    plan = self._parse(argv, context)
+                except UsageError as error:
+                    self.handle_usage_error(context, error)
+                # Parsing has entered the commands already, executing the
+                # plan enters them again.
+                del context.command_path[1:]
+                context.command = None
+                self._execute(plan, context)
+                return
+            try:
+                context.update(self.load_config())
+                self.call_options(context, argv)
+                if not self.call_commands(context, argv):
+                    self.call_main(context, argv)
+            except UsageError as error:
+                self.handle_usage_error(context, error)
+
+    def handle_usage_error(self, context, error):
+        print(u'error: %s' % error.args[0], file=sys.stderr)
+        caller = context.command or context.argvard
+        print(u'usage: %s' % caller.get_usage(context), file=sys.stderr)
+        sys.exit(1)
+
+    def parse(self, argv=None, environ=None):
+        """
+        Parses `argv`, :data:`sys.argv` by default, without calling any option
+        or main function and returns a :class:`Plan`, that can be passed to
+        :meth:`execute`.
+
+        Options fed from environment variables are looked up in `environ`,
+        :data:`os.environ` by default.
+
+        Raises :exc:`UsageError`, if `argv` cannot be parsed. Arguments are
+        only converted according to their annotations, once the plan is
+        executed.
+
+        .. versionadded:: 0.3.1
+        """
         if argv is None:
             argv = sys.argv
-        argv = Argv(self.normalize_argv(argv))
-        context = self.create_context(argv)
+        argv = Argv(self.normalize_argv(argv), permute=self.permute)
+        return self._parse(argv, Context(self, argv[0], environ=environ))
+
+    def _parse(self, argv, context):
+        # The context is only used to look up the environment and keeps track
+        # of the commands, so that errors can be reported for the right one.
+        executable = self
+        name = argv[0]
+        steps = []
+        while True:
+            options = []
+            help = executable.options.get('--help')
+            for option, arguments in executable.parse_options(context, argv):
+                options.append(OptionCall(option, _freeze(arguments)))
+                if option is help:
+                    # Help exits, so nothing after it is going to be used
+                    # and need be valid.
+                    steps.append(Step(name, executable, tuple(options)))
+                    return Plan(tuple(steps), None)
+            steps.append(Step(name, executable, tuple(options)))
+            name = executable.parse_command(argv)
+            if name is None:
+                break
+            executable = executable.commands[name]
+            context.command_path.append(name)
+            context.command = executable
+        main_arguments = executable.parse_main(argv)
+        if main_arguments is not None:
+            main_arguments = _freeze(main_arguments)
+        return Plan(tuple(steps), main_arguments)
+
+    def parse_many(self, argvs, workers=None, environ=None, chunksize=256):
+        """
+        Parses each command line in the iterable `argvs` like :meth:`parse`
+        and returns an iterator, that yields a :class:`Plan` or the
+        :exc:`UsageError` raised for each of them, in the same order.
+
+        The command lines are parsed in chunks of `chunksize` by `workers`
+        processes, one per CPU by default. The workers are forked, so they
+        share the application and its compiled signatures, which means that
+        on platforms without :func:`os.fork` or with `workers` set to ``1``
+        the command lines are parsed in this process instead.
+
+        Only a few chunks are parsed ahead of the consumer of the iterator,
+        so `argvs` can be arbitrarily large.
+
+        .. versionadded:: 0.3.1
+        """
+        from argvard.batch import parse_many
+        return parse_many(
+            self, argvs, workers=workers, environ=environ, chunksize=chunksize
+        )
+
+    def execute(self, plan, environ=None):
+        """
+        Executes a :class:`Plan` returned by :meth:`parse`, calling the option
+        and main functions just like calling the application would.
+
+        .. versionadded:: 0.3.1
+        """
+        if plan.steps[0].executable is not self:
+            raise ValueError('plan has been created by another application')
+        context = self.create_context(plan.command_path, environ=environ)
+        if context.tracer is not None:
+            from argvard.tracing import trace_call
+            trace_call(context)
+        with context:
+            self._execute(plan, context)
+
+    def _execute(self, plan, context):
+        if context.tracer is None:
+            call = _call_option
+        else:
+            from argvard.tracing import span_until_close
+            call = _trace_option
+        spans = []
         try:
-            self.call_options(context, argv)
-            if not self.call_commands(context, argv):
-                self.call_main(context, argv)
-        except UsageError as error:
-            print(u'error: %s' % error.args[0], file=sys.stderr)
-            caller = context.command or context.argvard
-            print(u'usage: %s' % caller.get_usage(context), file=sys.stderr)
-            sys.exit(1)
+            context.update(self.load_config())
+            for i, step in enumerate(plan.steps):
+                if i > 0:
+                    context.command_path.append(step.name)
+                    if context.tracer is not None:
+                        spans.append(span_until_close(
+                            context, u'argvard.command',
+                            command_path=list(context.command_path)
+                        ))
+                    step.executable.update_context(context)
+                for option, arguments in step.options:
+                    call(context, option, _thaw(arguments))
+            executable = plan.steps[-1].executable
+            if plan.main_arguments is None:
+                executable.options['--help'].function(context)
+            elif context.tracer is None:
+                executable.main_func(context, **_thaw(plan.main_arguments))
+            else:
+                with context.tracer.span(
+                    u'argvard.main', command_path=list(context.command_path),
+                    arguments=len(plan.main_arguments)
+                ):
+                    executable.main_func(context, **_thaw(plan.main_arguments))
+        except BaseException:
+            # Unlike the spans of Command.__call__ the command spans end with
+            # the context, so they have to be told about the error.
+            error = sys.exc_info()[1]
+            for span in spans:
+                span.attributes['error'] = type(error).__name__
+            if not isinstance(error, UsageError):
+                raise
+            self.handle_usage_error(context, error)
 
 
 class Command(ExecutableBase):
@@ -281,13 +853,32 @@ class Command(ExecutableBase):
                      `context`, any values already contained in the context
                      once the command is called will not be overridden with a
                      default value.
+    :param config_files: A list of paths to INI, JSON or TOML files, whose
+                         content overrides the `defaults` but - like them -
+                         not values already contained in the context.
+    :param config_cache: The :class:`~argvard.config.ConfigCache` used to
+                         load the `config_files`.
+
+    .. versionchanged:: 0.3.1
+       Added `config_files` and `config_cache`.
     """
     def update_context(self, context):
         context.command = self
+        for key, value in iteritems(self.load_config()):
+            context.setdefault(key, value)
         for key, value in iteritems(self.defaults):
             context.setdefault(key, value)
 
     def __call__(self, context, argv):
+        if context.tracer is None:
+            self.run(context, argv)
+        else:
+            with context.tracer.span(
+                u'argvard.command', command_path=list(context.command_path)
+            ):
+                self.run(context, argv)
+
+    def run(self, context, argv):
         self.update_context(context)
         self.call_options(context, argv)
         if not self.call_commands(context, argv):
@@ -296,9 +887,13 @@ class Command(ExecutableBase):
 
 @implements_iterator
 class Argv(object):
-    def __init__(self, argv):
+    def __init__(self, argv, permute=False):
         self.argv = argv
         self.position = 1
+        #: If arguments are permuted, a list of the positional arguments
+        #: skipped while parsing options, starting with the application name
+        #: like `argv`, otherwise `None`.
+        self.positionals = [argv[0]] if permute else None
 
     def __getitem__(self, index):
         return self.argv[index]
@@ -307,17 +902,81 @@ class Argv(object):
         return self
 
     def __next__(self):
-        try:
-            argument = self.argv[self.position]
-        except IndexError:
+        if self.position >= len(self.argv):
             raise StopIteration()
+        argument = self.argv[self.position]
         self.position += 1
         return argument
 
+    def peek(self):
+        """
+        Returns the argument at the current position without advancing or
+        `None`, if there are no arguments left.
+        """
+        if self.position < len(self.argv):
+            return self.argv[self.position]
+        return None
+
+
+_false_values = frozenset([u'', u'0', u'n', u'no', u'false'])
+_actions = frozenset(['store', 'store_const', 'append', 'count'])
+
+
+def _call_option(context, option, arguments):
+    if option.action is None:
+        option.function(context, **arguments)
+    else:
+        option.apply_action(context, arguments)
+
+
+def _trace_option(context, option, arguments):
+    with context.tracer.span(
+        u'argvard.option', names=list(option.names), arguments=len(arguments)
+    ):
+        _call_option(context, option, arguments)
+
+
+def _get_unexpected_message(argument, suggestions):
+    message = 'unexpected argument "%s"' % argument
+    if suggestions:
+        message += ', did you mean %s?' % ' or '.join(
+            '"%s"' % suggestion for suggestion in suggestions
+        )
+    return message
+
+
+def get_completion_variable(program):
+    """
+    Returns the name of the environment variable, that makes the application
+    called as `program` print completions instead of running.
+
+    The name is specific to the program, so that other applications it calls
+    while completing, like those called by completers, run as usual.
+
+    .. versionadded:: 0.3.1
+    """
+    import re
+    name = re.sub(r'[^a-zA-Z0-9]', '_', os.path.basename(program))
+    return '_%s_COMPLETE' % name.upper()
+
+
+class _AppendedList(list):
+    """
+    A list created by the ``append`` action, that can be appended to without
+    changing the defaults.
+    """
+
+
+def _get_default_key(names):
+    for name in names:
+        if name.startswith('--'):
+            return name[2:].replace('-', '_')
+    return names[0].lstrip('-')
+
 
 class Option(object):
     @classmethod
-    def from_string(cls, string, function, overrideable=False):
+    def from_string(cls, string, function, **kwargs):
         parts = string.split(' ', 1)
         if not parts or not parts[0]:
             raise InvalidSignature('option name missing')
@@ -345,17 +1004,53 @@ class Option(object):
             signature = Signature.from_string(parts[1])
         else:
             signature = Signature([])
-        return cls(names, function, signature, overrideable=overrideable)
+        return cls(names, function, signature, **kwargs)
 
-    def __init__(self, names, function, signature, overrideable=False):
+    def __init__(self, names, function, signature, overrideable=False,
+                 environment_variable=None, action=None, key=None, const=True,
+                 description=None):
         self.names = names
-        self.function = function
-        if self.function.__doc__ is None:
-            self.description = None
-        else:
-            self.description = textwrap.dedent(self.function.__doc__).strip()
         self.signature = signature
         self.overrideable = overrideable
+        self.environment_variable = environment_variable
+        self.action = action
+        self.const = const
+        self._argument_names = tuple(
+            pattern.name for pattern in signature.patterns
+        )
+        self._docstring = None
+        if action is None:
+            self.function = function
+            self.key = key
+            if description is None:
+                self._docstring = function.__doc__
+        else:
+            if action not in _actions:
+                raise ValueError('unknown action: %r' % action)
+            takes_arguments = action in ['store', 'append']
+            if takes_arguments != bool(self._argument_names):
+                raise InvalidSignature('%s %s arguments' % (
+                    action, 'requires' if takes_arguments else 'does not take'
+                ))
+            self.function = self._call_action
+            self.key = _get_default_key(names) if key is None else key
+        self._description = description
+
+    @property
+    def description(self):
+        """
+        The description shown in the help, the cleaned up docstring of the
+        function by default.
+        """
+        if self._docstring is not None:
+            self._description = clean_docstring(self._docstring)
+            self._docstring = None
+        return self._description
+
+    @description.setter
+    def description(self, description):
+        self._description = description
+        self._docstring = None
 
     @property
     def usage(self):
@@ -369,6 +1064,215 @@ class Option(object):
             partial(self.function, context), argv
         )
 
+    def apply_action(self, context, arguments):
+        """
+        Applies the action of the option to the `context` with the given
+        `arguments`.
+        """
+        action = self.action
+        if action == 'count':
+            context[self.key] = context.get(self.key, 0) + 1
+        elif action == 'store_const':
+            context[self.key] = self.const
+        else:
+            names = self._argument_names
+            if len(names) == 1:
+                value = arguments[names[0]]
+            else:
+                value = tuple(arguments[name] for name in names)
+            if action == 'store':
+                context[self.key] = value
+            else:
+                values = context.get(self.key)
+                if type(values) is not _AppendedList:
+                    # The list in the context may come from the defaults or
+                    # a configuration file, which must not change. Copy it
+                    # once, so that appending stays cheap. Configuration
+                    # files may just as well contain a single value.
+                    if values is None:
+                        values = ()
+                    elif not isinstance(values, (list, tuple)):
+                        values = [values]
+                    values = context[self.key] = _AppendedList(values)
+                values.append(value)
+
+    def _call_action(self, context, **arguments):
+        self.apply_action(context, arguments)
+
+    def __getstate__(self):
+        # The signature pickles itself compactly, everything derived from it
+        # or the action is recreated on unpickling. The function has to be
+        # picklable itself, unless the option has an action.
+        state = self.__dict__.copy()
+        del state['_argument_names']
+        if self.action is not None:
+            del state['function']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._argument_names = tuple(
+            pattern.name for pattern in self.signature.patterns
+        )
+        if self.action is not None:
+            self.function = self._call_action
+
+    def parse_value(self, value):
+        """
+        Parses a `value` taken from the environment and returns the arguments
+        for the option or `None`, if the option should not be called.
+        """
+        if not self.signature.patterns:
+            if value.strip().lower() in _false_values:
+                return None
+            arguments = []
+        elif len(self.signature.patterns) == 1:
+            arguments = [value]
+        else:
+            arguments = value.split()
+        argv = Argv([self.environment_variable] + arguments)
+        try:
+            arguments = self.signature.parse(argv)
+            if argv.peek() is not None:
+                raise UnexpectedArgument(
+                    'unexpected argument "%s"' % argv.peek()
+                )
+        except UsageError as error:
+            raise error.__class__(
+                u'%s (from $%s)' % (error.args[0], self.environment_variable)
+            )
+        return arguments
+
+
+class OptionTable(object):
+    """
+    A mapping of option names to :class:`Option` objects, preserving the order
+    in which the names have been registered.
+
+    An option with several names can be looked up by each of them, the
+    distinct options are tracked separately so that rendering help or usage
+    does not have to deduplicate the names again.
+    """
+    def __init__(self):
+        self._options = OrderedDict()
+        #: A :class:`~argvard.utils.NgramIndex` of all option names.
+        self.index = NgramIndex()
+        self._distinct = []
+        # Overriding an option changes which options are reachable, in that
+        # case the distinct options are recomputed the next time they are
+        # needed.
+        self._distinct_valid = True
+
+    def __getitem__(self, name):
+        return self._options[name]
+
+    def __contains__(self, name):
+        return name in self._options
+
+    def __iter__(self):
+        return iter(self._options)
+
+    def __len__(self):
+        return len(self._options)
+
+    def get(self, name, default=None):
+        return self._options.get(name, default)
+
+    def keys(self):
+        return self._options.keys()
+
+    def values(self):
+        return self._options.values()
+
+    def items(self):
+        return self._options.items()
+
+    def add(self, option):
+        """
+        Adds the given `option` under all of its names.
+
+        If one of the names is already used by an option that is not
+        overrideable, a :exc:`RuntimeError` is raised.
+        """
+        for name in option.names:
+            existing = self._options.get(name)
+            if existing is not None and not existing.overrideable:
+                raise RuntimeError('%s is already defined' % name)
+        for name in option.names:
+            if name in self._options:
+                self._distinct_valid = False
+            self._options[name] = option
+            self.index.add(name)
+        if self._distinct_valid:
+            self._distinct.append(option)
+
+    def distinct(self):
+        """
+        Returns a list of the options in the table, each option occurs only
+        once regardless of the number of names it has.
+        """
+        if not self._distinct_valid:
+            self._distinct = list(unique(itervalues(self._options)))
+            self._distinct_valid = True
+        return self._distinct
+
+
+class OptionCall(namedtuple('OptionCall', ['option', 'arguments'])):
+    """
+    A call of `option` with `arguments`, a tuple of `(name, value)` pairs.
+    """
+    __slots__ = ()
+
+
+class Step(namedtuple('Step', ['name', 'executable', 'options'])):
+    """
+    The application or a command - the `executable` - called with `name` and
+    the :class:`OptionCall` objects for the options given to it.
+    """
+    __slots__ = ()
+
+
+class Plan(namedtuple('Plan', ['steps', 'main_arguments'])):
+    """
+    The result of parsing a command line with :meth:`Argvard.parse`.
+
+    .. attribute:: steps
+
+       A tuple of :class:`Step` objects, one for the application followed by
+       one for each command.
+
+    .. attribute:: main_arguments
+
+       A tuple of `(name, value)` pairs, the arguments for the main function
+       of the last command, or `None` if help is shown instead, because it
+       has been asked for or there is no main function.
+
+    Values of repetitions are tuples, they are turned into lists again, when
+    the plan is executed.
+    """
+    __slots__ = ()
+
+    @property
+    def command_path(self):
+        """
+        A tuple of the names of the application and the commands.
+        """
+        return tuple(step.name for step in self.steps)
+
+
+def _freeze(arguments):
+    return tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in iteritems(arguments)
+    )
+
+
+def _thaw(arguments):
+    return dict(
+        (name, list(value) if isinstance(value, tuple) else value)
+        for name, value in arguments
+    )
+
 
 class Context(dict):
     """
@@ -390,12 +1294,63 @@ class Context(dict):
 
        A list containing the name of the application and the names of all
        commands called so far.
+
+    .. attribute:: environ
+
+       A snapshot of the environment variables, taken when the application
+       was called.
+
+    .. attribute:: tracer
+
+       The :class:`~argvard.tracing.Tracer` used for this call or `None`.
+
+    .. attribute:: exit_status
+
+       The exit status of the call, once the application is done with the
+       context, `None` before.
     """
-    def __init__(self, argvard, application_name):
+    def __init__(self, argvard, application_name, environ=None):
         self.argvard = argvard
         self.command_path = [application_name]
+        self._environ = environ
+        self._close_callbacks = []
 
         self.command = None
+        self.tracer = None
+        self.exit_status = None
+
+    def call_on_close(self, function):
+        """
+        Registers a `function`, that is called without arguments, once the
+        application is done with this context, even if it exits because of
+        ``--help`` or a usage error. Functions are called in the reverse order
+        of their registration.
+
+        .. versionadded:: 0.3.1
+        """
+        self._close_callbacks.append(function)
+
+    def close(self):
+        """
+        Calls the functions registered with :meth:`call_on_close`.
+
+        .. versionadded:: 0.3.1
+        """
+        while self._close_callbacks:
+            self._close_callbacks.pop()()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.exit_status = _get_exit_status(exc_type, exc_value)
+        self.close()
+
+    @property
+    def environ(self):
+        if self._environ is None:
+            self._environ = dict(os.environ)
+        return self._environ
 
     @property
     def caller(self):
@@ -403,3 +1358,21 @@ class Context(dict):
         The current command or argvard object.
         """
         return self.command or self.argvard
+
+
+def _get_exit_status(exc_type, exc_value):
+    """
+    Returns the status, the interpreter would exit with, if the exception
+    described by `exc_type` and `exc_value` - if any - was not caught.
+    """
+    if exc_type is None:
+        return 0
+    elif issubclass(exc_type, SystemExit):
+        code = getattr(exc_value, 'code', None)
+        if code is None:
+            return 0
+        elif isinstance(code, int):
+            return code
+        # sys.exit prints anything else and exits with 1.
+        return 1
+    return 1
@@ -0,0 +1,80 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard._cache
+    ~~~~~~~~~~~~~~
+
+    Storage of cached data on disk, shared by configuration files and
+    plugins.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import pickle
+
+
+def get_cache_directory():
+    """
+    Returns the directory in which cached data is stored,
+    ``$XDG_CACHE_HOME/argvard`` or ``~/.cache/argvard``.
+    """
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'argvard')
+
+
+def read(cache_path, key):
+    """
+    Returns the content stored at `cache_path` or `None`, if there is none
+    or if it has been stored with a different `key`.
+    """
+    try:
+        with open(cache_path, 'rb') as file:
+            cached_key, content = pickle.load(file)
+    except Exception:
+        # The cache is an optimization, if it's missing or broken the caller
+        # simply computes the content again.
+        return None
+    if cached_key == key:
+        return content
+
+
+def write(cache_path, key, content):
+    """
+    Stores `content` together with `key` at `cache_path`, failing silently
+    if that is not possible.
+    """
+    # tempfile imports a lot of modules, only pay for that when writing.
+    import tempfile
+    directory = os.path.dirname(cache_path)
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, temporary_path = tempfile.mkstemp(dir=directory)
+    except (IOError, OSError):
+        return
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump((key, content), file, pickle.HIGHEST_PROTOCOL)
+        # Renaming is atomic, so concurrent invocations never see a
+        # partially written file.
+        os.rename(temporary_path, cache_path)
+    except (IOError, OSError, pickle.PicklingError):
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
@@ -21,18 +21,33 @@
 """
 from __future__ import print_function
 import functools
-import inspect
 
 from argvard._compat import iteritems
 from argvard.exceptions import UsageError
 
 
-try:
-    # normal getargspec doesn't work with annotations
-    _getargspec = inspect.getfullargspec
-except AttributeError:
-    # and in Python 2 there are no annotations
-    _getargspec = inspect.getargspec
+def _get_defaults(func):
+    """
+    Returns a list of `(name, default)` tuples for the positional arguments of
+    `func` that have a default value.
+    """
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        # This is what getargspec does for functions and methods, without
+        # importing inspect, which takes longer than the rest of argvard.
+        args = code.co_varnames[:code.co_argcount]
+        defaults = func.__defaults__
+    else:
+        import inspect
+        try:
+            # normal getargspec doesn't work with annotations
+            getargspec = inspect.getfullargspec
+        except AttributeError:
+            # and in Python 2 there are no annotations
+            getargspec = inspect.getargspec
+        spec = getargspec(func)
+        args, defaults = spec.args, spec.defaults
+    return list(zip(reversed(args), reversed(defaults or ())))
 
 
 IS_ANNOTATED = object()
@@ -101,9 +116,7 @@ def with_annotations(func):
 
 
 def infer_from_defaults(func):
-    spec = _getargspec(func)
-    spec.args
-    for key, value in zip(reversed(spec.args), reversed(spec.defaults or ())):
+    for key, value in _get_defaults(func):
         cls = type(value)
 
         # Check if type behaves correctly, e.g. NoneType doesn't and is
@@ -0,0 +1,182 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.batch
+    ~~~~~~~~~~~~~
+
+    Parsing of many command lines using several processes.
+
+    Applications usually consist of closures and lambdas, which cannot be
+    pickled. Instead of sending the application to the workers, the workers
+    are forked while the application is registered in this module, so they
+    share its compiled signatures and dispatch tables. Plans are sent back
+    with options replaced by indices, which are resolved again in the parent.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import itertools
+import multiprocessing
+from collections import deque
+
+from argvard import Plan, Step, OptionCall
+from argvard.utils import unique
+from argvard.exceptions import UsageError
+from argvard._compat import itervalues
+
+
+#: Maps keys passed to the workers to `(application, environ, tables)`
+#: tuples, the workers inherit this when they are forked.
+_applications = {}
+_keys = itertools.count()
+
+
+def get_fork_context():
+    """
+    Returns a multiprocessing context that forks or `None`, if forking is not
+    supported on this platform.
+    """
+    if not hasattr(os, 'fork'):
+        return None
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:
+        # Python 2 always forks on platforms that support it.
+        return multiprocessing
+    return get_context('fork')
+
+
+class OptionTables(object):
+    """
+    Assigns each option of each executable an index, that is the same in the
+    parent and forked workers.
+    """
+    def __init__(self):
+        self._tables = {}
+
+    def get(self, executable):
+        try:
+            return self._tables[executable]
+        except KeyError:
+            options = list(unique(itertools.chain(
+                itervalues(executable.options),
+                itervalues(executable.environment_options)
+            )))
+            indices = dict((option, i) for i, option in enumerate(options))
+            rv = self._tables[executable] = options, indices
+            return rv
+
+
+def encode(tables, plan):
+    return (
+        tuple(
+            (step.name, tuple(
+                (tables.get(step.executable)[1][option], arguments)
+                for option, arguments in step.options
+            ))
+            for step in plan.steps
+        ),
+        plan.main_arguments
+    )
+
+
+def decode(tables, application, encoded):
+    encoded_steps, main_arguments = encoded
+    steps = []
+    executable = application
+    for i, (name, options) in enumerate(encoded_steps):
+        if i > 0:
+            executable = executable.commands[name]
+        table = tables.get(executable)[0]
+        steps.append(Step(name, executable, tuple(
+            OptionCall(table[index], arguments) for index, arguments in options
+        )))
+    return Plan(tuple(steps), main_arguments)
+
+
+def parse_chunk(key, chunk):
+    application, environ, tables = _applications[key]
+    rv = []
+    for argv in chunk:
+        try:
+            rv.append((True, encode(tables, application.parse(argv, environ))))
+        except UsageError as error:
+            rv.append((False, error))
+    return rv
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def parse_many(application, argvs, workers=None, environ=None,
+               chunksize=256):
+    """
+    Parses each of the `argvs` with :meth:`~argvard.Argvard.parse` and yields
+    a :class:`~argvard.Plan` or the :exc:`~argvard.UsageError` raised, in the
+    same order.
+
+    See :meth:`argvard.Argvard.parse_many` for details.
+    """
+    if environ is None:
+        environ = dict(os.environ)
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    context = get_fork_context()
+    if workers <= 1 or context is None:
+        for argv in argvs:
+            try:
+                yield application.parse(argv, environ)
+            except UsageError as error:
+                yield error
+        return
+
+    tables = OptionTables()
+    key = next(_keys)
+    # The pool forks new workers to replace those that exit, so the workers
+    # may be forked until the pool has been joined.
+    _applications[key] = application, environ, tables
+    try:
+        pool = context.Pool(workers)
+        try:
+            # Only keep a bounded number of chunks in flight, so that
+            # arbitrarily large iterables can be parsed with constant memory.
+            pending = deque()
+            for chunk in chunked(argvs, chunksize):
+                pending.append(pool.apply_async(parse_chunk, (key, chunk)))
+                if len(pending) >= workers * 2:
+                    for result in _decode_chunk(tables, application, pending):
+                        yield result
+            while pending:
+                for result in _decode_chunk(tables, application, pending):
+                    yield result
+        finally:
+            pool.terminate()
+            pool.join()
+    finally:
+        del _applications[key]
+
+
+def _decode_chunk(tables, application, pending):
+    for success, result in pending.popleft().get():
+        if success:
+            yield decode(tables, application, result)
+        else:
+            yield result
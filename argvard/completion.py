@@ -0,0 +1,617 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.completion
+    ~~~~~~~~~~~~~~~~~~
+
+    Shell completion for bash, zsh and fish.
+
+    Static scripts contain the commands and options of the whole application,
+    so completing them does not require starting Python. Each script carries
+    a hash of the completion data, which changes whenever the scripts need to
+    be generated again::
+
+        $ python -m argvard.completion bash package.module:application tool
+
+    Dynamic scripts call the application with the words on the command line
+    and the environment variable returned by
+    :func:`~argvard.get_completion_variable` set, ``_TOOL_COMPLETE`` for
+    ``tool``, which answers with the candidates for the last word, one per
+    line, using :func:`complete`.
+    This allows completing values with functions registered with
+    :meth:`~argvard.Argvard.completer`::
+
+        $ python -m argvard.completion --dynamic bash tool
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import os
+import time
+from bisect import bisect_left
+
+from argvard import (
+    Argvard, Argv, Context, UsageError, get_completion_variable, _cache
+)
+from argvard.signature import Argument, Repetition
+from argvard.utils import walk_commands
+from argvard.exceptions import ArgumentMissing
+
+
+#: Changing this invalidates all cached values.
+CACHE_VERSION = 1
+
+
+def get_table(application):
+    """
+    Returns a list of `(path, commands, options)` tuples describing each
+    executable of the `application`. `commands` is a list of command names
+    and `options` a list of `(names, nargs, description)` tuples, where
+    `nargs` is the number of arguments the option takes and `description`
+    the first line of its description.
+    """
+    rv = []
+    for path, executable in walk_commands(application):
+        options = []
+        for option in executable.options.distinct():
+            description = option.description
+            description = description.splitlines()[0] if description else u''
+            options.append((
+                list(option.names), len(option.signature.patterns), description
+            ))
+        rv.append((list(path), list(executable.commands), options))
+    return rv
+
+
+def get_hash(table):
+    """
+    Returns a hash of a `table` returned by :func:`get_table`.
+    """
+    import json
+    import hashlib
+    data = json.dumps(table, sort_keys=True).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def read_hash(script):
+    """
+    Returns the hash in a completion `script` or `None`, if there is none.
+    """
+    import re
+    match = re.search(r'^# argvard-completion-hash: ([0-9a-f]+)$', script, re.M)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def _quote(string):
+    return u"'%s'" % string.replace(u"'", u"'\\''")
+
+
+def _quote_fish(string):
+    return u"'%s'" % string.replace(u'\\', u'\\\\').replace(u"'", u"\\'")
+
+
+def _get_function_name(program):
+    import re
+    return u'_%s_argvard' % re.sub(r'[^a-zA-Z0-9_]', '_', program)
+
+
+def _get_nargs(table):
+    rv = []
+    for path, commands, options in table:
+        for names, nargs, description in options:
+            if nargs:
+                for name in names:
+                    rv.append((u'%s:%s' % (u' '.join(path), name), nargs))
+    return rv
+
+
+def generate_bash(table, program):
+    function = _get_function_name(program)
+    lines = [
+        u'%s_lookup() {' % function,
+        u'    case "$1" in'
+    ]
+    for path, commands, options in table:
+        lines.append(u'        %s)' % _quote(u' '.join(path)))
+        lines.append(u'            commands=%s' % _quote(u' '.join(commands)))
+        lines.append(u'            options=%s' % _quote(u' '.join(
+            name for names, nargs, description in options for name in names
+        )))
+        lines.append(u'            ;;')
+    lines.extend([
+        u'    esac',
+        u'}',
+        u'',
+        u'%s_nargs() {' % function,
+        u'    case "$1" in'
+    ])
+    for key, nargs in _get_nargs(table):
+        lines.append(u'        %s) nargs=%d ;;' % (_quote(key), nargs))
+    lines.extend([
+        u'        *) nargs=0 ;;',
+        u'    esac',
+        u'}',
+        u'',
+        u'%s() {' % function,
+        u'    local cur path= skip=0 positional=0 i word commands options nargs',
+        u'    cur="${COMP_WORDS[COMP_CWORD]}"',
+        u'    for ((i = 1; i < COMP_CWORD; i++)); do',
+        u'        word="${COMP_WORDS[i]}"',
+        u'        # --option=value is split into three words.',
+        u'        [[ $word == = ]] && continue',
+        u'        if ((skip > 0)); then',
+        u'            skip=$((skip - 1))',
+        u'            continue',
+        u'        fi',
+        u'        if [[ $word == -* ]]; then',
+        u'            %s_nargs "$path:$word"' % function,
+        u'            skip=$nargs',
+        u'            continue',
+        u'        fi',
+        u'        %s_lookup "$path"' % function,
+        u'        if ((positional == 0)) && [[ " $commands " == *" $word "* ]]; then',
+        u'            path="${path:+$path }$word"',
+        u'        else',
+        u'            positional=1',
+        u'        fi',
+        u'    done',
+        u'    %s_lookup "$path"' % function,
+        u'    if ((skip == 0)) && [[ $cur == -* ]]; then',
+        u'        COMPREPLY=($(compgen -W "$options" -- "$cur"))',
+        u'    elif ((skip == 0 && positional == 0)) && [[ -n $commands ]]; then',
+        u'        COMPREPLY=($(compgen -W "$commands" -- "$cur"))',
+        u'    else',
+        u'        COMPREPLY=($(compgen -f -- "$cur"))',
+        u'    fi',
+        u'}',
+        u'',
+        u'complete -F %s %s' % (function, _quote(program))
+    ])
+    return u'\n'.join(lines) + u'\n'
+
+
+def generate_zsh(table, program):
+    return u'\n'.join([
+        u'autoload -U +X bashcompinit && bashcompinit',
+        u'',
+        generate_bash(table, program)
+    ])
+
+
+def generate_fish(table, program):
+    function = u'_%s' % _get_function_name(program)
+    lines = [
+        u'function %s_commands' % function,
+        u'    switch $argv[1]'
+    ]
+    for path, commands, options in table:
+        lines.append(u'        case %s' % _quote_fish(u' '.join(path)))
+        if commands:
+            lines.append(u'            printf \'%%s\\n\' %s' % u' '.join(
+                _quote_fish(command) for command in commands
+            ))
+    lines.extend([
+        u'    end',
+        u'end',
+        u'',
+        u'function %s_nargs' % function,
+        u'    switch $argv[1]'
+    ])
+    for key, nargs in _get_nargs(table):
+        lines.append(u'        case %s' % _quote_fish(key))
+        lines.append(u'            echo %d' % nargs)
+    lines.extend([
+        u'        case \'*\'',
+        u'            echo 0',
+        u'    end',
+        u'end',
+        u'',
+        u'# Prints the path of commands and whether a positional argument has',
+        u'# been given so far.',
+        u'function %s_state' % function,
+        u'    set -l path \'\'',
+        u'    set -l skip 0',
+        u'    set -l positional 0',
+        u'    set -l words (commandline -opc)',
+        u'    set -e words[1]',
+        u'    for word in $words',
+        u'        if test $skip -gt 0',
+        u'            set skip (math $skip - 1)',
+        u'            continue',
+        u'        end',
+        u'        switch $word',
+        u'            case \'-*\'',
+        u'                set skip (%s_nargs "$path:$word")' % function,
+        u'            case \'*\'',
+        u'                if test $positional -eq 0',
+        u'                    and contains -- $word (%s_commands "$path")' % function,
+        u'                    set path (string trim -- "$path $word")',
+        u'                else',
+        u'                    set positional 1',
+        u'                end',
+        u'        end',
+        u'    end',
+        u'    echo "/$path"',
+        u'    echo $positional',
+        u'    echo $skip',
+        u'end',
+        u'',
+        u'# Succeeds, if the command line is at the given path and not in the',
+        u'# arguments of an option. With "commands", only before any positional',
+        u'# arguments.',
+        u'function %s_at' % function,
+        u'    set -l state (%s_state)' % function,
+        u'    test "$state[1]" = "/$argv[1]"; and test "$state[3]" = 0; or return 1',
+        u'    if test "$argv[2]" = commands',
+        u'        test "$state[2]" = 0',
+        u'    end',
+        u'end',
+        u''
+    ])
+    for path, commands, options in table:
+        at = u'%s_at %s' % (function, _quote_fish(u' '.join(path)))
+        for command in commands:
+            lines.append(u'complete -c %s -f -n %s -a %s' % (
+                _quote_fish(program), _quote_fish(at + u' commands'),
+                _quote_fish(command)
+            ))
+        for names, nargs, description in options:
+            arguments = []
+            for name in names:
+                if name.startswith(u'--'):
+                    arguments.append(u'-l %s' % _quote_fish(name[2:]))
+                else:
+                    arguments.append(u'-s %s' % _quote_fish(name[1:]))
+            if nargs:
+                arguments.append(u'-r')
+            if description:
+                arguments.append(u'-d %s' % _quote_fish(description))
+            lines.append(u'complete -c %s -n %s %s' % (
+                _quote_fish(program), _quote_fish(at), u' '.join(arguments)
+            ))
+    return u'\n'.join(lines) + u'\n'
+
+
+GENERATORS = {
+    'bash': generate_bash,
+    'zsh': generate_zsh,
+    'fish': generate_fish
+}
+
+
+def generate(application, shell, program):
+    """
+    Returns a completion script for the given `shell`, ``bash``, ``zsh`` or
+    ``fish``, that completes the commands and options of the `application`,
+    when invoked as `program`.
+
+    Raises :exc:`ValueError`, if the `shell` is not supported.
+    """
+    if shell not in GENERATORS:
+        raise ValueError('unsupported shell: %r' % shell)
+    table = get_table(application)
+    header = u'# %s completion for %s, generated by argvard.\n' % (shell, program)
+    if shell == 'zsh':
+        header = u'#compdef %s\n' % program + header
+    header += u'# argvard-completion-hash: %s\n\n' % get_hash(table)
+    return header + GENERATORS[shell](table, program)
+
+
+DYNAMIC_GENERATORS = {
+    'bash': lambda program: u'\n'.join([
+        u'%s() {' % _get_function_name(program),
+        u"    local IFS=$'\\n'",
+        u'    COMPREPLY=($(%s=1 "${COMP_WORDS[0]}" '
+        u'"${COMP_WORDS[@]:1:COMP_CWORD}" 2>/dev/null))' % (
+            get_completion_variable(program)
+        ),
+        u'}',
+        u'',
+        u'complete -o default -F %s %s' % (
+            _get_function_name(program), _quote(program)
+        ),
+        u''
+    ]),
+    'zsh': lambda program: u'\n'.join([
+        u'autoload -U +X bashcompinit && bashcompinit',
+        u'',
+        DYNAMIC_GENERATORS['bash'](program)
+    ]),
+    'fish': lambda program: (
+        u'complete -c %s -a %s\n' % (_quote_fish(program), _quote_fish(
+            u'(env %s=1 (commandline -opc) (commandline -ct) 2>/dev/null)' % (
+                get_completion_variable(program)
+            )
+        ))
+    )
+}
+
+
+def generate_dynamic(shell, program):
+    """
+    Returns a completion script for the given `shell`, that asks `program`
+    for completions.
+
+    Raises :exc:`ValueError`, if the `shell` is not supported.
+    """
+    if shell not in DYNAMIC_GENERATORS:
+        raise ValueError('unsupported shell: %r' % shell)
+    header = u'# %s completion for %s, generated by argvard.\n\n' % (
+        shell, program
+    )
+    if shell == 'zsh':
+        header = u'#compdef %s\n' % program + header
+    return header + DYNAMIC_GENERATORS[shell](program)
+
+
+class CompletionIndex(object):
+    """
+    Keeps sorted lists of the command and option names of each executable,
+    which are created once per executable, so that names starting with a
+    prefix can be found with a binary search.
+    """
+    def __init__(self):
+        self._names = {}
+
+    def get(self, executable):
+        """
+        Returns a tuple of the sorted command and option names of the
+        `executable`.
+        """
+        try:
+            return self._names[executable]
+        except KeyError:
+            rv = self._names[executable] = (
+                sorted(executable.commands), sorted(executable.options.keys())
+            )
+            return rv
+
+
+def search(names, prefix):
+    """
+    Returns the names in the sorted list `names`, that start with `prefix`.
+    """
+    rv = []
+    for i in range(bisect_left(names, prefix), len(names)):
+        if not names[i].startswith(prefix):
+            break
+        rv.append(names[i])
+    return rv
+
+
+class ValueCache(object):
+    """
+    Caches the values returned by completers in memory and in `directory`,
+    until their time to live has expired.
+
+    If `directory` is `None`, :func:`~argvard.config.get_cache_directory` is
+    used.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._memory = {}
+
+    def get_cache_path(self, key):
+        import hashlib
+        directory = self.directory
+        if directory is None:
+            directory = _cache.get_cache_directory()
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(directory, 'completion-' + name)
+
+    def load(self, key, ttl, function, context):
+        """
+        Returns the values returned by calling `function` with the `context`,
+        reusing those cached for `key`, if they are younger than `ttl`
+        seconds.
+        """
+        now = time.time()
+        cached = self._memory.get(key)
+        cache_path = self.get_cache_path(key)
+        if cached is None:
+            cached = _cache.read(cache_path, key)
+        if cached is not None and 0 <= now - cached[0] < ttl:
+            values = cached[1]
+        else:
+            values = list(function(context))
+            cached = now, values
+            _cache.write(cache_path, key, cached)
+        self._memory[key] = cached
+        return values
+
+
+_default_index = CompletionIndex()
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Returns the :class:`ValueCache` used, if no other has been given.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ValueCache()
+    return _default_cache
+
+
+def _join_assignments(words):
+    # bash splits "--option=value" into three words.
+    rv = []
+    for word in words:
+        if rv and rv[-1].endswith('=') and rv[-1].startswith('--'):
+            rv[-1] += word
+        elif word == '=' and rv and rv[-1].startswith('--'):
+            rv[-1] += word
+        else:
+            rv.append(word)
+    return rv
+
+
+def _iter_arguments(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, (Argument, Repetition)):
+            yield pattern
+        else:
+            for argument in _iter_arguments(pattern.patterns):
+                yield argument
+
+
+def _get_argument_name(signature, index):
+    # Assumes all optionals are given, which is what a user who is still
+    # typing probably intends.
+    for pattern in _iter_arguments(signature.patterns):
+        if isinstance(pattern, Argument):
+            if index == 0:
+                return pattern.name
+            index -= 1
+        elif pattern.maximum is None or index < pattern.maximum:
+            return pattern.pattern.name
+        else:
+            index -= pattern.maximum
+    return None
+
+
+def resolve(application, words):
+    """
+    Determines what the last of the `words` is, without calling any options
+    or commands, and returns a tuple of the executable it belongs to, the
+    :class:`~argvard.Context` used for parsing, whether it may be an option
+    or command and the name of the argument it is the value of or `None`.
+    """
+    argv = Argv(application.normalize_argv(words[:-1]), permute=application.permute)
+    # Options given through environment variables do not change what can be
+    # completed, so they are ignored.
+    context = Context(application, words[0], environ={})
+    executable = application
+    while True:
+        try:
+            for option, arguments in executable.parse_options(context, argv):
+                pass
+        except ArgumentMissing:
+            option = executable.options[argv.argv[argv.position - 1]]
+            index = len(argv.argv) - argv.position
+            name = option.signature.patterns[index].name
+            return executable, context, False, name
+        name = executable.parse_command(argv)
+        if name is None:
+            break
+        executable = executable.commands[name]
+        context.command_path.append(name)
+        context.command = executable
+    if argv.positionals is None:
+        given = len(argv.argv) - argv.position
+    else:
+        given = len(argv.positionals) - 1
+    if executable.main_signature is None:
+        name = None
+    else:
+        name = _get_argument_name(executable.main_signature, given)
+    may_be_option = given == 0 or argv.positionals is not None
+    return executable, context, may_be_option, name
+
+
+def complete(application, words, environ=None, index=None, cache=None):
+    """
+    Returns a list of candidates for the last of the `words`, which are the
+    words on the command line up to the one being completed, starting with
+    the name of the application.
+
+    Options are completed, if the last word starts with ``-``, commands and
+    values returned by the completer registered for the argument, if any,
+    otherwise.
+
+    `index` is the :class:`CompletionIndex` and `cache` the
+    :class:`ValueCache` used, if not given the default ones are used.
+    """
+    if index is None:
+        index = _default_index
+    words = list(words)
+    # If the shell splits "--option=value", it only replaces the value.
+    split = '=' in words[-2:]
+    words = _join_assignments(words)
+    if len(words) < 2:
+        words.append(u'')
+    current = words[-1]
+    prefix = u''
+    if current.startswith('--') and '=' in current:
+        name, current = current.split('=', 1)
+        words[-1:] = [name, current]
+        if not split:
+            prefix = name + '='
+    executable, context, may_be_option, name = resolve(application, words)
+    commands, options = index.get(executable)
+    if may_be_option and current.startswith('-'):
+        return search(options, current)
+    rv = []
+    if may_be_option and not prefix:
+        rv.extend(search(commands, current))
+    if name in executable.completers:
+        function, ttl = executable.completers[name]
+        completion_context = application.create_context(
+            [words[0]], environ=environ
+        )
+        completion_context.command_path = context.command_path
+        completion_context.command = context.command
+        if ttl is None:
+            values = function(completion_context)
+        else:
+            if cache is None:
+                cache = get_default_cache()
+            key = (
+                CACHE_VERSION, os.path.basename(words[0]),
+                tuple(context.command_path[1:]), name
+            )
+            values = cache.load(key, ttl, function, completion_context)
+        rv.extend(
+            prefix + value for value in sorted(values)
+            if value.startswith(current)
+        )
+    return rv
+
+
+application = Argvard()
+
+
+application.option('--dynamic', action='store_const', description=(
+    'Generate a script, that asks the program for completions and supports\n'
+    'completers, instead of a static one.'
+))
+
+
+@application.main('shell [target] program')
+def main(context, shell, program, target=None):
+    """
+    Prints a completion script for the given shell, bash, zsh or fish, that
+    completes the application target, given as package.module:attribute, when
+    invoked as program.
+    """
+    if context.get('dynamic'):
+        if shell not in DYNAMIC_GENERATORS:
+            raise UsageError('unsupported shell "%s"' % shell)
+        print(generate_dynamic(shell, program), end=u'')
+        return
+    if shell not in GENERATORS:
+        raise UsageError('unsupported shell "%s"' % shell)
+    if target is None:
+        raise UsageError('target is missing')
+    from argvard import plugins
+    print(generate(plugins.resolve(target), shell, program), end=u'')
+
+
+if __name__ == '__main__':
+    application()
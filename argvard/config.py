@@ -0,0 +1,181 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.config
+    ~~~~~~~~~~~~~~
+
+    Loading of default values from configuration files.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import json
+import hashlib
+
+from argvard import _cache
+from argvard._cache import get_cache_directory
+from argvard._compat import PY2
+from argvard.exceptions import InvalidConfig
+
+if PY2:
+    import ConfigParser as configparser
+else:
+    import configparser
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+#: Changing this invalidates all files in the cache.
+CACHE_VERSION = 1
+
+
+def parse_json(path):
+    with open(path, 'rb') as file:
+        rv = json.loads(file.read().decode('utf-8'))
+    if not isinstance(rv, dict):
+        raise ValueError('expected an object at the top level')
+    return rv
+
+
+def parse_ini(path):
+    parser = configparser.RawConfigParser()
+    # preserve the case of keys
+    parser.optionxform = str
+    if not parser.read([path]):
+        raise ValueError('cannot be read')
+    rv = dict(parser.defaults())
+    for section in parser.sections():
+        rv[section] = dict(parser.items(section))
+    return rv
+
+
+def parse_toml(path):
+    if tomllib is None:
+        raise ValueError('TOML is not supported, install tomli')
+    with open(path, 'rb') as file:
+        return tomllib.load(file)
+
+
+PARSERS = {
+    '.json': parse_json,
+    '.ini': parse_ini,
+    '.cfg': parse_ini,
+    '.toml': parse_toml
+}
+
+
+def parse(path):
+    """
+    Parses the configuration file at `path` into a dictionary, the format is
+    determined by the extension of the file.
+
+    Raises :exc:`~argvard.exceptions.InvalidConfig`, if the file cannot be
+    parsed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PARSERS:
+        raise InvalidConfig(
+            '%s: unknown configuration format %r' % (path, extension)
+        )
+    try:
+        return PARSERS[extension](path)
+    except (ValueError, configparser.Error) as error:
+        raise InvalidConfig('%s: %s' % (path, error))
+
+
+class ConfigCache(object):
+    """
+    Loads configuration files, caching the parsed content in memory and in
+    `directory`, so that repeated calls of an application do not have to
+    parse the files again, as long as they have not changed.
+
+    Files are identified by their absolute path, size and modification time.
+    If `directory` is `None`, :func:`get_cache_directory` is used.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._memory = {}
+
+    def get_key(self, path):
+        stat = os.stat(path)
+        return (
+            CACHE_VERSION,
+            os.path.abspath(path),
+            stat.st_size,
+            getattr(stat, 'st_mtime_ns', stat.st_mtime)
+        )
+
+    def get_cache_path(self, key):
+        directory = self.directory
+        if directory is None:
+            directory = get_cache_directory()
+        name = hashlib.sha1(key[1].encode('utf-8')).hexdigest()
+        return os.path.join(directory, name)
+
+    def load(self, path):
+        """
+        Returns the parsed content of the configuration file at `path` or
+        `None`, if there is no such file.
+        """
+        try:
+            key = self.get_key(path)
+        except OSError:
+            return None
+        if key in self._memory:
+            return self._memory[key]
+        cache_path = self.get_cache_path(key)
+        rv = _cache.read(cache_path, key)
+        if rv is None:
+            rv = parse(path)
+            _cache.write(cache_path, key, rv)
+        self._memory[key] = rv
+        return rv
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Returns the :class:`ConfigCache` used by applications and commands, that
+    have not been given a cache of their own.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ConfigCache()
+    return _default_cache
+
+
+def load(paths, cache=None):
+    """
+    Loads the configuration files in `paths` and returns a dictionary with
+    their merged content, values in later files take precedence. Files that
+    do not exist are ignored.
+    """
+    if cache is None:
+        cache = get_default_cache()
+    rv = {}
+    for path in paths:
+        content = cache.load(path)
+        if content is not None:
+            rv.update(content)
+    return rv
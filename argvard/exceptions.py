@@ -40,3 +40,9 @@ class ArgumentMissing(UsageError):
 
 class UnexpectedArgument(UsageError):
     pass
+
+
+class InvalidConfig(UsageError):
+    """
+    A configuration file could not be parsed.
+    """
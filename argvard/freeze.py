@@ -0,0 +1,341 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.freeze
+    ~~~~~~~~~~~~~~
+
+    Generation of a module, that creates an application without parsing
+    signatures, executing decorators or inferring annotations::
+
+        $ python -m argvard.freeze package.module:application package/frozen.py
+
+    The generated module constructs the options, commands and signatures of
+    the application directly and refers to option, main and completer
+    functions by their import path, so they have to be defined at the top
+    level of a module or class. Importing the module that builds the
+    application would build it anyway, so those functions have to be kept in
+    modules of their own and registered with the application elsewhere.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import io
+import sys
+
+import argvard
+from argvard import Argvard, Command, UsageError
+from argvard.signature import Argument, Repetition
+from argvard.annotations import set_annotations, with_annotations
+from argvard._compat import iteritems
+
+
+def annotated(function, annotations):
+    """
+    Returns `function` wrapped, so that its arguments are converted with the
+    given `annotations`, like :func:`~argvard.annotations` does, but without
+    inferring anything.
+    """
+    return with_annotations(set_annotations(**annotations)(function))
+
+
+def _literal(value):
+    import ast
+    rv = repr(value)
+    try:
+        if ast.literal_eval(rv) == value:
+            return rv
+    except (ValueError, SyntaxError):
+        pass
+    raise ValueError('%r cannot be frozen' % (value, ))
+
+
+def _get_builtin(option):
+    """
+    Returns the name of the function, if `option` has been added by argvard
+    itself, like ``--help``, or `None`.
+    """
+    function = option.function
+    if getattr(function, '__module__', None) == 'argvard':
+        return getattr(function, '__name__', None)
+    return None
+
+
+class Freezer(object):
+    """
+    Generates the source of a module creating the `application`.
+    """
+    def __init__(self, application):
+        self.application = application
+        self.modules = {}
+        self.variables = {}
+        self.executables = []
+        self.imports = set()
+        self.lines = []
+
+    def get_import_path(self, obj):
+        """
+        Returns the name of the module and the qualified name of `obj`, or
+        `None`, if importing those does not return `obj`.
+        """
+        from argvard import plugins
+        module = getattr(obj, '__module__', None)
+        name = getattr(obj, '__qualname__', None) or getattr(obj, '__name__', None)
+        if module is None or name is None or '<' in name:
+            return None
+        try:
+            if plugins.resolve('%s:%s' % (module, name)) is obj:
+                return module, name
+        except (ImportError, AttributeError):
+            pass
+        return None
+
+    def reference(self, obj):
+        """
+        Returns an expression referring to `obj` by its import path.
+
+        Raises :exc:`ValueError`, if `obj` cannot be imported.
+        """
+        path = self.get_import_path(obj)
+        if path is None:
+            raise ValueError('%r cannot be imported' % (obj, ))
+        module, name = path
+        if module not in self.modules:
+            self.modules[module] = u'_m%d' % len(self.modules)
+        return u'%s.%s' % (self.modules[module], name)
+
+    def function(self, function):
+        if self.get_import_path(function) is not None:
+            return self.reference(function)
+        wrapped = getattr(function, '__wrapped__', None)
+        if (
+            getattr(function, '_argvard_annotations', None) is not None and
+            wrapped is not None
+        ):
+            # Registering the function wrapped it, wrap the original with
+            # the annotations inferred back then.
+            self.imports.add(u'from argvard.freeze import annotated')
+            annotations = [
+                u'%s: %s' % (_literal(name), self.reference(annotation))
+                for name, annotation in sorted(iteritems(wrapped.__annotations__))
+                if annotation
+            ]
+            return u'annotated(%s, {%s})' % (
+                self.reference(wrapped), u', '.join(annotations)
+            )
+        return self.reference(function)
+
+    def signature(self, signature):
+        return u'Signature([%s])' % u', '.join(
+            self.pattern(pattern) for pattern in signature.patterns
+        )
+
+    def pattern(self, pattern):
+        if isinstance(pattern, Argument):
+            return u'Argument(%s)' % _literal(pattern.name)
+        elif isinstance(pattern, Repetition):
+            return u'Repetition(Argument(%s), %d, %s)' % (
+                _literal(pattern.pattern.name), pattern.minimum,
+                _literal(pattern.maximum)
+            )
+        return u'Optional([%s])' % u', '.join(
+            self.pattern(pattern) for pattern in pattern.patterns
+        )
+
+    def executable(self, executable):
+        from argvard.plugins import PluginCommand
+        if id(executable) in self.variables:
+            return self.variables[id(executable)]
+        variable = self.variables[id(executable)] = u'e%d' % len(self.variables)
+        if type(executable) is PluginCommand:
+            # Plugins stay lazy.
+            self.imports.add(u'from argvard.plugins import PluginCommand')
+            self.lines.append(u'%s = PluginCommand(%s, %s)' % (
+                variable, _literal(executable.name), _literal(executable.target)
+            ))
+            return variable
+        if executable.config_cache is not None:
+            raise ValueError('applications with a config_cache cannot be frozen')
+        if getattr(executable, 'tracer', None) is not None:
+            raise ValueError('applications with a tracer cannot be frozen')
+        arguments = [
+            u'defaults=%s' % _literal(executable.defaults),
+            u'config_files=%s' % _literal(executable.config_files)
+        ]
+        if type(executable) is Argvard:
+            arguments.extend([
+                u'defer_options=%s' % _literal(executable.defer_options),
+                u'permute=%s' % _literal(executable.permute),
+                u'help_directory=%s' % _literal(executable.help_directory)
+            ])
+        elif type(executable) is not Command:
+            raise ValueError('%r cannot be frozen' % (executable, ))
+        self.executables.append(executable)
+        self.lines.append(u'%s = %s(%s)' % (
+            variable, type(executable).__name__, u', '.join(arguments)
+        ))
+        for option in executable.options.distinct():
+            builtin = _get_builtin(option)
+            if builtin in ('profile', 'profile_to'):
+                line = u'%s.add_profile_option(limit=%d)' % (
+                    variable, option.function.limit
+                )
+                if line not in self.lines:
+                    self.lines.append(line)
+            elif builtin == 'stats':
+                callback = option.function.callback
+                self.lines.append(
+                    u'%s.add_stats_option(environment_variable=%s, '
+                    u'callback=%s)' % (
+                        variable, _literal(option.environment_variable),
+                        u'None' if callback is None else self.function(callback)
+                    )
+                )
+            elif builtin != 'help':
+                self.option(variable, option)
+        if executable.main_func is not None:
+            self.lines.extend([
+                u'%s.main_func = %s' % (
+                    variable, self.function(executable.main_func)
+                ),
+                u'%s.main_signature = %s' % (
+                    variable, self.signature(executable.main_signature)
+                ),
+                u'%s.description = %s' % (
+                    variable, _literal(executable.description)
+                )
+            ])
+        for name, (function, ttl) in sorted(iteritems(executable.completers)):
+            self.lines.append(u'%s.completers[%s] = %s, %s' % (
+                variable, _literal(name), self.function(function), _literal(ttl)
+            ))
+        for name, command in iteritems(executable.commands):
+            command_variable = self.executable(command)
+            self.lines.append(u'%s.register_command(%s, %s)' % (
+                variable, _literal(name), command_variable
+            ))
+        return variable
+
+    def check_modules(self):
+        """
+        Raises :exc:`ValueError`, if one of the modules the frozen module
+        imports creates the application or one of its commands, because
+        importing it would create them anyway.
+        """
+        executables = set(id(executable) for executable in self.executables)
+        for name in sorted(self.modules):
+            module = sys.modules.get(name)
+            if module is None:
+                continue
+            if any(id(value) in executables for value in list(vars(module).values())):
+                raise ValueError(
+                    'functions of %s cannot be frozen, because importing that '
+                    'module creates the application, move them into a module '
+                    'of their own' % name
+                )
+
+    def option(self, variable, option):
+        if option.action is None:
+            function = self.function(option.function)
+        else:
+            function = u'None'
+        self.lines.append(
+            u'%s.add_option(Option(%s, %s, %s, overrideable=%s, '
+            u'environment_variable=%s, action=%s, key=%s, const=%s, '
+            u'description=%s))' % (
+                variable, _literal(list(option.names)), function,
+                self.signature(option.signature),
+                _literal(option.overrideable),
+                _literal(option.environment_variable),
+                _literal(option.action), _literal(option.key),
+                _literal(option.const), _literal(option.description)
+            )
+        )
+
+    def freeze(self, source=None):
+        """
+        Returns the source of the module. `source` describes where the
+        application comes from in the header of the module.
+        """
+        variable = self.executable(self.application)
+        self.check_modules()
+        lines = [
+            u'# coding: utf-8',
+            u'"""',
+            u'    Frozen %sby argvard %s, do not edit.' % (
+                u'from %s ' % source if source else u'', argvard.__version__
+            ),
+            u'"""',
+            u'from argvard import Argvard, Command, Option',
+            u'from argvard.signature import Signature, Argument, Repetition, Optional',
+        ]
+        lines.extend(sorted(self.imports))
+        if self.modules:
+            # import_module, because packages may shadow their modules with
+            # attributes, like argvard.annotations.
+            lines.append(u'from importlib import import_module')
+        for module, alias in sorted(iteritems(self.modules)):
+            lines.append(u'%s = import_module(%s)' % (alias, _literal(module)))
+        lines.append(u'')
+        lines.append(u'')
+        lines.extend(self.lines)
+        lines.extend([
+            u'application = %s' % variable,
+            u'',
+            u'',
+            u"if __name__ == '__main__':",
+            u'    application()',
+        ])
+        return u'\n'.join(lines) + u'\n'
+
+
+def freeze(application, source=None):
+    """
+    Returns the source of a module, that creates an application equivalent
+    to `application` as its attribute ``application``.
+
+    Raises :exc:`ValueError`, if the application cannot be frozen, because
+    a function cannot be imported, is defined in a module that creates the
+    application or a value cannot be written as a literal.
+    """
+    return Freezer(application).freeze(source=source)
+
+
+application = Argvard()
+
+
+@application.main('target output')
+def main(context, target, output):
+    """
+    Writes a module to output, that creates the application target, given as
+    package.module:attribute.
+    """
+    from argvard import plugins
+    try:
+        application = plugins.resolve(target)
+    except (ImportError, AttributeError) as error:
+        raise UsageError(u'cannot import target: %s' % error)
+    if not isinstance(application, Argvard):
+        raise UsageError(u'target is not an application')
+    try:
+        source = freeze(application, source=target)
+    except ValueError as error:
+        raise UsageError(u'cannot freeze target: %s' % error)
+    with io.open(output, 'w', encoding='utf-8') as file:
+        file.write(source)
+
+
+if __name__ == '__main__':
+    application()
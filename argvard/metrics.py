@@ -0,0 +1,308 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.metrics
+    ~~~~~~~~~~~~~~~
+
+    Recording of which commands and options are used, how long calls take
+    and how they exit, across many calls of an application::
+
+        application = Argvard(tracer=Tracer(MetricsRecorder(path)))
+
+    Each call is appended to the file at `path` as a compact line of JSON.
+    Records are written with a single append, so concurrent processes need no
+    locks. Once the file grows large enough, it is compacted into a summary,
+    which can be shown with::
+
+        $ python -m argvard.metrics path
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import io
+import os
+import time
+
+from argvard import Argvard
+from argvard._compat import iteritems
+
+
+FORMAT_VERSION = 1
+
+#: Rotated files are only deleted, once they have not been modified for
+#: this many seconds, so that records appended by processes, which opened
+#: the file before it was rotated, are not lost.
+GRACE_PERIOD = 60
+
+_ROTATED = '.rotated-'
+
+
+def _get_option_name(names):
+    for name in names:
+        if name.startswith('--'):
+            return name
+    return names[0]
+
+
+def encode(spans):
+    """
+    Returns a record for the spans of a call as a line of JSON: A list
+    containing the start time, the command path, the names of the options
+    called, the duration in seconds and the exit status.
+    """
+    import json
+    call = None
+    options = set()
+    for span in spans:
+        if span['parent_id'] is None:
+            call = span
+        elif span['name'] == 'argvard.option':
+            options.add(_get_option_name(span['attributes']['names']))
+    attributes = call['attributes']
+    return json.dumps([
+        round(call['start'], 3), attributes.get('command_path'),
+        sorted(options), round(call['duration'], 6),
+        attributes.get('exit_status')
+    ], separators=(',', ':')) + u'\n'
+
+
+def append(path, data):
+    """
+    Appends the bytes `data` to the file at `path` with a single write and
+    returns the size of the file afterwards.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        # Appends are atomic, so records of concurrent processes are never
+        # interleaved, as long as the write is not cut short.
+        while data:
+            data = data[os.write(fd, data):]
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+class MetricsRecorder(object):
+    """
+    An exporter for a :class:`~argvard.tracing.Tracer`, that appends a record
+    for each call to the file at `path`.
+
+    Records are buffered and written, once there are `buffer_size` of them
+    or the process exits. Once the file is larger than `compact_size` bytes,
+    it is compacted with :func:`compact`.
+    """
+    def __init__(self, path, buffer_size=32, compact_size=1024 * 1024):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.compact_size = compact_size
+        self._buffer = []
+        self._registered = False
+
+    def export(self, spans):
+        self._buffer.append(encode(spans))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+        elif not self._registered:
+            import atexit
+            atexit.register(self.flush)
+            self._registered = True
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data = u''.join(self._buffer).encode('utf-8')
+        self._buffer = []
+        size = append(self.path, data)
+        if self.compact_size is not None and size >= self.compact_size:
+            compact(self.path)
+
+
+def get_summary_path(path):
+    return path + '.summary'
+
+
+def load_summary(path):
+    """
+    Returns the summary of the records at `path`, that have been compacted
+    so far.
+
+    The summary is a dictionary containing a dictionary for each command
+    path, joined with spaces, under ``commands``. Those contain the number of
+    ``calls``, the number of ``failures`` with a non-zero exit status, the
+    total and maximum ``duration`` and ``max_duration`` in seconds and the
+    number of calls of each option under ``options``.
+    """
+    import json
+    try:
+        with io.open(get_summary_path(path), encoding='utf-8') as file:
+            summary = json.load(file)
+    except (IOError, OSError, ValueError):
+        summary = None
+    if summary is None or summary.get('version') != FORMAT_VERSION:
+        summary = {'version': FORMAT_VERSION, 'offsets': {}, 'commands': {}}
+    return summary
+
+
+def _write_summary(path, summary):
+    import json
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temporary_path = tempfile.mkstemp(dir=directory)
+    try:
+        with io.open(fd, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(summary, sort_keys=True))
+        os.rename(temporary_path, get_summary_path(path))
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+
+def aggregate(summary, lines):
+    """
+    Adds the records in `lines` to the `summary`, lines that cannot be
+    decoded are ignored.
+    """
+    import json
+    commands = summary['commands']
+    for line in lines:
+        try:
+            start, command_path, options, duration, exit_status = json.loads(line)
+        except (ValueError, TypeError):
+            continue
+        key = u' '.join(command_path or ())
+        command = commands.get(key)
+        if command is None:
+            command = commands[key] = {
+                'calls': 0, 'failures': 0, 'duration': 0.0,
+                'max_duration': 0.0, 'options': {}
+            }
+        command['calls'] += 1
+        if exit_status:
+            command['failures'] += 1
+        command['duration'] += duration
+        command['max_duration'] = max(command['max_duration'], duration)
+        for option in options:
+            command['options'][option] = command['options'].get(option, 0) + 1
+    return summary
+
+
+def _lock(path):
+    lock_path = path + '.lock'
+    for _ in range(2):
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return lock_path
+        except OSError:
+            # Another process is compacting, unless it died doing so.
+            try:
+                if os.path.getmtime(lock_path) > time.time() - GRACE_PERIOD:
+                    return None
+                os.remove(lock_path)
+            except OSError:
+                pass
+    return None
+
+
+def compact(path):
+    """
+    Moves the records at `path` into the summary and returns it or `None`, if
+    another process is compacting already.
+
+    The file is renamed, so that new records are written to a new file, and
+    the records of renamed files are added to the summary, which keeps track
+    of how much of each file has been read.
+    """
+    lock_path = _lock(path)
+    if lock_path is None:
+        return None
+    try:
+        summary = load_summary(path)
+        try:
+            os.rename(path, '%s%s%d-%d' % (
+                path, _ROTATED, time.time() * 1e6, os.getpid()
+            ))
+        except OSError:
+            pass
+        directory = os.path.dirname(os.path.abspath(path))
+        prefix = os.path.basename(path) + _ROTATED
+        offsets = summary['offsets']
+        for name in sorted(os.listdir(directory)):
+            if not name.startswith(prefix):
+                continue
+            rotated_path = os.path.join(directory, name)
+            offset = offsets.get(name, 0)
+            with open(rotated_path, 'rb') as file:
+                file.seek(offset)
+                data = file.read()
+                modified = os.fstat(file.fileno()).st_mtime
+            # Only read complete records.
+            end = data.rfind(b'\n') + 1
+            aggregate(summary, data[:end].decode('utf-8').splitlines())
+            offsets[name] = offset + end
+            if end == len(data) and modified < time.time() - GRACE_PERIOD:
+                os.remove(rotated_path)
+                del offsets[name]
+        _write_summary(path, summary)
+        return summary
+    finally:
+        os.remove(lock_path)
+
+
+def format_summary(summary):
+    """
+    Returns the `summary` as text, with the most frequently called commands
+    first.
+    """
+    lines = []
+    commands = sorted(
+        iteritems(summary['commands']),
+        key=lambda item: (-item[1]['calls'], item[0])
+    )
+    for name, command in commands:
+        lines.append(
+            u'%s: %d calls, %d failed, %.1fms mean, %.1fms max' % (
+                name, command['calls'], command['failures'],
+                command['duration'] / command['calls'] * 1e3,
+                command['max_duration'] * 1e3
+            )
+        )
+        options = sorted(
+            iteritems(command['options']),
+            key=lambda item: (-item[1], item[0])
+        )
+        for option, calls in options:
+            lines.append(u'    %s: %d calls' % (option, calls))
+    return u'\n'.join(lines)
+
+
+application = Argvard()
+
+
+@application.main('path')
+def main(context, path):
+    """
+    Compacts the metrics recorded at path and shows a summary of them.
+    """
+    summary = compact(path)
+    if summary is None:
+        summary = load_summary(path)
+    text = format_summary(summary)
+    if text:
+        print(text)
+
+
+if __name__ == '__main__':
+    application()
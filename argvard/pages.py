@@ -0,0 +1,221 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.pages
+    ~~~~~~~~~~~~~
+
+    Generation of static help and manual pages for an application and all of
+    its commands, usually as part of building a distribution::
+
+        $ python -m argvard.pages package.module:application tool build/help
+
+    An application created with a `help_directory` shows the pages from that
+    directory, instead of generating the help when it is called. The
+    directory contains a manifest recording the size and modification time
+    of the modules, that define the options and main functions, pages are
+    only used as long as those have not changed.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import io
+import os
+import sys
+import json
+
+import argvard
+from argvard import Argvard, Context, UsageError
+from argvard.utils import walk_commands
+from argvard._compat import iteritems
+
+
+#: Changing this makes the pages of earlier versions stale.
+FORMAT_VERSION = 1
+
+MANIFEST = 'manifest.json'
+
+
+def get_sources(application):
+    """
+    Returns a sorted list of the paths of the modules, in which the option
+    and main functions of the `application` and its commands are defined.
+    """
+    rv = set()
+    for path, executable in walk_commands(application):
+        functions = [executable.main_func] + [
+            option.function for option in executable.options.distinct()
+            if option.action is None
+        ]
+        for function in functions:
+            module = sys.modules.get(getattr(function, '__module__', None))
+            filename = getattr(module, '__file__', None)
+            if filename is not None:
+                rv.add(os.path.abspath(filename))
+    return sorted(rv)
+
+
+def get_stat(path):
+    stat = os.stat(path)
+    return [stat.st_size, getattr(stat, 'st_mtime_ns', stat.st_mtime)]
+
+
+def _escape_roff(text):
+    lines = []
+    for line in text.replace(u'\\', u'\\e').replace(u'-', u'\\-').splitlines():
+        if line.startswith((u'.', u"'")):
+            line = u'\\&' + line
+        lines.append(line)
+    return u'\n'.join(lines)
+
+
+def format_man_page(executable, context):
+    """
+    Returns a manual page in roff format for the `executable`, called with
+    the given `context`.
+    """
+    name = u' '.join(context.command_path)
+    summary = u''
+    if executable.description:
+        summary = executable.description.splitlines()[0]
+    lines = [
+        u'.TH "%s" 1 "" "%s"' % (
+            u'-'.join(context.command_path).upper(), context.command_path[0]
+        ),
+        u'.SH NAME',
+        _escape_roff(name + (u' - ' + summary if summary else u'')),
+        u'.SH SYNOPSIS',
+        _escape_roff(executable.get_usage(context)),
+    ]
+    if executable.description:
+        lines.extend([u'.SH DESCRIPTION', _escape_roff(executable.description)])
+    if executable.options:
+        lines.append(u'.SH OPTIONS')
+        for option in executable.options.distinct():
+            lines.extend([u'.TP', u'.B %s' % _escape_roff(option.usage)])
+            if option.environment_variable is not None:
+                lines.append(_escape_roff(
+                    u'Can be set with $%s.' % option.environment_variable
+                ))
+            if option.description:
+                lines.append(_escape_roff(option.description))
+    if executable.commands:
+        lines.append(u'.SH COMMANDS')
+        for name, command in iteritems(executable.commands):
+            lines.extend([u'.TP', u'.B %s' % _escape_roff(name)])
+            if command.description:
+                lines.append(_escape_roff(command.description.splitlines()[0]))
+    return u'\n'.join(lines) + u'\n'
+
+
+def _write(directory, filename, content):
+    with io.open(os.path.join(directory, filename), 'w', encoding='utf-8') as file:
+        file.write(content)
+
+
+def build(application, program, directory):
+    """
+    Writes help pages, manual pages and a manifest for the `application` and
+    each of its commands, invoked as `program`, into `directory`.
+
+    Returns a list of the names of the files written.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    pages = {}
+    written = []
+    for path, executable in walk_commands(application):
+        context = Context(application, program, environ={})
+        context.command_path.extend(path)
+        if path:
+            context.command = executable
+        basename = u'-'.join(context.command_path)
+        help_filename = basename + u'.txt'
+        _write(directory, help_filename, executable.format_help(context))
+        man_filename = basename + u'.1'
+        _write(directory, man_filename, format_man_page(executable, context))
+        pages[u' '.join(path)] = help_filename
+        written.extend([help_filename, man_filename])
+    manifest = {
+        'version': FORMAT_VERSION,
+        'argvard': argvard.__version__,
+        'program': program,
+        'sources': dict(
+            (path, get_stat(path)) for path in get_sources(application)
+        ),
+        'pages': pages
+    }
+    _write(directory, MANIFEST, json.dumps(manifest, indent=2, sort_keys=True))
+    written.append(MANIFEST)
+    return written
+
+
+def load(directory, command_path):
+    """
+    Returns the prebuilt help from `directory` for the command at
+    `command_path`, a list of the application name followed by command
+    names, or `None`, if there is none or if the sources the pages have been
+    built from have changed.
+    """
+    try:
+        with io.open(os.path.join(directory, MANIFEST), encoding='utf-8') as file:
+            manifest = json.load(file)
+        if (
+            manifest['version'] != FORMAT_VERSION or
+            manifest['argvard'] != argvard.__version__
+        ):
+            return None
+        for source, stat in iteritems(manifest['sources']):
+            if get_stat(source) != stat:
+                return None
+        filename = manifest['pages'].get(u' '.join(command_path[1:]))
+        if filename is None:
+            return None
+        with io.open(os.path.join(directory, filename), encoding='utf-8') as file:
+            text = file.read()
+        # Show the name the application has been called with, like the
+        # generated help does.
+        usage = u'usage: %s' % manifest['program']
+        if text.startswith(usage):
+            text = u'usage: %s' % command_path[0] + text[len(usage):]
+        return text
+    except (IOError, OSError, ValueError, KeyError):
+        # Prebuilt pages are an optimization, if they are broken the help is
+        # simply generated.
+        return None
+
+
+application = Argvard()
+
+
+@application.main('target program directory')
+def main(context, target, program, directory):
+    """
+    Writes help and manual pages for the application target, given as
+    package.module:attribute, invoked as program into directory.
+    """
+    from argvard import plugins
+    try:
+        target = plugins.resolve(target)
+    except (ImportError, AttributeError) as error:
+        raise UsageError(u'cannot import target: %s' % error)
+    if not isinstance(target, Argvard):
+        raise UsageError(u'target is not an application')
+    for filename in build(target, program, directory):
+        print(os.path.join(directory, filename))
+
+
+if __name__ == '__main__':
+    application()
@@ -0,0 +1,205 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.plugins
+    ~~~~~~~~~~~~~~~
+
+    Discovery of commands provided by other distributions through entry
+    points.
+
+    Scanning the installed distributions for entry points is slow, so the
+    entry points found are cached on disk. The cache is keyed by the
+    modification times of the entries in :data:`sys.path`, which change
+    whenever a distribution is installed, upgraded or removed.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import sys
+import hashlib
+
+from argvard import _cache
+
+
+#: Changing this invalidates all cached entry points.
+CACHE_VERSION = 1
+
+
+def get_entry_points(group):
+    """
+    Scans the installed distributions and returns a list of `(name, target)`
+    tuples for the entry points in the given `group`, where `target` is a
+    string like ``package.module:attribute``. If several distributions
+    provide an entry point with the same name, the first one is used.
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        try:
+            import importlib_metadata as metadata
+        except ImportError:
+            metadata = None
+    if metadata is None:
+        import pkg_resources
+        entry_points = [
+            (entry_point.name, '%s:%s' % (
+                entry_point.module_name, '.'.join(entry_point.attrs)
+            ))
+            for entry_point in pkg_resources.iter_entry_points(group)
+        ]
+    else:
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            entry_points = entry_points.select(group=group)
+        else:
+            entry_points = entry_points.get(group, ())
+        entry_points = [
+            (entry_point.name, entry_point.value)
+            for entry_point in entry_points
+        ]
+    rv = []
+    names = set()
+    for name, target in entry_points:
+        if name not in names:
+            names.add(name)
+            rv.append((name, target))
+    return rv
+
+
+def get_fingerprint(paths=None):
+    """
+    Returns a tuple identifying the state of the distributions installed in
+    `paths`, :data:`sys.path` by default.
+    """
+    if paths is None:
+        paths = sys.path
+    rv = []
+    for path in paths:
+        try:
+            stat = os.stat(path or os.curdir)
+        except OSError:
+            continue
+        rv.append((path, getattr(stat, 'st_mtime_ns', stat.st_mtime)))
+    return tuple(rv)
+
+
+class PluginCache(object):
+    """
+    Caches the entry points returned by :func:`get_entry_points` in memory
+    and in `directory`, so that the installed distributions are only scanned
+    again, once the :func:`get_fingerprint` has changed.
+
+    If `directory` is `None`, :func:`~argvard.config.get_cache_directory` is
+    used.
+    """
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._memory = {}
+
+    def get_key(self, group):
+        return CACHE_VERSION, group, get_fingerprint()
+
+    def get_cache_path(self, key):
+        directory = self.directory
+        if directory is None:
+            directory = _cache.get_cache_directory()
+        name = hashlib.sha1(key[1].encode('utf-8')).hexdigest()
+        return os.path.join(directory, 'plugins-' + name)
+
+    def load(self, group):
+        """
+        Returns a list of `(name, target)` tuples for the entry points in the
+        given `group`.
+        """
+        key = self.get_key(group)
+        if key in self._memory:
+            return self._memory[key]
+        cache_path = self.get_cache_path(key)
+        rv = _cache.read(cache_path, key)
+        if rv is None:
+            rv = get_entry_points(group)
+            _cache.write(cache_path, key, rv)
+        self._memory[key] = rv
+        return rv
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """
+    Returns the :class:`PluginCache` used by applications and commands, that
+    have not been given a cache of their own.
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PluginCache()
+    return _default_cache
+
+
+def resolve(target):
+    """
+    Imports and returns the object referred to by a `target` string like
+    ``package.module:attribute``.
+    """
+    # Drop extras like "[extra]", which do not affect the object.
+    target = target.split('[', 1)[0]
+    module_name, _, attributes = target.partition(':')
+    __import__(module_name.strip())
+    rv = sys.modules[module_name.strip()]
+    for attribute in attributes.strip().split('.'):
+        if attribute:
+            rv = getattr(rv, attribute)
+    return rv
+
+
+class PluginCommand(object):
+    """
+    Stands in for the :class:`~argvard.Command` an entry point refers to,
+    which is only imported once it is used.
+    """
+    def __init__(self, name, target):
+        self.name = name
+        self.target = target
+        self._command = None
+
+    def load(self):
+        """
+        Imports and returns the command.
+        """
+        if self._command is None:
+            self._command = resolve(self.target)
+        return self._command
+
+    def __getattr__(self, name):
+        if name == '_command':
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __call__(self, context, argv):
+        if self._command is None and argv.peek() in ('-h', '--help'):
+            # Show prebuilt help without importing the command, if we can.
+            help_directory = context.argvard.help_directory
+            if help_directory is not None:
+                from argvard import pages
+                text = pages.load(help_directory, context.command_path)
+                if text is not None:
+                    sys.stdout.write(text)
+                    sys.exit(1)
+        return self.load()(context, argv)
+
+    def __repr__(self):
+        return '<%s %s = %s>' % (self.__class__.__name__, self.name, self.target)
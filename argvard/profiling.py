@@ -0,0 +1,117 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.profiling
+    ~~~~~~~~~~~~~~~~~
+
+    Profiling of applications with :mod:`cProfile`, enabled by the options
+    :meth:`~argvard.Argvard.add_profile_option` adds.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import os
+import sys
+
+
+#: The directory containing argvard, time spent in functions defined in
+#: there is reported as dispatch overhead.
+ARGVARD_DIR = os.path.dirname(os.path.abspath(__file__))
+
+#: The profiler currently running, there can only be one per process.
+_active = None
+
+
+class Profiler(object):
+    """
+    Profiles everything between :meth:`start` and :meth:`stop` and reports
+    the results to `stream`, :data:`sys.stderr` by default.
+
+    :param path: A path, the statistics are written to.
+    :param limit: The number of functions included in the summary.
+    """
+    def __init__(self, path=None, limit=20, stream=None):
+        self.path = path
+        self.limit = limit
+        self.stream = stream
+        self.profile = None
+
+    def start(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        import pstats
+        stream = sys.stderr if self.stream is None else self.stream
+        stats = pstats.Stats(self.profile, stream=stream)
+        if self.path is not None:
+            stats.dump_stats(self.path)
+        report(stats, self.limit, stream)
+
+
+def get_overhead(stats):
+    """
+    Returns the time spent in functions defined by argvard itself according
+    to the :class:`pstats.Stats` `stats`, not including the time spent in
+    functions they call.
+    """
+    prefix = ARGVARD_DIR + os.sep
+    return sum(
+        total_time
+        for (filename, _, _), (_, _, total_time, _, _) in stats.stats.items()
+        if os.path.abspath(filename).startswith(prefix)
+    )
+
+
+def report(stats, limit, stream):
+    """
+    Writes a summary of the :class:`pstats.Stats` `stats` to `stream`: The
+    total time, the dispatch overhead and the `limit` functions with the
+    highest cumulative time.
+    """
+    total = stats.total_tt
+    overhead = get_overhead(stats)
+    print(u'profile: %.3fms total, %.3fms (%.1f%%) argvard dispatch, '
+          u'%.3fms application' % (
+              total * 1e3, overhead * 1e3,
+              overhead / total * 100 if total else 0.0,
+              (total - overhead) * 1e3
+          ), file=stream)
+    stats.sort_stats('cumulative').print_stats(limit)
+
+
+def start(context, path=None, limit=20):
+    """
+    Starts profiling and stops, once the application is done with the
+    `context`. If the application is already being profiled, only the `path`
+    is set.
+    """
+    global _active
+    if _active is not None:
+        if path is not None:
+            _active.path = path
+        return
+    profiler = _active = Profiler(path=path, limit=limit)
+
+    def stop():
+        global _active
+        _active = None
+        profiler.stop()
+
+    context.call_on_close(stop)
+    profiler.start()
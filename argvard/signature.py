@@ -19,28 +19,42 @@
     :copyright: 2013 by Daniel Neuhäuser
     :license: Apache License 2.0, see LICENSE for more details
 """
-import re
+import marshal
 
 from argvard.exceptions import InvalidSignature, ArgumentMissing
 
 
+#: The version of the format used by :meth:`Signature.to_dict` and
+#: :meth:`Signature.dumps`, it is changed whenever the format changes in an
+#: incompatible way.
+FORMAT_VERSION = 1
+
 _TOKENS = [
     ('identifier', r'[a-zA-Z_][a-zA-Z_0-9]*'),
     ('repetition', r'\.\.\.'),
+    ('bounds', r'\{[0-9]*(?:,[0-9]*)?\}'),
     ('[', r'\['),
     (']', r'\]'),
     ('space', r' +')
 ]
 _OPTION_TOKENS = [
     (name, regex) for name, regex in _TOKENS
-    if name not in ['repetition', '[', ']']
+    if name not in ['repetition', 'bounds', '[', ']']
 ]
 
 
 def _build_tokenizer(tokens):
-    regex = re.compile('|'.join('(%s)' % regex for name, regex in tokens))
+    # The regular expression is only compiled once a signature is parsed, to
+    # keep importing argvard cheap.
+    compiled = []
 
     def _tokenize(string):
+        if not compiled:
+            import re
+            compiled.append(
+                re.compile('|'.join('(%s)' % regex for name, regex in tokens))
+            )
+        regex = compiled[0]
         position = 0
         while position < len(string):
             match = regex.match(string, position)
@@ -110,7 +124,8 @@ def _parse_repetition(state, patterns):
     position, tokens = state
     if position + 1 >= len(tokens):
         raise InvalidSignature('expected at least one more token')
-    if tokens[position + 1][0] != 'repetition':
+    type, lexeme = tokens[position + 1]
+    if type not in ['repetition', 'bounds']:
         raise InvalidSignature(
             'expected repetition as next token, got %r' % (tokens[position + 1], )
         )
@@ -118,10 +133,31 @@ def _parse_repetition(state, patterns):
         raise InvalidSignature(
             'expected identifier, got %r' % (tokens[position], )
         )
-    patterns.append(Repetition(Argument(tokens[position][1])))
+    if type == 'bounds':
+        minimum, maximum = _parse_bounds(lexeme)
+    else:
+        minimum, maximum = 1, None
+    patterns.append(
+        Repetition(Argument(tokens[position][1]), minimum, maximum)
+    )
     return position + 2, tokens
 
 
+def _parse_bounds(lexeme):
+    bounds = lexeme[1:-1]
+    if ',' in bounds:
+        minimum, maximum = bounds.split(',')
+        minimum = int(minimum) if minimum else 0
+        maximum = int(maximum) if maximum else None
+    elif bounds:
+        minimum = maximum = int(bounds)
+    else:
+        raise InvalidSignature('expected bounds, got %r' % lexeme)
+    if maximum is not None and (maximum < 1 or maximum < minimum):
+        raise InvalidSignature('invalid bounds %r' % lexeme)
+    return minimum, maximum
+
+
 def _parse_argument(state, patterns):
     position, tokens = state
     type, lexeme = tokens[position]
@@ -132,15 +168,140 @@ def _parse_argument(state, patterns):
 
 
 def _either(state, patterns, parsers):
+    error = None
     for parser in parsers:
         transaction = []
         try:
             state = parser(state, transaction)
             patterns.extend(transaction)
             return state
-        except InvalidSignature:
-            pass
-    raise
+        except InvalidSignature as exc:
+            error = exc
+    raise error
+
+
+def _check_version(version):
+    if version != FORMAT_VERSION:
+        raise ValueError('unsupported signature format version: %r' % version)
+
+
+def _pattern_from_dict(data):
+    type = data['type']
+    if type == 'argument':
+        return Argument(data['name'])
+    elif type == 'repetition':
+        return Repetition(
+            _pattern_from_dict(data['pattern']),
+            data['minimum'], data['maximum']
+        )
+    elif type == 'optional':
+        return Optional([_pattern_from_dict(pattern) for pattern in data['patterns']])
+    raise ValueError('unknown pattern type: %r' % type)
+
+
+def _pattern_from_tuple(data):
+    # Arguments are encoded as their name, repetitions as a tuple of name,
+    # minimum and maximum and optionals as a list of their patterns.
+    if isinstance(data, list):
+        return Optional([_pattern_from_tuple(pattern) for pattern in data])
+    elif isinstance(data, tuple):
+        name, minimum, maximum = data
+        return Repetition(Argument(name), minimum, maximum)
+    return Argument(data)
+
+
+def _signature_from_tuple(data):
+    version, patterns = data
+    _check_version(version)
+    return Signature([_pattern_from_tuple(pattern) for pattern in patterns])
+
+
+def _merge(intervals):
+    """
+    Returns the `(low, high)` tuples in `intervals` sorted and merged, so
+    that none of them overlap or are adjacent. A `high` of `None` means there
+    is no upper bound.
+    """
+    rv = []
+    for low, high in sorted(intervals, key=lambda interval: interval[0]):
+        if rv and (rv[-1][1] is None or low <= rv[-1][1] + 1):
+            previous_low, previous_high = rv[-1]
+            if previous_high is not None and (high is None or high > previous_high):
+                rv[-1] = previous_low, high
+        else:
+            rv.append((low, high))
+    return tuple(rv)
+
+
+def _add(counts, other):
+    """
+    Returns the counts, that are the sum of one of `counts` and one of
+    `other`.
+    """
+    return _merge(
+        (low + other_low, None if high is None or other_high is None else high + other_high)
+        for low, high in counts
+        for other_low, other_high in other
+    )
+
+
+def _suffix_counts(patterns):
+    """
+    Returns a list with the numbers of arguments, the patterns starting at
+    each index can match, with an additional entry for the end.
+    """
+    rv = [((0, 0), )]
+    for pattern in reversed(patterns):
+        rv.append(_add(pattern.counts, rv[-1]))
+    rv.reverse()
+    return rv
+
+
+def _get_largest(counts, limit):
+    """
+    Returns the largest of the `counts` not greater than `limit` or `None`.
+    """
+    rv = None
+    for low, high in counts:
+        if low > limit:
+            break
+        rv = limit if high is None else min(high, limit)
+    return rv
+
+
+def _get_largest_split(counts, suffix, total):
+    """
+    Returns the largest of the `counts`, that leaves a number of arguments
+    out of `total` the `suffix` can match, or `None`.
+    """
+    rv = None
+    for low, high in counts:
+        for suffix_low, suffix_high in suffix:
+            lower = low
+            if suffix_high is not None:
+                lower = max(lower, total - suffix_high)
+            upper = total - suffix_low
+            if high is not None:
+                upper = min(high, upper)
+            if lower <= upper and (rv is None or upper > rv):
+                rv = upper
+    return rv
+
+
+def _match_sequence(patterns, suffixes, arguments, position, end, result):
+    # The number of arguments each suffix of the patterns can match is known
+    # in advance. Match as many arguments as the patterns can take together
+    # and let each pattern take as many of those as it can, while leaving a
+    # number the following patterns can match, so there is no backtracking.
+    total = _get_largest(suffixes[0], end - position)
+    if total is None:
+        return None
+    for i, pattern in enumerate(patterns):
+        count = _get_largest_split(pattern.counts, suffixes[i + 1], total)
+        pattern.consume(arguments, position, count, result)
+        position += count
+        total -= count
+    return position
 
 
 class Signature(object):
@@ -158,8 +319,42 @@ class Signature(object):
         """
         return cls(_parse_signature(string, option=option))
 
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Returns a :class:`Signature` object based on a dictionary returned by
+        :meth:`to_dict`.
+
+        Raises :exc:`ValueError`, if the dictionary has been created by an
+        incompatible version of argvard.
+
+        .. versionadded:: 0.3.1
+        """
+        _check_version(data.get('version'))
+        return cls([_pattern_from_dict(pattern) for pattern in data['patterns']])
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Returns a :class:`Signature` object based on a string returned by
+        :meth:`dumps`.
+
+        Raises :exc:`ValueError`, if the string has been created by an
+        incompatible version of argvard.
+
+        .. versionadded:: 0.3.1
+        """
+        return _signature_from_tuple(marshal.loads(data))
+
     def __init__(self, patterns):
         self.patterns = patterns
+        self._suffixes = _suffix_counts(patterns)
+        #: The minimum number of arguments the signature needs to match.
+        self.minimum = self._suffixes[0][0][0]
+        #: The maximum number of arguments the signature matches or `None`,
+        #: if there is no upper bound. Given at least as many arguments,
+        #: :meth:`parse` matches exactly this many.
+        self.maximum = self._suffixes[0][-1][1]
 
     @property
     def usage(self):
@@ -172,74 +367,230 @@ class Signature(object):
         """
         Parses the given `argv` and returns a dictionary mapping argument names
         to the values found in `argv`.
+
+        The patterns match as many arguments as they can together, each
+        pattern matches as many of those as possible, while leaving a number
+        the following patterns can match. Arguments that are not needed by
+        any pattern are left in `argv`.
+
+        Raises :exc:`ArgumentMissing`, if `argv` does not match.
         """
         rv = {}
-        for pattern in self.patterns:
-            pattern.apply(rv, argv)
+        arguments = argv.argv
+        available = len(arguments) - argv.position
+        if available < self.minimum:
+            raise ArgumentMissing('%s is missing' % self._get_missing(available))
+        argv.position = _match_sequence(
+            self.patterns, self._suffixes, arguments, argv.position,
+            len(arguments), rv
+        )
         return rv
 
+    def _get_missing(self, available):
+        required = 0
+        for pattern in self.patterns:
+            required += pattern.minimum
+            if required > available:
+                return pattern.usage
+
     def call_with_arguments(self, callable, argv):
         """
         Parses `argv` and calls `callable` with the result.
         """
         return callable(**self.parse(argv))
 
+    def to_dict(self):
+        """
+        Returns a dictionary representing the signature, that only contains
+        strings, integers, lists and dictionaries and can be turned back into
+        a signature with :meth:`from_dict`.
 
-class Argument(object):
+        .. versionadded:: 0.3.1
+        """
+        return {
+            'version': FORMAT_VERSION,
+            'patterns': [pattern.to_dict() for pattern in self.patterns]
+        }
+
+    def dumps(self):
+        """
+        Returns a compact string of bytes representing the signature, that
+        can be turned back into a signature with :meth:`loads`.
+
+        .. versionadded:: 0.3.1
+        """
+        return marshal.dumps(self._to_tuple())
+
+    def _to_tuple(self):
+        return (
+            FORMAT_VERSION,
+            tuple(pattern.to_tuple() for pattern in self.patterns)
+        )
+
+    def __reduce__(self):
+        return _signature_from_tuple, (self._to_tuple(), )
+
+
+class Pattern(object):
     """
-    Represents a positional argument with the given `name`.
+    Base class for the patterns a signature consists of.
+
+    Patterns are matched against a list of arguments with :meth:`match`,
+    which reports whether a pattern matches through its return value, so
+    that trying alternatives does not involve raising and catching
+    exceptions.
     """
-    def __init__(self, name):
-        self.name = name
+    #: The numbers of arguments the pattern can match, as sorted
+    #: `(low, high)` tuples of inclusive bounds, `high` is `None` if there is
+    #: no upper bound.
+    counts = ((1, 1), )
+
+    #: The minimum number of arguments the pattern needs to match.
+    minimum = 1
+
+    #: The maximum number of arguments the pattern matches or `None`, if
+    #: there is no upper bound.
+    maximum = 1
 
     @property
     def usage(self):
-        return self.name
+        raise NotImplementedError()
+
+    def match(self, arguments, position, end, result):
+        """
+        Matches the pattern against as many of the `arguments` between
+        `position` and `end` as possible and returns the position after the
+        matched arguments or `None`, if the pattern does not match. The values
+        are stored in the `result` dictionary, which is left unchanged if the
+        pattern does not match.
+        """
+        count = _get_largest(self.counts, end - position)
+        if count is None:
+            return None
+        self.consume(arguments, position, count, result)
+        return position + count
+
+    def consume(self, arguments, position, count, result):
+        """
+        Stores the values of `count` arguments starting at `position` in the
+        `result`, `count` is one of the :attr:`counts`.
+        """
+        raise NotImplementedError()
+
+    def to_dict(self):
+        """
+        Returns a dictionary representing the pattern.
+        """
+        raise NotImplementedError()
+
+    def to_tuple(self):
+        """
+        Returns a compact representation of the pattern, that can be
+        marshalled.
+        """
+        raise NotImplementedError()
 
     def apply(self, result, argv):
-        try:
-            result[self.name] = next(argv)
-        except StopIteration:
+        """
+        Like :meth:`match` but for an :class:`~argvard.Argv` object, raises
+        :exc:`ArgumentMissing` if the pattern does not match.
+        """
+        position = self.match(
+            argv.argv, argv.position, len(argv.argv), result
+        )
+        if position is None:
             raise ArgumentMissing('%s is missing' % self.usage)
+        argv.position = position
 
 
-class Repetition(object):
+class Argument(Pattern):
     """
-    Represents one or more occurences of the given `pattern`.
+    Represents a positional argument with the given `name`.
     """
-    def __init__(self, pattern):
-        self.pattern = pattern
+    def __init__(self, name):
+        self.name = name
 
     @property
     def usage(self):
-        return self.pattern.usage + u'...'
+        return self.name
 
-    def apply(self, result, argv):
-        remaining = list(argv)
-        if remaining:
-            self.pattern.apply(result, iter([remaining]))
-        else:
-            raise ArgumentMissing('%s is missing' % self.usage)
+    def consume(self, arguments, position, count, result):
+        result[self.name] = arguments[position]
 
+    def to_dict(self):
+        return {'type': 'argument', 'name': self.name}
 
-class Optional(object):
+    def to_tuple(self):
+        return self.name
+
+
+class Repetition(Pattern):
+    """
+    Represents at least `minimum` and at most `maximum` occurences of the
+    given `pattern`. If `maximum` is `None`, there is no upper bound.
+
+    .. versionchanged:: 0.3.1
+       Added `minimum` and `maximum`.
+    """
+    def __init__(self, pattern, minimum=1, maximum=None):
+        self.pattern = pattern
+        self.minimum = minimum
+        self.maximum = maximum
+        self.counts = ((minimum, maximum), )
+
+    @property
+    def usage(self):
+        if self.maximum is None:
+            if self.minimum == 1:
+                return self.pattern.usage + u'...'
+            return u'%s{%d,}' % (self.pattern.usage, self.minimum)
+        elif self.minimum == self.maximum:
+            return u'%s{%d}' % (self.pattern.usage, self.minimum)
+        return u'%s{%d,%d}' % (self.pattern.usage, self.minimum, self.maximum)
+
+    def consume(self, arguments, position, count, result):
+        result[self.pattern.name] = arguments[position:position + count]
+
+    def to_dict(self):
+        return {
+            'type': 'repetition',
+            'pattern': self.pattern.to_dict(),
+            'minimum': self.minimum,
+            'maximum': self.maximum
+        }
+
+    def to_tuple(self):
+        return self.pattern.name, self.minimum, self.maximum
+
+
+class Optional(Pattern):
     """
     Represents an optional occurence of the given `patterns`.
     """
+    minimum = 0
+
     def __init__(self, patterns):
         self.patterns = patterns
+        self._suffixes = _suffix_counts(patterns)
+        self.counts = _merge(((0, 0), ) + self._suffixes[0])
+        self.maximum = self.counts[-1][1]
 
     @property
     def usage(self):
         return u'[%s]' % u' '.join(pattern.usage for pattern in self.patterns)
 
-    def apply(self, result, argv):
-        transaction = {}
-        position = argv.position
-        try:
-            for pattern in self.patterns:
-                pattern.apply(transaction, argv)
-        except ArgumentMissing:
-            argv.position = position
-        else:
-            result.update(transaction)
+    def consume(self, arguments, position, count, result):
+        if count:
+            _match_sequence(
+                self.patterns, self._suffixes, arguments, position,
+                position + count, result
+            )
+
+    def to_dict(self):
+        return {
+            'type': 'optional',
+            'patterns': [pattern.to_dict() for pattern in self.patterns]
+        }
+
+    def to_tuple(self):
+        return [pattern.to_tuple() for pattern in self.patterns]
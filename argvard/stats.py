@@ -0,0 +1,121 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.stats
+    ~~~~~~~~~~~~~
+
+    Resource accounting for applications, enabled by the option
+    :meth:`~argvard.Argvard.add_stats_option` adds.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import sys
+import time
+
+
+#: The clock used to measure the wall time.
+clock = getattr(time, 'perf_counter', time.time)
+
+
+def get_usage():
+    """
+    Returns the CPU time used by this process in seconds and its peak
+    resident set size in bytes, the latter is `None` where
+    :mod:`resource` is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        process_time = getattr(time, 'process_time', None) or time.clock
+        return process_time(), None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    peak_rss = usage.ru_maxrss
+    if sys.platform != 'darwin':
+        # Everyone else reports kilobytes.
+        peak_rss *= 1024
+    return usage.ru_utime + usage.ru_stime, peak_rss
+
+
+def get_allocated():
+    """
+    Returns the size and peak size of the memory blocks traced by
+    :mod:`tracemalloc` in bytes or `(None, None)`, if it is not tracing.
+    """
+    tracemalloc = sys.modules.get('tracemalloc')
+    if tracemalloc is None or not tracemalloc.is_tracing():
+        return None, None
+    return tracemalloc.get_traced_memory()
+
+
+def write_json_line(stats, stream=None):
+    """
+    Writes `stats` to `stream`, :data:`sys.stderr` by default, as a line
+    of JSON.
+    """
+    import json
+    stream = sys.stderr if stream is None else stream
+    stream.write(json.dumps(stats, sort_keys=True) + u'\n')
+
+
+class Recorder(object):
+    """
+    Measures resource usage between :meth:`start` and :meth:`stop` and
+    passes the results to `callback`, :func:`write_json_line` by default.
+
+    The results are a dictionary with the keys:
+
+    ``command_path``
+       The :attr:`~argvard.Context.command_path` of the `context`.
+    ``wall_time``, ``cpu_time``
+       The elapsed and the CPU time in seconds.
+    ``peak_rss``
+       The peak resident set size of the process in bytes.
+    ``allocated``, ``allocated_peak``
+       The memory traced by :mod:`tracemalloc` in bytes, if it is tracing.
+    """
+    def __init__(self, context, callback=None):
+        self.context = context
+        self.callback = write_json_line if callback is None else callback
+        self.started = None
+        self.cpu_started = None
+
+    def start(self):
+        self.cpu_started = get_usage()[0]
+        self.started = clock()
+
+    def stop(self):
+        wall_time = clock() - self.started
+        cpu_time, peak_rss = get_usage()
+        allocated, allocated_peak = get_allocated()
+        self.callback({
+            'command_path': list(self.context.command_path),
+            'wall_time': wall_time,
+            'cpu_time': cpu_time - self.cpu_started,
+            'peak_rss': peak_rss,
+            'allocated': allocated,
+            'allocated_peak': allocated_peak
+        })
+
+
+def start(context, callback=None):
+    """
+    Starts measuring resource usage and passes the results to `callback`,
+    once the application is done with the `context`. See :class:`Recorder`.
+    """
+    recorder = Recorder(context, callback=callback)
+    context.call_on_close(recorder.stop)
+    recorder.start()
+    return recorder
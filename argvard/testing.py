@@ -0,0 +1,129 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.testing
+    ~~~~~~~~~~~~~~~
+
+    Running applications in tests, without starting a process for each
+    call.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import sys
+from collections import namedtuple
+
+from argvard import _get_exit_status
+from argvard._compat import PY2
+
+
+if PY2:
+    # Accepts byte strings as well as unicode, like sys.stdout does.
+    from StringIO import StringIO
+else:
+    from io import StringIO
+
+
+class Result(namedtuple('Result', [
+    'exit_code', 'stdout', 'stderr', 'exception', 'exc_info'
+])):
+    """
+    The result of :meth:`CliRunner.invoke`.
+
+    .. attribute:: exit_code
+
+       The status the process would have exited with.
+
+    .. attribute:: stdout
+                   stderr
+
+       Everything written to :data:`sys.stdout` and :data:`sys.stderr`.
+
+    .. attribute:: exception
+
+       The exception raised by the application, other than
+       :exc:`SystemExit`, or `None`.
+
+    .. attribute:: exc_info
+
+       The :func:`sys.exc_info` of that exception or `None`.
+    """
+
+
+class CliRunner(object):
+    """
+    Calls applications within the current process, with their own
+    :data:`sys.argv`, :data:`sys.stdin`, :data:`sys.stdout`,
+    :data:`sys.stderr` and environment.
+
+    The environment is passed to the application, as `environ`, so options
+    and :attr:`Context.environ <argvard.Context.environ>` see it, while
+    :data:`os.environ` remains untouched.
+
+    :param environ: A mapping of environment variables used for every call,
+                    which is empty by default.
+    :param program: The name of the program in :data:`sys.argv`.
+    :param catch_exceptions: If `False`, exceptions other than
+                             :exc:`SystemExit` are raised instead of being
+                             stored in the result.
+
+    .. versionadded:: 0.3.1
+    """
+    def __init__(self, environ=None, program='application',
+                 catch_exceptions=True):
+        self.environ = {} if environ is None else environ
+        self.program = program
+        self.catch_exceptions = catch_exceptions
+
+    def invoke(self, application, arguments=(), input=None, environ=None):
+        """
+        Calls the `application` with the command line `arguments` and
+        returns a :class:`Result`.
+
+        :param input: A string read from :data:`sys.stdin`.
+        :param environ: A mapping of environment variables, that override
+                        those the runner has been created with.
+        """
+        call_environ = dict(self.environ)
+        if environ is not None:
+            call_environ.update(environ)
+        stdout, stderr = StringIO(), StringIO()
+        saved = sys.argv, sys.stdin, sys.stdout, sys.stderr
+        sys.argv = [self.program] + list(arguments)
+        sys.stdin = StringIO(input or u'')
+        sys.stdout, sys.stderr = stdout, stderr
+        exception = exc_info = None
+        try:
+            try:
+                application(environ=call_environ)
+            except SystemExit as error:
+                exit_code = _get_exit_status(SystemExit, error)
+                if not isinstance(error.code, (int, type(None))):
+                    # The interpreter would print this.
+                    stderr.write(u'%s\n' % error.code)
+            except Exception as error:
+                if not self.catch_exceptions:
+                    raise
+                exit_code = 1
+                exception = error
+                exc_info = sys.exc_info()
+            else:
+                exit_code = 0
+        finally:
+            sys.argv, sys.stdin, sys.stdout, sys.stderr = saved
+        return Result(
+            exit_code, stdout.getvalue(), stderr.getvalue(), exception,
+            exc_info
+        )
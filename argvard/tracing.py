@@ -0,0 +1,161 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    argvard.tracing
+    ~~~~~~~~~~~~~~~
+
+    Tracing of applications: calling an application with a
+    :class:`Tracer` opens spans around the call, each command, option and
+    main function, which are passed to an exporter, once the call is done.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import io
+import os
+import time
+import binascii
+
+
+#: The clock used to measure the duration of spans.
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class JSONLinesExporter(object):
+    """
+    Appends each span as a line of JSON to the file at `path`, the spans of
+    a call are written at once.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        import json
+        lines = u''.join(
+            u'%s\n' % json.dumps(span, sort_keys=True) for span in spans
+        )
+        with io.open(self.path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+
+
+class Span(object):
+    """
+    A span started by :meth:`Tracer.span`, that can be used as a context
+    manager, to end it.
+    """
+    def __init__(self, tracer, name, attributes, trace_id, span_id, parent_id):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.start = time.time()
+        self._started = clock()
+        self.duration = None
+
+    def end(self):
+        self.duration = clock() - self._started
+        self.tracer.end(self)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'attributes': self.attributes,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start,
+            'duration': self.duration
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.end()
+
+
+class Tracer(object):
+    """
+    Keeps track of nested spans and passes the spans of each trace as a list
+    of dictionaries to the :meth:`export` method of `exporter`, once the
+    outermost span ends.
+
+    Each dictionary contains the `name` and `attributes` of the span, the
+    `trace_id` shared by all spans of a trace, a `span_id` and the `parent_id`
+    of the enclosing span, the `start` as seconds since the epoch and the
+    `duration` in seconds.
+    """
+    def __init__(self, exporter):
+        self.exporter = exporter
+        self._stack = []
+        self._finished = []
+        self._trace_id = None
+        self._next_id = 1
+
+    def span(self, name, **attributes):
+        """
+        Starts and returns a :class:`Span`, that is nested in the current
+        span, if there is one.
+        """
+        if self._stack:
+            parent_id = self._stack[-1].span_id
+        else:
+            parent_id = None
+            self._trace_id = binascii.hexlify(os.urandom(8)).decode('ascii')
+            self._next_id = 1
+        span = Span(
+            self, name, attributes, self._trace_id, self._next_id, parent_id
+        )
+        self._next_id += 1
+        self._stack.append(span)
+        return span
+
+    def end(self, span):
+        self._stack.remove(span)
+        self._finished.append(span.to_dict())
+        if not self._stack:
+            spans, self._finished = self._finished, []
+            self.exporter.export(spans)
+
+
+def span_until_close(context, name, **attributes):
+    """
+    Starts a span with the tracer of the `context`, that ends, once the
+    application is done with the `context`.
+    """
+    span = context.tracer.span(name, **attributes)
+    context.call_on_close(span.end)
+    return span
+
+
+def trace_call(context, **attributes):
+    """
+    Starts the ``argvard.call`` span for a call of an application with the
+    `context`. The command path and exit status are added to the attributes,
+    when the span ends.
+    """
+    span = context.tracer.span(u'argvard.call', **attributes)
+
+    def end():
+        span.attributes['command_path'] = list(context.command_path)
+        span.attributes['exit_status'] = context.exit_status
+        span.end()
+
+    context.call_on_close(end)
+    return span
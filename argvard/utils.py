@@ -19,14 +19,13 @@
     :copyright: 2013
     :license: Apache License 2.0, see LICENSE for more details
 """
-import re
-import unicodedata
-from keyword import iskeyword
+from argvard._compat import PY2, iteritems
 
-from argvard._compat import PY2
 
-
-_python2_identifier_re = re.compile(r'^[a-zA-Z_][a-zA-Z_0-9]*$')
+# The modules used in this file are imported where they are needed, as they
+# are not necessary to run most applications and importing them increases
+# the startup time.
+_python2_identifier_re = None
 
 
 def is_python_identifier(possible_identifier):
@@ -45,6 +44,11 @@ def is_python2_identifier(possible_identifier):
     Returns `True` if the given `possible_identifier` can be used as an
     identifier in Python 2.
     """
+    global _python2_identifier_re
+    from keyword import iskeyword
+    if _python2_identifier_re is None:
+        import re
+        _python2_identifier_re = re.compile(r'^[a-zA-Z_][a-zA-Z_0-9]*$')
     match = _python2_identifier_re.match(possible_identifier)
     return bool(match) and not iskeyword(possible_identifier)
 
@@ -54,6 +58,8 @@ def is_python3_identifier(possible_identifier):
     Returns `True` if the given `possible_identifier` can be used as an
     identifier in Python 3.
     """
+    import unicodedata
+    from keyword import iskeyword
     possible_identifier = unicodedata.normalize('NFKC', possible_identifier)
     return (
         bool(possible_identifier) and
@@ -63,6 +69,7 @@ def is_python3_identifier(possible_identifier):
 
 
 def _is_in_id_start(character):
+    import unicodedata
     category = unicodedata.category(character)
     return category in set([
         'Lu', # uppercase letters
@@ -75,6 +82,7 @@ def _is_in_id_start(character):
 
 
 def _is_in_id_continue(character):
+    import unicodedata
     category = unicodedata.category(character)
     return _is_in_id_start(character) or category in set([
         'Mn', # nonspacing marks
@@ -84,6 +92,38 @@ def _is_in_id_continue(character):
     ]) or character == u'\u00B7'
 
 
+def clean_docstring(docstring):
+    """
+    Returns `docstring` with common leading whitespace and surrounding blank
+    lines removed, or `None` if `docstring` is `None`.
+    """
+    if docstring is None:
+        return None
+    # This is equivalent to textwrap.dedent(docstring).strip(), which would
+    # require importing textwrap for every documented option.
+    lines = docstring.split(u'\n')
+    margin = None
+    for line in lines:
+        content = line.lstrip(u' \t')
+        if not content:
+            continue
+        indentation = line[:len(line) - len(content)]
+        if margin is None:
+            margin = indentation
+        else:
+            for i, (a, b) in enumerate(zip(margin, indentation)):
+                if a != b:
+                    margin = margin[:i]
+                    break
+            else:
+                margin = margin[:len(indentation)]
+    margin_length = len(margin or u'')
+    return u'\n'.join(
+        line[margin_length:] if line.lstrip(u' \t') else u''
+        for line in lines
+    ).strip()
+
+
 def unique(iterable):
     """
     Returns an iterator that yields the first occurence of a hashable item in
@@ -94,3 +134,119 @@ def unique(iterable):
         if obj not in seen:
             yield obj
             seen.add(obj)
+
+
+def walk_commands(executable, path=()):
+    """
+    Returns an iterator over `(path, executable)` tuples for the `executable`
+    and all commands registered with it, where `path` is a tuple of the
+    command names leading to it.
+    """
+    yield path, executable
+    for name, command in iteritems(executable.commands):
+        for item in walk_commands(command, path + (name, )):
+            yield item
+
+
+def levenshtein(a, b):
+    """
+    Returns the Levenshtein distance between the strings `a` and `b`, the
+    number of insertions, deletions and substitutions needed to turn one into
+    the other.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, a_character in enumerate(a, start=1):
+        current = [i]
+        for j, b_character in enumerate(b, start=1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a_character != b_character)
+            ))
+        previous = current
+    return previous[-1]
+
+
+def bigrams(word):
+    """
+    Returns the set of bigrams in `word`, padded at the beginning and the end
+    so that every character is part of two bigrams.
+    """
+    padded = u'\x00' + word + u'\x00'
+    return set(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+class NgramIndex(object):
+    """
+    An index over strings that allows finding all strings within a given edit
+    distance of a word, without computing the distance to every string in the
+    index.
+
+    An edit operation changes at most two bigrams of a word, so a string
+    within distance `k` of the word has to share at least one of any `2k + 1`
+    bigrams of the word and all but `2k` of them overall. Candidates are
+    gathered from the postings of the rarest bigrams and filtered by those
+    bounds, before the actual distance is computed for the few that remain.
+    """
+    def __init__(self):
+        self._words = []
+        self._bigrams = []
+        self._ids = {}
+        self._postings = {}
+        self._lengths = {}
+
+    def __len__(self):
+        return len(self._words)
+
+    def add(self, word):
+        """
+        Adds `word` to the index.
+        """
+        if word in self._ids:
+            return
+        id = self._ids[word] = len(self._words)
+        self._words.append(word)
+        grams = bigrams(word)
+        self._bigrams.append(grams)
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(id)
+        self._lengths.setdefault(len(word), []).append(id)
+
+    def _candidates(self, word, grams, max_distance):
+        required = 2 * max_distance + 1
+        if len(grams) < required:
+            # Too short to filter by bigrams, every word of similar length is
+            # a candidate.
+            return set(
+                id
+                for length in range(
+                    len(word) - max_distance, len(word) + max_distance + 1
+                )
+                for id in self._lengths.get(length, ())
+            )
+        postings = sorted(
+            (self._postings.get(gram, ()) for gram in grams), key=len
+        )
+        return set(id for posting in postings[:required] for id in posting)
+
+    def search(self, word, max_distance):
+        """
+        Returns a list of `(distance, word)` tuples for every word in the index
+        at most `max_distance` away from the given `word`, sorted by distance.
+        """
+        grams = bigrams(word)
+        minimum_shared = len(grams) - 2 * max_distance
+        rv = []
+        for id in self._candidates(word, grams, max_distance):
+            candidate = self._words[id]
+            if abs(len(candidate) - len(word)) > max_distance:
+                continue
+            if len(grams & self._bigrams[id]) < minimum_shared:
+                continue
+            distance = levenshtein(word, candidate)
+            if distance <= max_distance:
+                rv.append((distance, candidate))
+        rv.sort()
+        return rv
@@ -0,0 +1,65 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    benchmarks.actions
+    ~~~~~~~~~~~~~~~~~~
+
+    Compares an option appending to the context through a function with the
+    ``'append'`` action, for a command line repeating the option many times.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import timeit
+
+from argvard import Argvard
+
+
+REPETITIONS = 500
+
+
+def with_function():
+    application = Argvard()
+
+    @application.option('-I path')
+    def include(context, path):
+        context.setdefault('include', []).append(path)
+
+    application.main()(lambda context: None)
+    return application
+
+
+def with_action():
+    application = Argvard()
+    application.option('-I|--include path', action='append')
+    application.main()(lambda context: None)
+    return application
+
+
+def main():
+    argv = ['application']
+    for i in range(REPETITIONS):
+        argv.extend(['-I', 'path-%d' % i])
+    for name, factory in [(u'function', with_function), (u'action', with_action)]:
+        application = factory()
+        duration = min(timeit.repeat(
+            lambda: application(argv, environ={}), number=20, repeat=5
+        )) / 20
+        print(u'%-10s %8.3fms' % (name, duration * 1e3))
+
+
+if __name__ == '__main__':
+    main()
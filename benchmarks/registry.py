@@ -0,0 +1,141 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    benchmarks.registry
+    ~~~~~~~~~~~~~~~~~~~
+
+    Generates synthetic applications of increasing width (options and
+    commands per executable) and depth (nesting of commands) and measures
+    registration, dispatch and help rendering.
+
+    Run with ``python benchmarks/registry.py``, the process exits with a
+    non-zero status if the cost per entry grows by more than the allowed
+    factor between the smallest and the largest width.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import os
+import sys
+import timeit
+from contextlib import contextmanager
+
+from argvard import Argvard, Command
+
+
+WIDTHS = [10, 100, 1000, 10000, 100000]
+DEPTHS = [1, 4, 16]
+
+#: The factor by which the cost per entry may grow between the smallest and
+#: the largest width, before the registry is considered to not scale.
+ALLOWED_GROWTH = 4
+
+
+def noop(context):
+    """
+    Does nothing.
+    """
+
+
+def build(width, depth):
+    application = Argvard()
+    executable = application
+    for level in range(depth):
+        for i in range(width):
+            executable.option('--option-%d|--alias-%d' % (i, i))(noop)
+        leaf = Command()
+        leaf.main()(noop)
+        for i in range(width - 1):
+            executable.register_command('command-%d' % i, leaf)
+        if level < depth - 1:
+            child = Command()
+            executable.register_command('command-%d' % (width - 1), child)
+            executable = child
+        else:
+            executable.register_command('command-%d' % (width - 1), leaf)
+    return application
+
+
+def argv_for(width, depth):
+    argv = ['application']
+    for level in range(depth):
+        argv.extend(['--option-%d' % (width - 1), 'command-%d' % (width - 1)])
+    return argv
+
+
+@contextmanager
+def silenced():
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as devnull:
+        sys.stdout = devnull
+        try:
+            yield
+        finally:
+            sys.stdout = stdout
+
+
+def show_help(application, width, depth):
+    argv = argv_for(width, depth)[:-1] + ['--help']
+    with silenced():
+        try:
+            application(argv)
+        except SystemExit:
+            pass
+
+
+def measure(width, depth):
+    repeat = max(1, 10000 // width)
+    register = min(timeit.repeat(
+        lambda: build(width, depth), number=1, repeat=3
+    ))
+    application = build(width, depth)
+    argv = argv_for(width, depth)
+    dispatch = min(timeit.repeat(
+        lambda: application(argv), number=repeat, repeat=3
+    )) / repeat
+    help = min(timeit.repeat(
+        lambda: show_help(application, width, depth), number=1, repeat=3
+    ))
+    return register, dispatch, help
+
+
+def main():
+    print(u'%8s %6s %14s %14s %14s' % (
+        u'width', u'depth', u'register/entry', u'dispatch', u'help/entry'
+    ))
+    failed = False
+    for depth in DEPTHS:
+        per_entry = []
+        for width in WIDTHS:
+            if width * depth > 100000:
+                continue
+            register, dispatch, help = measure(width, depth)
+            entries = width * depth
+            per_entry.append((register / entries, help / width))
+            print(u'%8d %6d %12.2fus %12.2fus %12.2fus' % (
+                width, depth,
+                register / entries * 1e6, dispatch * 1e6, help / width * 1e6
+            ))
+        for smallest, largest in zip(per_entry[0], per_entry[-1]):
+            if largest > smallest * ALLOWED_GROWTH:
+                failed = True
+    if failed:
+        print(u'cost per entry grows superlinearly', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    benchmarks.signature
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Measures parsing of argument lists with signatures containing nested
+    optionals and repetitions, as well as loading signatures from strings
+    compared to loading them from their serialized forms.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import pickle
+import timeit
+
+from argvard import Argv
+from argvard.signature import Signature
+
+
+SIGNATURES = [
+    u'a [b [c [d [e]]]]',
+    u'a [b c] [d e] [f g] [h i]',
+    u'[a [b [c [d [e [f [g [h]]]]]]]]',
+    u'[a] [b] [sources...] destination'
+]
+
+
+def main():
+    print(u'%-36s %9s %10s' % (u'signature', u'arguments', u'parse'))
+    for string in SIGNATURES:
+        signature = Signature.from_string(string, option=False)
+        for count in [1, 3, 5, 8, 1000]:
+            arguments = ['application'] + ['x'] * count
+            number = 10000
+            duration = min(timeit.repeat(
+                lambda: signature.parse(Argv(arguments)),
+                number=number, repeat=3
+            )) / number
+            print(u'%-36s %9d %8.2fus' % (string, count, duration * 1e6))
+
+
+def measure(function, number=10000):
+    return min(timeit.repeat(function, number=number, repeat=3)) / number
+
+
+def main_loading():
+    print()
+    print(u'%-36s %10s %10s %10s' % (
+        u'signature', u'string', u'loads', u'pickle'
+    ))
+    for string in SIGNATURES:
+        signature = Signature.from_string(string, option=False)
+        dumped = signature.dumps()
+        pickled = pickle.dumps(signature, pickle.HIGHEST_PROTOCOL)
+        print(u'%-36s %8.2fus %8.2fus %8.2fus' % (
+            string,
+            measure(lambda: Signature.from_string(string, option=False)) * 1e6,
+            measure(lambda: Signature.loads(dumped)) * 1e6,
+            measure(lambda: pickle.loads(pickled)) * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
+    main_loading()
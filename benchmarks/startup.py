@@ -0,0 +1,108 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    benchmarks.startup
+    ~~~~~~~~~~~~~~~~~~
+
+    Measures the cost of ``import argvard`` and of dispatching a trivial
+    application with ``python -X importtime`` and exits with a non-zero
+    status, if the number of imported modules or the time spent importing
+    them exceeds the budget.
+
+    Requires Python 3.7 or later.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import os
+import sys
+import subprocess
+
+
+BENCHMARKS_DIR = os.path.abspath(os.path.dirname(__file__))
+ECHO = os.path.join(
+    os.path.dirname(BENCHMARKS_DIR), 'tests', 'scripts', 'echo.py'
+)
+
+#: The maximum number of modules, that may be imported in addition to those
+#: imported by the interpreter itself.
+MODULE_BUDGET = 8
+
+#: The maximum time in seconds, that may be spent importing those modules.
+TIME_BUDGET = 0.02
+
+REPEAT = 10
+
+
+def import_times(arguments):
+    """
+    Runs the interpreter with `arguments` and returns a dictionary mapping
+    the name of each imported module to the time spent importing it, without
+    the time spent importing other modules.
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime'] + arguments,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=BENCHMARKS_DIR
+    )
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode('utf-8'))
+    rv = {}
+    for line in stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        rv[name.strip()] = int(self_time) / 1e6
+    return rv
+
+
+def measure(arguments):
+    """
+    Returns the modules imported by running the interpreter with `arguments`,
+    that are not imported by the interpreter itself, and the best time spent
+    importing them out of :data:`REPEAT` runs.
+    """
+    baseline = set(import_times(['-c', 'pass']))
+    best = None
+    for _ in range(REPEAT):
+        times = import_times(arguments)
+        modules = sorted(set(times) - baseline)
+        total = sum(times[module] for module in modules)
+        best = total if best is None else min(best, total)
+    return modules, best
+
+
+def main():
+    failed = False
+    for name, arguments in [
+        (u'import argvard', ['-c', 'import argvard']),
+        (u'echo.py', [ECHO, 'foo', 'bar'])
+    ]:
+        modules, duration = measure(arguments)
+        print(u'%s: %d modules, %.2fms' % (name, len(modules), duration * 1e3))
+        for module in modules:
+            print(u'    %s' % module)
+        if len(modules) > MODULE_BUDGET or duration > TIME_BUDGET:
+            failed = True
+    if failed:
+        print(u'startup budget exceeded', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    benchmarks.suggestions
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Measures how long it takes to find suggestions for a mistyped command in
+    applications with an increasing number of commands.
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import random
+import string
+import timeit
+
+from argvard import Argvard, Command
+
+
+COUNTS = [100, 1000, 5000, 20000]
+
+
+def random_name(random):
+    return u''.join(
+        random.choice(string.ascii_lowercase)
+        for _ in range(random.randint(4, 12))
+    )
+
+
+def main():
+    generator = random.Random(0)
+    print(u'%8s %14s' % (u'commands', u'suggestion'))
+    for count in COUNTS:
+        application = Argvard()
+        command = Command()
+        names = set()
+        while len(names) < count:
+            names.add(random_name(generator))
+        for name in names:
+            application.register_command(name, command)
+        typos = []
+        for name in generator.sample(sorted(names), 100):
+            position = generator.randrange(len(name))
+            typos.append(name[:position] + name[position + 1:])
+        duration = min(timeit.repeat(
+            lambda: [application.get_suggestions(typo) for typo in typos],
+            number=1, repeat=3
+        )) / len(typos)
+        print(u'%8d %12.3fms' % (count, duration * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -32,3 +32,11 @@ def tests_dir():
 @pytest.fixture
 def test_scripts_dir(tests_dir):
     return os.path.join(tests_dir, 'scripts')
+
+
+@pytest.fixture
+def defer_options():
+    """
+    Whether applications defer options, parametrize this to test both.
+    """
+    return False
@@ -0,0 +1,130 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_batch
+    ~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import pytest
+
+from argvard import Argvard, Command, Plan, UsageError, batch
+from argvard.batch import get_fork_context
+
+
+@pytest.fixture
+def application():
+    application = Argvard()
+
+    @application.option('-v')
+    def verbose(context):
+        pass
+
+    @application.option('--level level', environment_variable='LEVEL')
+    def level(context, level):
+        pass
+
+    application.main()(lambda context: None)
+    command = Command()
+
+    @command.option('--option argument')
+    def option(context, argument):
+        pass
+
+    command.main('arguments...')(lambda context, arguments: None)
+    application.register_command('command', command)
+    return application
+
+
+def make_argvs(count):
+    argvs = []
+    for i in range(count):
+        if i % 3 == 0:
+            argvs.append(['app', '-v', 'command', '--option', str(i), 'a', 'b'])
+        elif i % 3 == 1:
+            argvs.append(['app', '--level', str(i)])
+        else:
+            argvs.append(['app', 'unexpected-%d' % i])
+    return argvs
+
+
+def summarize(result):
+    if isinstance(result, Plan):
+        return (
+            [
+                (step.name, step.executable, [
+                    (option, arguments) for option, arguments in step.options
+                ])
+                for step in result.steps
+            ],
+            result.main_arguments
+        )
+    return type(result), result.args
+
+
+@pytest.mark.parametrize('workers', [
+    1,
+    pytest.param(3, marks=pytest.mark.skipif(
+        get_fork_context() is None, reason='requires fork'
+    ))
+])
+def test_parse_many(application, workers):
+    argvs = make_argvs(50)
+    environ = {'LEVEL': 'env'}
+    results = list(application.parse_many(
+        iter(argvs), workers=workers, environ=environ, chunksize=4
+    ))
+    expected = []
+    for argv in argvs:
+        try:
+            expected.append(application.parse(argv, environ))
+        except UsageError as error:
+            expected.append(error)
+    assert list(map(summarize, results)) == list(map(summarize, expected))
+
+
+@pytest.mark.skipif(get_fork_context() is None, reason='requires fork')
+def test_parse_many_execute():
+    called = []
+    application = Argvard()
+
+    @application.main('argument')
+    def main(context, argument):
+        called.append(argument)
+
+    plans = list(application.parse_many(
+        [['app', 'foo'], ['app', 'bar']], workers=2, environ={}, chunksize=1
+    ))
+    for plan in plans:
+        application.execute(plan)
+    assert called == ['foo', 'bar']
+
+
+@pytest.mark.skipif(get_fork_context() is None, reason='requires fork')
+def test_parse_many_replaced_workers(application, monkeypatch):
+    class Context(object):
+        # Workers exit after each chunk and are replaced by new ones.
+        def Pool(self, workers):
+            return get_fork_context().Pool(workers, maxtasksperchild=1)
+
+    monkeypatch.setattr(batch, 'get_fork_context', Context)
+    argvs = make_argvs(12)
+    results = list(application.parse_many(
+        argvs, workers=2, environ={}, chunksize=1
+    ))
+    expected = list(application.parse_many(argvs, workers=1, environ={}))
+    assert list(map(summarize, results)) == list(map(summarize, expected))
+    assert not batch._applications
@@ -0,0 +1,280 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_completion
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import subprocess
+try:
+    from shutil import which
+except ImportError:
+    from distutils.spawn import find_executable as which
+
+import pytest
+
+from argvard import Argvard, Command, completion
+
+
+@pytest.fixture
+def application():
+    application = Argvard()
+
+    @application.option('-v|--verbose')
+    def verbose(context):
+        """
+        Be loud.
+
+        Really loud.
+        """
+
+    @application.option('--level level')
+    def level(context, level):
+        pass
+
+    build = Command()
+
+    @build.option('-o|--output path')
+    def output(context, path):
+        """
+        Where it's written.
+        """
+
+    build.main('sources...')(lambda context, sources: None)
+    build.register_command('sub', Command())
+    application.register_command('build', build)
+
+    @build.completer('path')
+    def complete_path(context):
+        return ['output', 'other', 'build']
+
+    return application
+
+
+def test_get_table(application):
+    assert completion.get_table(application) == [
+        ([], ['build'], [
+            (['-h', '--help'], 0, u'Show this text.'),
+            (['-v', '--verbose'], 0, u'Be loud.'),
+            (['--level'], 1, u'')
+        ]),
+        (['build'], ['sub'], [
+            (['-h', '--help'], 0, u'Show this text.'),
+            (['-o', '--output'], 1, u"Where it's written.")
+        ]),
+        (['build', 'sub'], [], [
+            (['-h', '--help'], 0, u'Show this text.')
+        ])
+    ]
+
+
+def test_hash(application):
+    first = completion.get_hash(completion.get_table(application))
+    assert completion.get_hash(completion.get_table(application)) == first
+    application.register_command('other', Command())
+    assert completion.get_hash(completion.get_table(application)) != first
+
+
+@pytest.mark.parametrize('shell', ['bash', 'zsh', 'fish'])
+def test_generate(application, shell):
+    script = completion.generate(application, shell, 'tool')
+    assert completion.read_hash(script) == completion.get_hash(
+        completion.get_table(application)
+    )
+    if shell == 'zsh':
+        assert script.startswith(u'#compdef tool\n')
+    if shell == 'fish':
+        assert (
+            u"complete -c 'tool' -n '__tool_argvard_at \\'build\\'' "
+            u"-s 'o' -l 'output' -r -d 'Where it\\'s written.'\n"
+        ) in script
+
+
+def test_generate_unknown_shell(application):
+    with pytest.raises(ValueError):
+        completion.generate(application, 'csh', 'tool')
+
+
+def test_read_hash():
+    assert completion.read_hash(u'complete -F foo foo\n') is None
+
+
+@pytest.mark.skipif(which('bash') is None, reason='requires bash')
+@pytest.mark.parametrize(('words', 'expected'), [
+    ([''], ['build']),
+    (['-'], ['-h', '--help', '-v', '--verbose', '--level']),
+    (['--level', 'x', 'b'], ['build']),
+    (['build', '--'], ['--help', '--output']),
+    (['build', '-o', 'x', ''], ['sub']),
+    (['build', '--output', '=', 'x', 's'], ['sub']),
+    (['build', 'sub', '-'], ['-h', '--help']),
+    (['build', 'source', 's'], [])
+])
+def test_bash(application, tmpdir, words, expected):
+    script = tmpdir.join('tool.bash')
+    script.write(completion.generate(application, 'bash', 'tool'))
+    process = subprocess.Popen(
+        [
+            'bash', '-c',
+            'source "$1"; shift; COMP_WORDS=("$@"); '
+            'COMP_CWORD=$((${#COMP_WORDS[@]} - 1)); _tool_argvard; '
+            'printf "%s\\n" "${COMPREPLY[@]}"',
+            'bash', str(script), 'tool'
+        ] + words,
+        stdout=subprocess.PIPE,
+        cwd=str(tmpdir.mkdir('empty'))
+    )
+    stdout, _ = process.communicate()
+    assert process.returncode == 0
+    assert stdout.decode('utf-8').split() == expected
+
+
+def test_main(capsys):
+    with pytest.raises(SystemExit):
+        completion.application([
+            'completion', 'csh', 'argvard.completion:application', 'tool'
+        ])
+    stdout, stderr = capsys.readouterr()
+    assert stderr.startswith(u'error: unsupported shell "csh"\n')
+
+    completion.application([
+        'completion', 'bash', 'argvard.completion:application', 'tool'
+    ])
+    stdout, stderr = capsys.readouterr()
+    assert stdout == completion.generate(
+        completion.application, 'bash', 'tool'
+    )
+
+
+class TestComplete(object):
+    @pytest.mark.parametrize(('words', 'expected'), [
+        ([''], ['build']),
+        (['--'], ['--help', '--level', '--verbose']),
+        (['--level', 'x', 'b'], ['build']),
+        (['--level', ''], []),
+        (['build', '-'], ['--help', '--output', '-h', '-o']),
+        (['build', '-o', 'o'], ['other', 'output']),
+        (['build', '--output=o'], ['--output=other', '--output=output']),
+        (['build', '--output', '=', 'o'], ['other', 'output']),
+        (['build', '--output', '='], ['build', 'other', 'output']),
+        (['build', 'src', ''], []),
+        # Options cannot follow positional arguments.
+        (['build', 'src', '-'], []),
+        (['build', 's'], ['sub'])
+    ])
+    def test_complete(self, application, words, expected):
+        assert completion.complete(application, ['tool'] + words) == expected
+
+    def test_permute(self, application):
+        application.permute = True
+        words = ['tool', 'build', 'src', '-']
+        assert completion.complete(application, words) == [
+            '--help', '--output', '-h', '-o'
+        ]
+
+    def test_main_arguments(self):
+        application = Argvard()
+        application.main('source [mode] destination...')(lambda context: None)
+        for name in ['source', 'mode', 'destination']:
+            application.completer(name)(
+                lambda context, name=name: [name + '-value']
+            )
+        for i, name in enumerate(['source', 'mode', 'destination']):
+            words = ['tool'] + ['x'] * i + ['']
+            assert completion.complete(application, words) == [name + '-value']
+        words = ['tool'] + ['x'] * 5 + ['']
+        assert completion.complete(application, words) == ['destination-value']
+
+    def test_context(self, application):
+        contexts = []
+
+        @application.commands['build'].completer('sources')
+        def complete_sources(context):
+            contexts.append(context)
+            return []
+
+        completion.complete(
+            application, ['tool', 'build', ''], environ={'FOO': 'bar'}
+        )
+        context, = contexts
+        assert context.command_path == ['tool', 'build']
+        assert context.command is application.commands['build']
+        assert context.environ == {'FOO': 'bar'}
+
+    def test_ttl(self, application, tmpdir, monkeypatch):
+        called = []
+
+        @application.commands['build'].completer('sources', ttl=60)
+        def complete_sources(context):
+            called.append(True)
+            return ['src', 'lib']
+
+        now = [1000.0]
+        monkeypatch.setattr(completion.time, 'time', lambda: now[0])
+        directory = str(tmpdir.join('cache'))
+        words = ['tool', 'build', '']
+        for cache in [
+            completion.ValueCache(directory), completion.ValueCache(directory)
+        ]:
+            assert completion.complete(application, words, cache=cache) == [
+                'sub', 'lib', 'src'
+            ]
+        assert called == [True]
+        now[0] += 61
+        completion.complete(application, words, cache=cache)
+        assert called == [True, True]
+
+    def test_search(self):
+        names = sorted(['--help', '--verbose', '--version', '-v'])
+        assert completion.search(names, '--ver') == ['--verbose', '--version']
+        assert completion.search(names, '--x') == []
+        assert completion.search(names, '') == names
+
+    def test_call(self, application, capsys):
+        application(
+            ['/usr/bin/tool', 'build', '-o', 'o'],
+            environ={'_TOOL_COMPLETE': '1'}
+        )
+        stdout, stderr = capsys.readouterr()
+        assert stdout == u'other\noutput\n'
+
+    def test_call_other_application(self, capsys):
+        called = []
+        application = Argvard()
+        application.main()(lambda context: called.append(True))
+        application(['other'], environ={'_TOOL_COMPLETE': '1'})
+        assert called == [True]
+        assert capsys.readouterr()[0] == u''
+
+
+@pytest.mark.parametrize('shell', ['bash', 'zsh', 'fish'])
+def test_generate_dynamic(shell):
+    script = completion.generate_dynamic(shell, 'tool')
+    assert u'_TOOL_COMPLETE=1' in script
+    script = completion.generate_dynamic(shell, 'my-tool')
+    assert u'_MY_TOOL_COMPLETE=1' in script
+
+
+def test_main_dynamic(capsys):
+    completion.application(['completion', '--dynamic', 'fish', 'tool'])
+    stdout, stderr = capsys.readouterr()
+    assert stdout == completion.generate_dynamic('fish', 'tool')
+
+    with pytest.raises(SystemExit):
+        completion.application(['completion', 'fish', 'tool'])
+    stdout, stderr = capsys.readouterr()
+    assert stderr.startswith(u'error: target is missing\n')
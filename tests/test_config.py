@@ -0,0 +1,182 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_config
+    ~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+
+import pytest
+
+from argvard import Argvard, Command, config
+from argvard.config import ConfigCache
+from argvard.exceptions import InvalidConfig
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return ConfigCache(str(tmpdir.join('cache')))
+
+
+def write(tmpdir, name, content):
+    path = tmpdir.join(name)
+    path.write(content)
+    return str(path)
+
+
+class TestParse(object):
+    def test_json(self, tmpdir):
+        path = write(tmpdir, 'config.json', '{"a": 1, "b": {"c": "d"}}')
+        assert config.parse(path) == {'a': 1, 'b': {'c': 'd'}}
+
+    def test_json_not_an_object(self, tmpdir):
+        path = write(tmpdir, 'config.json', '[]')
+        with pytest.raises(InvalidConfig):
+            config.parse(path)
+
+    def test_ini(self, tmpdir):
+        path = write(tmpdir, 'config.ini', (
+            u'[DEFAULT]\n'
+            u'Verbose = yes\n'
+            u'[section]\n'
+            u'key = value\n'
+        ))
+        assert config.parse(path) == {
+            'Verbose': 'yes',
+            'section': {'Verbose': 'yes', 'key': 'value'}
+        }
+
+    @pytest.mark.skipif(config.tomllib is None, reason='requires tomllib')
+    def test_toml(self, tmpdir):
+        path = write(tmpdir, 'config.toml', u'a = 1\n[b]\nc = "d"\n')
+        assert config.parse(path) == {'a': 1, 'b': {'c': 'd'}}
+
+    def test_invalid(self, tmpdir):
+        path = write(tmpdir, 'config.json', '{')
+        with pytest.raises(InvalidConfig):
+            config.parse(path)
+
+    def test_unknown_format(self, tmpdir):
+        path = write(tmpdir, 'config.yaml', 'a: 1')
+        with pytest.raises(InvalidConfig):
+            config.parse(path)
+
+
+class TestConfigCache(object):
+    @pytest.fixture
+    def parsed(self, monkeypatch):
+        parsed = []
+
+        def parse(path):
+            parsed.append(path)
+            return config.parse_json(path)
+        monkeypatch.setitem(config.PARSERS, '.json', parse)
+        return parsed
+
+    def test_missing(self, tmpdir, cache):
+        assert cache.load(str(tmpdir.join('missing.json'))) is None
+
+    def test_memory(self, tmpdir, cache, parsed):
+        path = write(tmpdir, 'config.json', '{"a": 1}')
+        assert cache.load(path) == {'a': 1}
+        assert cache.load(path) == {'a': 1}
+        assert parsed == [path]
+
+    def test_disk(self, tmpdir, cache, parsed):
+        path = write(tmpdir, 'config.json', '{"a": 1}')
+        assert cache.load(path) == {'a': 1}
+        assert ConfigCache(cache.directory).load(path) == {'a': 1}
+        assert parsed == [path]
+
+    def test_invalidation(self, tmpdir, cache, parsed):
+        path = write(tmpdir, 'config.json', '{"a": 1}')
+        assert cache.load(path) == {'a': 1}
+        write(tmpdir, 'config.json', '{"a": 12}')
+        assert ConfigCache(cache.directory).load(path) == {'a': 12}
+        stat = os.stat(path)
+        write(tmpdir, 'config.json', '{"a": 2}')
+        os.utime(path, (stat.st_atime, stat.st_mtime + 1))
+        assert cache.load(path) == {'a': 2}
+        assert parsed == [path] * 3
+
+    def test_broken_cache_file(self, tmpdir, cache, parsed):
+        path = write(tmpdir, 'config.json', '{"a": 1}')
+        cache.load(path)
+        cache_path = cache.get_cache_path(cache.get_key(path))
+        with open(cache_path, 'wb') as file:
+            file.write(b'garbage')
+        assert ConfigCache(cache.directory).load(path) == {'a': 1}
+        assert parsed == [path] * 2
+
+    def test_unwritable_cache_directory(self, tmpdir, parsed):
+        path = write(tmpdir, 'config.json', '{"a": 1}')
+        cache = ConfigCache(write(tmpdir, 'file', ''))
+        assert cache.load(path) == {'a': 1}
+
+
+class TestExecutable(object):
+    def test_argvard(self, tmpdir, cache):
+        first = write(tmpdir, 'first.json', '{"a": 1, "b": 1, "c": 1}')
+        second = write(tmpdir, 'second.json', '{"b": 2}')
+        argvard = Argvard(
+            defaults={'a': 0, 'd': 0},
+            config_files=[first, second, str(tmpdir.join('missing.json'))],
+            config_cache=cache
+        )
+
+        @argvard.option('-c value')
+        def option(context, value):
+            context['c'] = value
+
+        @argvard.main()
+        def main(context):
+            assert context == {'a': 1, 'b': 2, 'c': 'option', 'd': 0}
+        argvard(['application', '-c', 'option'])
+
+    def test_command(self, tmpdir, cache):
+        path = write(tmpdir, 'config.json', '{"a": 1, "b": 1}')
+        argvard = Argvard(defaults={'a': 0})
+        command = Command(
+            defaults={'b': 0, 'c': 0}, config_files=[path], config_cache=cache
+        )
+
+        @command.main()
+        def main(context):
+            assert context == {'a': 0, 'b': 1, 'c': 0}
+        argvard.register_command('command', command)
+        argvard(['application', 'command'])
+
+    def test_append(self, tmpdir, cache):
+        path = write(tmpdir, 'config.ini', u'[DEFAULT]\ninclude = foo\n')
+        argvard = Argvard(config_files=[path], config_cache=cache)
+        argvard.option('-I path', action='append', key='include')
+
+        @argvard.main()
+        def main(context):
+            assert context['include'] == ['foo', 'x']
+        argvard(['application', '-I', 'x'])
+        assert cache.load(path)['include'] == 'foo'
+
+    def test_invalid(self, tmpdir, cache, capsys):
+        path = write(tmpdir, 'config.json', '{')
+        argvard = Argvard(config_files=[path], config_cache=cache)
+        argvard.main()(lambda context: None)
+        with pytest.raises(SystemExit):
+            argvard(['application'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(u'error: %s: ' % path)
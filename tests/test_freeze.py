@@ -0,0 +1,251 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_freeze
+    ~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import sys
+
+import pytest
+
+from argvard import Argvard, Command, Context
+from argvard.freeze import freeze, application as freeze_application
+from argvard.plugins import PluginCommand
+
+
+DECORATED = u"""
+from argvard import Argvard, Command
+
+calls = []
+application = Argvard(defaults={'verbose': False}, permute=True)
+application.option('-v|--verbose', action='store_const', description='Be loud.')
+application.add_profile_option(limit=7)
+application.add_stats_option(environment_variable='STATS')
+
+
+@application.option('--level level', environment_variable='LEVEL')
+def level(context, level):
+    \"\"\"Sets the level.\"\"\"
+    calls.append(('level', level))
+
+
+@application.main('[sources{1,2}] destination')
+def main(context, destination, sources=()):
+    \"\"\"
+    Copies things.
+    \"\"\"
+    calls.append(('main', context['verbose'], list(sources), destination))
+
+
+command = Command()
+
+
+@command.main('count')
+def command_main(context, count=0):
+    calls.append(('command', count))
+
+
+@application.completer('destination', ttl=60)
+def complete_destination(context, prefix):
+    return ['here', 'there']
+
+
+application.register_command('command', command)
+application.register_command('alias', command)
+"""
+
+FUNCTIONS = u"""
+calls = []
+
+
+def level(context, level):
+    \"\"\"Sets the level.\"\"\"
+    calls.append(('level', level))
+
+
+def times(context, times=1):
+    calls.append(('times', times))
+
+
+def main(context, destination, sources=()):
+    \"\"\"
+    Copies things.
+    \"\"\"
+    calls.append(('main', context['verbose'], list(sources), destination))
+
+
+def command_main(context, count=0):
+    calls.append(('command', count))
+
+
+def complete_destination(context, prefix):
+    return ['here', 'there']
+"""
+
+BUILDER = u"""
+from argvard import Argvard, Command
+
+import argvard_test_functions as functions
+
+application = Argvard(defaults={'verbose': False}, permute=True)
+application.option('-v|--verbose', action='store_const', description='Be loud.')
+application.add_profile_option(limit=7)
+application.add_stats_option(environment_variable='STATS')
+application.option('--level level', environment_variable='LEVEL')(
+    functions.level
+)
+application.option('--times times')(functions.times)
+application.main('[sources{1,2}] destination')(functions.main)
+application.completer('destination', ttl=60)(functions.complete_destination)
+
+command = Command()
+command.main('count')(functions.command_main)
+application.register_command('command', command)
+application.register_command('alias', command)
+"""
+
+
+def write_module(tmpdir, name, source):
+    tmpdir.join(name + '.py').write(source)
+
+
+@pytest.fixture
+def modules(tmpdir, monkeypatch):
+    names = [
+        'argvard_test_decorated', 'argvard_test_functions',
+        'argvard_test_builder', 'argvard_test_frozen'
+    ]
+    for name, source in zip(names, [DECORATED, FUNCTIONS, BUILDER]):
+        write_module(tmpdir, name, source)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    for name in names:
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    return tmpdir
+
+
+def load_frozen(tmpdir, application):
+    write_module(tmpdir, 'argvard_test_frozen', freeze(application))
+    import argvard_test_frozen
+    return argvard_test_frozen.application
+
+
+def get_help(application, executable, command_path):
+    context = Context(application, 'app')
+    context.command_path = command_path
+    return executable.format_help(context)
+
+
+def get_executable(application, path):
+    executable = application
+    for name in path[1:]:
+        executable = executable.commands[name]
+    return executable
+
+
+def test_builder(modules):
+    import argvard_test_builder as module
+    import argvard_test_functions as functions
+    frozen = load_frozen(modules, module.application)
+    assert frozen is not module.application
+    assert frozen.commands['command'] is frozen.commands['alias']
+    for path in [['app'], ['app', 'command']]:
+        assert get_help(frozen, get_executable(frozen, path), path) == get_help(
+            module.application, get_executable(module.application, path), path
+        )
+    assert frozen.completers == module.application.completers
+    assert frozen.options['--profile-to'].function.limit == 7
+    assert frozen.options['--stats'].environment_variable == 'STATS'
+
+    environ = {'LEVEL': 'env'}
+    frozen(['app', 'a', '-v', 'b', '--times', '2', 'c'], environ)
+    frozen(['app', 'alias', '3'], environ)
+    assert functions.calls == [
+        ('times', 2), ('level', 'env'), ('main', True, ['a', 'b'], 'c'),
+        ('level', 'env'), ('command', 3)
+    ]
+
+
+def test_annotated(modules):
+    import argvard_test_builder as module
+    source = freeze(module.application)
+    assert u'annotated(' in source
+    assert u'argvard_test_builder' not in source
+    # Importing the frozen module must not create the application again.
+    del sys.modules['argvard_test_builder']
+    write_module(modules, 'argvard_test_frozen', source)
+    import argvard_test_frozen
+    assert '--times' in argvard_test_frozen.application.options
+    assert 'argvard_test_builder' not in sys.modules
+    assert 'argvard_test_functions' in sys.modules
+
+
+def test_decorated(modules):
+    import argvard_test_decorated as module
+    with pytest.raises(ValueError) as info:
+        freeze(module.application)
+    assert u'argvard_test_decorated' in str(info.value)
+
+
+def test_plugin(modules):
+    application = Argvard()
+    application.register_command(
+        'plugin', PluginCommand('plugin', 'argvard_test_plugin:command')
+    )
+    frozen = load_frozen(modules, application)
+    assert type(frozen.commands['plugin']) is PluginCommand
+    assert frozen.commands['plugin'].target == 'argvard_test_plugin:command'
+
+
+def test_closure():
+    application = Argvard()
+    application.main()(lambda context: None)
+    with pytest.raises(ValueError):
+        freeze(application)
+
+
+def test_literal():
+    application = Argvard(defaults={'object': object()})
+    with pytest.raises(ValueError):
+        freeze(application)
+
+
+def test_command_type():
+    class Custom(Command):
+        pass
+
+    application = Argvard()
+    application.register_command('custom', Custom())
+    with pytest.raises(ValueError):
+        freeze(application)
+
+
+def test_main(modules, capsys):
+    output = modules.join('argvard_test_frozen.py')
+    freeze_application([
+        'freeze', 'argvard_test_builder:application', str(output)
+    ], {})
+    assert u'argvard_test_builder:application' in output.read()
+    with pytest.raises(SystemExit):
+        freeze_application(['freeze', 'argvard_test_builder:command', 'x'], {})
+    assert u'target is not an application' in capsys.readouterr()[1]
+    with pytest.raises(SystemExit):
+        freeze_application(
+            ['freeze', 'argvard_test_decorated:application', 'x'], {}
+        )
+    assert u'error: cannot freeze target: functions of argvard_test_decorated' \
+        in capsys.readouterr()[1]
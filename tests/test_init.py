@@ -20,12 +20,15 @@
     :license: Apache License 2.0, see LICENSE for more details
 """
 import os
+import sys
+import pickle
 import subprocess
 
 import pytest
 
-from argvard import Argvard, Command, UsageError
-from argvard.exceptions import InvalidSignature
+from argvard import Argvard, Command, UsageError, Option, OptionTable
+from argvard.testing import CliRunner
+from argvard.exceptions import InvalidSignature, UnexpectedArgument
 
 
 class TestArgvard(object):
@@ -245,18 +248,33 @@ class TestArgvard(object):
         argvard(['application', 'spam', 'eggs'])
         assert called == [['spam', 'eggs']]
 
-    def test_main_without_argv(self, test_scripts_dir):
+    def test_main_without_argv(self, test_scripts_dir, monkeypatch):
+        monkeypatch.syspath_prepend(test_scripts_dir)
+        from echo import application
+        result = CliRunner().invoke(application, ['foo', 'bar', 'baz'])
+        assert result.stdout == u'foo\nbar\nbaz\n'
+        assert result.stderr == u''
+
+    def test_dispatch_does_not_import_heavy_modules(self, test_scripts_dir):
+        code = (
+            'import sys\n'
+            'before = set(sys.modules)\n'
+            'sys.argv = ["echo.py", "foo", "--", "-h"]\n'
+            'exec(open(%r).read())\n'
+            'print(" ".join(set(sys.modules) - before))\n'
+        ) % os.path.join(test_scripts_dir, 'echo.py')
         process = subprocess.Popen(
-            [
-                'python', os.path.join(test_scripts_dir, 'echo.py'),
-                'foo', 'bar', 'baz'
-            ],
+            [sys.executable, '-c', code],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE
         )
         stdout, stderr = process.communicate()
-        assert stdout == b'foo\nbar\nbaz\n'
         assert stderr == b''
+        imported = set(stdout.decode('ascii').splitlines()[-1].split())
+        for module in [
+            'textwrap', 'inspect', 'unicodedata', 'keyword', 'argvard.config'
+        ]:
+            assert module not in imported
 
     def test_from_main(self):
         called = []
@@ -268,6 +286,117 @@ class TestArgvard(object):
         application(['application'])
         assert called == [True]
 
+    def test_command_suggestion(self, capsys):
+        argvard = Argvard()
+        argvard.main()(lambda context: None)
+        argvard.register_command('command', Command())
+        argvard.register_command('other', Command())
+
+        with pytest.raises(SystemExit):
+            argvard(['application', 'comand'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "comand", did you mean "command"?\n'
+            u'usage: application [-h|--help]\n'
+        )
+
+        with pytest.raises(SystemExit):
+            argvard(['application', 'unrelated'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "unrelated"\n'
+            u'usage: application [-h|--help]\n'
+        )
+
+    @pytest.mark.parametrize('defer_options', [False, True])
+    def test_command_suggestion_without_main(self, capsys, defer_options):
+        argvard = Argvard(defer_options=defer_options)
+        command = Command()
+        command.register_command('commit', Command())
+        argvard.register_command('remote', command)
+        argvard.register_command('commit', Command())
+
+        with pytest.raises(SystemExit):
+            argvard(['application', 'comit'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "comit", did you mean "commit"?\n'
+            u'usage: application [-h|--help]\n'
+        )
+
+        with pytest.raises(SystemExit):
+            argvard(['application', 'remote', 'comit'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(
+            u'error: unexpected argument "comit", did you mean "commit"?\n'
+        )
+
+        with pytest.raises(SystemExit):
+            argvard(['application'])
+        stdout, stderr = capsys.readouterr()
+        assert stdout.startswith(u'usage: application')
+        assert stderr == u''
+
+    def test_command_suggestion_after_positional(self, capsys):
+        argvard = Argvard()
+        argvard.main('argument')(lambda context, argument: None)
+        argvard.register_command('command', Command())
+
+        with pytest.raises(SystemExit):
+            argvard(['application', 'foo', 'comand'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(u'error: unexpected argument "comand"\n')
+
+    def test_option_suggestion(self, capsys):
+        argvard = Argvard()
+
+        @argvard.option('--verbose')
+        def verbose(context):
+            pass
+
+        argvard.main()(lambda context: None)
+
+        with pytest.raises(SystemExit):
+            argvard(['application', '--verbsoe'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(
+            u'error: unexpected argument "--verbsoe", did you mean "--verbose"?\n'
+        )
+
+    @pytest.mark.parametrize('permute', [False, True])
+    def test_option_suggestion_taken_for_positional(self, capsys, permute):
+        argvard = Argvard(permute=permute)
+        command = Command()
+        command.option('--verbose')(lambda context: None)
+        command.main('path')(lambda context, path: None)
+        argvard.register_command('build', command)
+
+        with pytest.raises(SystemExit):
+            argvard(['tool', 'build', '--hepl', 'src'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(
+            u'error: unexpected argument "--hepl", did you mean "--help"?\n'
+        )
+
+        with pytest.raises(SystemExit):
+            argvard(['tool', 'build', '--verbos', 'src'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(
+            u'error: unexpected argument "--verbos", '
+            u'did you mean "--verbose"?\n'
+        )
+
+    def test_get_suggestions(self):
+        argvard = Argvard()
+        for name in ['build', 'built', 'test', 'install']:
+            argvard.register_command(name, Command())
+        assert argvard.get_suggestions('biuld') == ['build']
+        assert argvard.get_suggestions('buil') == ['build', 'built']
+        assert argvard.get_suggestions('instal') == ['install']
+        assert argvard.get_suggestions('--hepl') == ['--help']
+        assert argvard.get_suggestions('-x') == []
+        assert argvard.get_suggestions('nothing') == []
+
     def test_main_raises_usageerror(self, capsys):
         argvard = Argvard()
 
@@ -304,6 +433,263 @@ class TestArgvard(object):
         )
 
 
+class TestParse(object):
+    @pytest.fixture
+    def application(self):
+        called = []
+        application = Argvard()
+        application.called = called
+
+        @application.option('-v')
+        def verbose(context):
+            called.append('-v')
+
+        @application.option('--level level', environment_variable='LEVEL')
+        def level(context, level):
+            called.append(('--level', level))
+
+        @application.main()
+        def main(context):
+            called.append('main')
+
+        command = Command(defaults={'default': True})
+
+        @command.option('--option argument')
+        def option(context, argument):
+            called.append(('--option', argument))
+
+        @command.main('destination sources...')
+        def command_main(context, sources, destination):
+            called.append((
+                context.command_path, sources, destination, context['default']
+            ))
+
+        application.register_command('command', command)
+        application.command = command
+        return application
+
+    def test_parse(self, application):
+        plan = application.parse(
+            ['app', '-v', '--level', '1', 'command', '--option', 'x', 'a', 'b'],
+            environ={}
+        )
+        assert application.called == []
+        assert plan.command_path == ('app', 'command')
+        assert [step.executable for step in plan.steps] == [
+            application, application.command
+        ]
+        assert [
+            [(option.names, arguments) for option, arguments in step.options]
+            for step in plan.steps
+        ] == [
+            [(['-v'], ()), (['--level'], (('level', '1'), ))],
+            [(['--option'], (('argument', 'x'), ))]
+        ]
+        assert plan.main_arguments == (('destination', 'a'), ('sources', ('b', )))
+
+    def test_parse_environment(self, application):
+        plan = application.parse(['app'], environ={'LEVEL': '2'})
+        assert plan.steps[0].options[0].arguments == (('level', '2'), )
+        assert plan.main_arguments == ()
+
+    def test_parse_usage_error(self, application):
+        with pytest.raises(UsageError):
+            application.parse(['app', 'unexpected'], environ={})
+        with pytest.raises(UsageError):
+            application.parse(['app', '--level'], environ={})
+        assert application.called == []
+
+    def test_parse_help(self, application):
+        plan = application.parse(['app', '-v', '--help', 'unexpected'])
+        assert [option.names for option, arguments in plan.steps[0].options] == [
+            ['-v'], ['-h', '--help']
+        ]
+        assert plan.main_arguments is None
+
+    def test_parse_without_main(self):
+        application = Argvard()
+        plan = application.parse(['app'], environ={})
+        assert plan.main_arguments is None
+        with pytest.raises(UnexpectedArgument):
+            application.parse(['app', 'whatever'], environ={})
+
+    def test_execute(self, application):
+        plan = application.parse(
+            ['app', '-v', 'command', '--option', 'x', 'a', 'b', 'c'],
+            environ={'LEVEL': '3'}
+        )
+        application.execute(plan)
+        assert application.called == [
+            '-v',
+            ('--level', '3'),
+            ('--option', 'x'),
+            (['app', 'command'], ['b', 'c'], 'a', True)
+        ]
+
+    def test_execute_usage_error(self, capsys):
+        application = Argvard()
+
+        @application.main('number')
+        def main(context, number=1):
+            pass
+
+        plan = application.parse(['app', 'foo'])
+        with pytest.raises(SystemExit):
+            application.execute(plan)
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(u"error: 'foo' is not a valid integer.")
+
+    def test_execute_without_main(self, capsys):
+        application = Argvard()
+        with pytest.raises(SystemExit):
+            application.execute(application.parse(['app']))
+        stdout, stderr = capsys.readouterr()
+        assert stdout.startswith(u'usage: app [-h|--help]\n')
+
+    def test_execute_other_application(self, application):
+        with pytest.raises(ValueError):
+            Argvard().execute(application.parse(['app'], environ={}))
+
+
+class TestDeferOptions(object):
+    @pytest.fixture
+    def called(self):
+        return []
+
+    @pytest.fixture
+    def application(self, called):
+        application = Argvard(defer_options=True)
+
+        @application.option('--expensive')
+        def expensive(context):
+            called.append('--expensive')
+            context['expensive'] = True
+
+        @application.main('argument')
+        def main(context, argument):
+            called.append(('main', argument, context['expensive']))
+
+        command = Command()
+
+        @command.option('--option')
+        def option(context):
+            called.append('--option')
+
+        command.main()(lambda context: called.append('command'))
+        application.register_command('command', command)
+        return application
+
+    def test_valid(self, application, called):
+        application(['application', '--expensive', 'foo'])
+        assert called == ['--expensive', ('main', 'foo', True)]
+
+    def test_invalid(self, application, called, capsys):
+        with pytest.raises(SystemExit):
+            application(['application', '--expensive', 'foo', 'bar'])
+        assert called == []
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "bar"\n'
+            u'usage: application [-h|--help] [--expensive] <argument>\n'
+        )
+
+    def test_invalid_command(self, application, called, capsys):
+        with pytest.raises(SystemExit):
+            application(['application', '--expensive', 'command', '--option', 'x'])
+        assert called == []
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "x"\n'
+            u'usage: application command [-h|--help] [--option]\n'
+        )
+
+    def test_help(self, application, capsys):
+        with pytest.raises(SystemExit):
+            application(['application', '--help', 'foo', 'bar'])
+        stdout, stderr = capsys.readouterr()
+        assert stdout.startswith(u'usage: application ')
+
+
+class TestPermute(object):
+    @pytest.fixture
+    def called(self):
+        return []
+
+    @pytest.fixture
+    def application(self, called, defer_options):
+        application = Argvard(permute=True, defer_options=defer_options)
+
+        @application.option('-v|--verbose')
+        def verbose(context):
+            called.append('--verbose')
+
+        @application.main('[files...]')
+        def main(context, files=()):
+            called.append(('main', list(files)))
+
+        command = Command()
+
+        @command.option('--output path')
+        def output(context, path):
+            called.append(('--output', path))
+
+        @command.main('sources...')
+        def build(context, sources):
+            called.append(('build', sources))
+
+        application.register_command('build', command)
+        return application
+
+    @pytest.mark.parametrize('defer_options', [False, True])
+    @pytest.mark.parametrize(('argv', 'expected'), [
+        (['a', '-v'], ['--verbose', ('main', ['a'])]),
+        (['a', '-v', 'b'], ['--verbose', ('main', ['a', 'b'])]),
+        (['a', 'build'], [('main', ['a', 'build'])]),
+        (['a', '--', '-v', 'b'], [('main', ['a', '-v', 'b'])]),
+        (['-v', 'build', 'src', '--output', 'out', 'lib'], [
+            '--verbose', ('--output', 'out'), ('build', ['src', 'lib'])
+        ]),
+        (['build', 'src', '--output', '--', '--', '--output'], [
+            ('--output', '--'), ('build', ['src', '--output'])
+        ])
+    ])
+    def test_permute(self, application, called, argv, expected):
+        application(['application'] + argv)
+        assert called == expected
+
+    def test_environment(self):
+        called = []
+        application = Argvard(permute=True)
+
+        @application.option('--level level', environment_variable='LEVEL')
+        def level(context, level):
+            called.append(level)
+
+        application.main('argument')(lambda context, argument: None)
+        application(['application', 'foo', '--level', '1'], {'LEVEL': '2'})
+        assert called == ['1']
+        application(['application', 'foo'], {'LEVEL': '2'})
+        assert called == ['1', '2']
+
+    def test_unexpected_argument(self, capsys):
+        application = Argvard(permute=True)
+        application.main('argument')(lambda context, argument: None)
+        with pytest.raises(SystemExit):
+            application(['application', 'foo', '--help', 'bar'])
+        stdout, stderr = capsys.readouterr()
+        assert stdout.startswith(u'usage: application [-h|--help] <argument>')
+
+        with pytest.raises(SystemExit):
+            application(['application', 'foo', 'bar'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(u'error: unexpected argument "bar"\n')
+
+    def test_disabled(self, application, called):
+        application.permute = False
+        application(['application', 'a', '-v'])
+        assert called == [('main', ['a', '-v'])]
+
+
 class TestOption(object):
     @pytest.mark.parametrize('name', [
         '',
@@ -345,6 +731,24 @@ class TestOption(object):
         argvard(['application', '--option'])
         assert called == ['bar']
 
+    def test_overrideable_environment_variable(self):
+        called = []
+        argvard = Argvard()
+        argvard.option(
+            '--foo', overrideable=True, environment_variable='FOO'
+        )(lambda context: called.append('old foo'))
+        argvard.option('--foo')(lambda context: called.append('new foo'))
+        argvard.option(
+            '--bar', overrideable=True, environment_variable='BAR'
+        )(lambda context: called.append('old bar'))
+        argvard.option(
+            '--bar', environment_variable='BAR'
+        )(lambda context: called.append('new bar'))
+        argvard.main()(lambda context: None)
+        argvard(['application'], environ={'FOO': '1', 'BAR': '1'})
+        assert called == ['new bar']
+        assert sorted(argvard.environment_options) == ['BAR']
+
     def test_basic(self):
         called = []
         argvard = Argvard()
@@ -380,6 +784,23 @@ class TestOption(object):
             def option(context):
                 pass
 
+    def test_bounded_repetition_in_main(self, capsys):
+        called = []
+        argvard = Argvard()
+
+        @argvard.main('sources{1,2} destination')
+        def main(context, sources, destination):
+            called.append((sources, destination))
+        argvard(['application', 'a', 'b', 'c'])
+        assert called == [(['a', 'b'], 'c')]
+        with pytest.raises(SystemExit):
+            argvard(['application', 'a', 'b', 'c', 'd'])
+        stdout, stderr = capsys.readouterr()
+        assert stderr == (
+            u'error: unexpected argument "d"\n'
+            u'usage: application [-h|--help] <sources{1,2}> <destination>\n'
+        )
+
     def test_optional_in_signature(self):
         argvard = Argvard()
         with pytest.raises(InvalidSignature):
@@ -444,6 +865,196 @@ class TestOption(object):
         argvard(['application', '--option=foobar'])
         assert called == ['foobar']
 
+    def test_environment_variable(self):
+        called = []
+        argvard = Argvard()
+
+        @argvard.option('--option argument', environment_variable='OPTION')
+        def option(context, argument):
+            called.append(argument)
+        argvard.main()(lambda context: None)
+        argvard(['application'], environ={})
+        assert called == []
+        argvard(['application'], environ={'OPTION': 'foo bar'})
+        assert called == ['foo bar']
+        del called[:]
+        argvard(['application', '--option', 'baz'], environ={'OPTION': 'foo'})
+        assert called == ['baz']
+
+    def test_environment_variable_flag(self):
+        called = []
+        argvard = Argvard()
+
+        @argvard.option('--flag', environment_variable='FLAG')
+        def flag(context):
+            called.append(True)
+        argvard.main()(lambda context: None)
+        for value in ['', '0', 'no', 'False']:
+            argvard(['application'], environ={'FLAG': value})
+        assert called == []
+        argvard(['application'], environ={'FLAG': '1'})
+        assert called == [True]
+
+    def test_environment_variable_multiple_arguments(self, capsys):
+        called = []
+        argvard = Argvard()
+
+        @argvard.option('--option a b', environment_variable='OPTION')
+        def option(context, a, b):
+            called.append((a, b))
+        argvard.main()(lambda context: None)
+        argvard(['application'], environ={'OPTION': 'foo  bar'})
+        assert called == [('foo', 'bar')]
+
+        with pytest.raises(SystemExit):
+            argvard(['application'], environ={'OPTION': 'foo'})
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(u'error: b is missing (from $OPTION)\n')
+
+        with pytest.raises(SystemExit):
+            argvard(['application'], environ={'OPTION': 'foo bar baz'})
+        stdout, stderr = capsys.readouterr()
+        assert stderr.startswith(
+            u'error: unexpected argument "baz" (from $OPTION)\n'
+        )
+
+    def test_environment_variable_command(self):
+        argvard = Argvard()
+        argvard.main()(lambda context: None)
+        command = Command()
+
+        @command.option('--option argument', environment_variable='OPTION')
+        def option(context, argument):
+            context['option'] = argument
+
+        @command.main()
+        def main(context):
+            assert context['option'] == 'foo'
+        argvard.register_command('command', command)
+        argvard(['application', 'command'], environ={'OPTION': 'foo'})
+
+    def test_environment_variable_defined_twice(self):
+        argvard = Argvard()
+        argvard.option('--foo', environment_variable='FOO')(
+            lambda context: None
+        )
+        with pytest.raises(RuntimeError):
+            argvard.option('--bar', environment_variable='FOO')(
+                lambda context: None
+            )
+
+    def test_environment_variable_defaults_to_os_environ(self, monkeypatch):
+        called = []
+        argvard = Argvard()
+
+        @argvard.option('--option argument', environment_variable='ARGVARD_TEST')
+        def option(context, argument):
+            called.append(argument)
+        argvard.main()(lambda context: None)
+        monkeypatch.setenv('ARGVARD_TEST', 'foo')
+        argvard(['application'])
+        assert called == ['foo']
+
+    def test_action_store(self):
+        argvard = Argvard()
+        argvard.option('-o|--output-file path', action='store')
+        argvard.option('--pair a b', action='store', key='the_pair')
+
+        @argvard.main()
+        def main(context):
+            assert context['output_file'] == 'bar'
+            assert context['the_pair'] == ('x', 'y')
+        argvard(['application', '-o', 'foo', '--output-file', 'bar',
+                 '--pair', 'x', 'y'])
+
+    def test_action_append(self):
+        argvard = Argvard()
+        option = argvard.option('-I path', action='append', key='include')
+        assert option.key == 'include'
+
+        @argvard.main()
+        def main(context):
+            assert context['include'] == ['foo', 'bar']
+        argvard(['application', '-I', 'foo', '-Ibar'])
+
+    def test_action_append_does_not_change_defaults(self):
+        seen = []
+        argvard = Argvard(defaults={'include': ['default']})
+        argvard.option('-I path', action='append', key='include')
+        argvard.main()(lambda context: seen.append(context['include']))
+        argvard(['application', '-I', 'a'])
+        argvard(['application', '-I', 'b', '-I', 'c'])
+        argvard.execute(argvard.parse(['application', '-I', 'd']))
+        argvard(['application'])
+        assert seen == [
+            ['default', 'a'], ['default', 'b', 'c'], ['default', 'd'],
+            ['default']
+        ]
+        assert argvard.defaults == {'include': ['default']}
+
+    def test_action_append_to_value(self):
+        seen = []
+        argvard = Argvard(defaults={'include': 'default', 'exclude': ('a', )})
+        argvard.option('-I path', action='append', key='include')
+        argvard.option('-E path', action='append', key='exclude')
+        argvard.main()(lambda context: seen.append(dict(context)))
+        argvard(['application', '-I', 'foo', '-E', 'b'])
+        assert seen == [{'include': ['default', 'foo'], 'exclude': ['a', 'b']}]
+
+    def test_action_store_const(self):
+        argvard = Argvard()
+        argvard.option('--quiet', action='store_const', const=0, key='level')
+        argvard.option('-f|--force', action='store_const')
+
+        @argvard.main()
+        def main(context):
+            assert context == {'level': 0, 'force': True}
+        argvard(['application', '--quiet', '-f'])
+
+    def test_action_count(self):
+        argvard = Argvard()
+        argvard.option('-v', action='count')
+
+        @argvard.main()
+        def main(context):
+            assert context['v'] == 3
+        argvard(['application', '-vv', '-v'])
+
+    def test_action_environment_variable(self):
+        argvard = Argvard()
+        argvard.option('--level level', action='store',
+                       environment_variable='LEVEL')
+
+        @argvard.main()
+        def main(context):
+            assert context['level'] == '2'
+        argvard(['application'], environ={'LEVEL': '2'})
+        argvard.execute(argvard.parse(['application'], environ={'LEVEL': '2'}))
+
+    @pytest.mark.parametrize(('signature', 'action'), [
+        ('--foo', 'store'),
+        ('--foo', 'append'),
+        ('--foo bar', 'store_const'),
+        ('--foo bar', 'count')
+    ])
+    def test_action_bad_signature(self, signature, action):
+        argvard = Argvard()
+        with pytest.raises(InvalidSignature):
+            argvard.option(signature, action=action)
+
+    def test_action_unknown(self):
+        argvard = Argvard()
+        with pytest.raises(ValueError):
+            argvard.option('--foo', action='unknown')
+
+    def test_action_description(self, capsys):
+        argvard = Argvard()
+        argvard.option('--foo', action='count', description='Foo.')
+        with pytest.raises(SystemExit):
+            argvard(['application', '--help'])
+        stdout, stderr = capsys.readouterr()
+        assert stdout.endswith(u'--foo\n    Foo.\n')
+
     def test_ordering(self):
         argvard = Argvard()
 
@@ -482,6 +1093,132 @@ class TestOption(object):
         assert called == [True, True]
 
 
+class TestDescription(object):
+    def test_lazy(self, monkeypatch):
+        import argvard
+        cleaned = []
+
+        def clean_docstring(docstring):
+            cleaned.append(docstring)
+            return docstring.strip()
+        monkeypatch.setattr(argvard, 'clean_docstring', clean_docstring)
+        application = Argvard()
+
+        @application.option('--option')
+        def option(context):
+            """
+            Option description.
+            """
+
+        @application.main()
+        def main(context):
+            """
+            Main description.
+            """
+        assert cleaned == []
+        assert application.options['--option'].description == (
+            u'Option description.'
+        )
+        assert application.options['--option'].description == (
+            u'Option description.'
+        )
+        assert application.description == u'Main description.'
+        assert len(cleaned) == 2
+
+    def test_set(self):
+        application = Argvard()
+
+        @application.main()
+        def main(context):
+            """
+            Main description.
+            """
+        application.description = u'Other description.'
+        assert application.description == u'Other description.'
+
+        @application.option('--option', description=u'  Explicit.')
+        def option(context):
+            """
+            Docstring.
+            """
+        assert application.options['--option'].description == u'  Explicit.'
+
+
+def set_output(context, path):
+    context['output'] = path
+
+
+class TestOptionPickle(object):
+    def test_function(self):
+        option = Option.from_string(
+            '-o|--output path', set_output, environment_variable='OUTPUT'
+        )
+        loaded = pickle.loads(pickle.dumps(option))
+        assert loaded.names == option.names
+        assert loaded.usage == option.usage
+        assert loaded.environment_variable == 'OUTPUT'
+        assert loaded.function is set_output
+        assert loaded.parse_value('foo') == {'path': 'foo'}
+
+    def test_action(self):
+        option = Option.from_string(
+            '-I|--include path', None, action='append'
+        )
+        loaded = pickle.loads(pickle.dumps(option))
+        context = {}
+        loaded.function(context, path='foo')
+        loaded.apply_action(context, {'path': 'bar'})
+        assert context == {'include': ['foo', 'bar']}
+
+
+class TestOptionTable(object):
+    def make_option(self, names, overrideable=False):
+        return Option.from_string(
+            names, lambda context: None, overrideable=overrideable
+        )
+
+    def test_lookup(self):
+        table = OptionTable()
+        option = self.make_option('-a|--abc')
+        table.add(option)
+        assert table['-a'] is option
+        assert table['--abc'] is option
+        assert '-b' not in table
+        assert list(table) == ['-a', '--abc']
+        assert len(table) == 2
+
+    def test_distinct(self):
+        table = OptionTable()
+        a = self.make_option('-a|--abc')
+        b = self.make_option('-b')
+        table.add(a)
+        table.add(b)
+        assert table.distinct() == [a, b]
+
+    def test_distinct_after_override(self):
+        table = OptionTable()
+        a = self.make_option('-a|--abc', overrideable=True)
+        b = self.make_option('-b')
+        table.add(a)
+        table.add(b)
+        c = self.make_option('--abc')
+        table.add(c)
+        assert table.distinct() == [a, c, b]
+        d = self.make_option('-a')
+        table.add(d)
+        assert table.distinct() == [d, c, b]
+        e = self.make_option('-e')
+        table.add(e)
+        assert table.distinct() == [d, c, b, e]
+
+    def test_define_twice(self):
+        table = OptionTable()
+        table.add(self.make_option('-a'))
+        with pytest.raises(RuntimeError):
+            table.add(self.make_option('-b|-a'))
+        assert list(table) == ['-a']
+
+
 class TestContext(object):
     def test_defaults(self):
         argvard = Argvard(defaults={'a': 1})
@@ -603,6 +1340,57 @@ class TestContext(object):
         argvard(['application'])
         argvard(['application', 'command'])
 
+    @pytest.mark.parametrize('defer_options', [False, True])
+    def test_call_on_close(self, defer_options):
+        called = []
+        argvard = Argvard(defer_options=defer_options)
+
+        @argvard.option('-a')
+        def option(context):
+            context.call_on_close(lambda: called.append('first'))
+            context.call_on_close(lambda: called.append('second'))
+
+        @argvard.main()
+        def main(context):
+            called.append('main')
+        argvard(['application', '-a'])
+        assert called == ['main', 'second', 'first']
+
+        del called[:]
+        with pytest.raises(SystemExit):
+            argvard(['application', '-a', '--help'])
+        assert called == ['second', 'first']
+
+    @pytest.mark.parametrize(('arguments', 'exit_status'), [
+        ([], 0),
+        (['--help'], 1),
+        (['unexpected'], 1),
+        (['-e', '3'], 3),
+        (['-e', 'message'], 1),
+        (['-e', ''], 0)
+    ])
+    @pytest.mark.parametrize('defer_options', [False, True])
+    def test_exit_status(self, arguments, exit_status, defer_options):
+        statuses = []
+        argvard = Argvard(defer_options=defer_options)
+
+        @argvard.option('-r')
+        def record(context):
+            context.call_on_close(lambda: statuses.append(context.exit_status))
+            assert context.exit_status is None
+
+        @argvard.option('-e status')
+        def exit(context, status):
+            sys.exit(int(status) if status.isdigit() else status or None)
+
+        argvard.main()(lambda context: None)
+        try:
+            argvard(['application', '-r'] + arguments)
+        except SystemExit:
+            pass
+        assert statuses == ([] if defer_options and arguments == ['unexpected']
+                            else [exit_status])
+
 
 class TestHelpOption(object):
     @pytest.fixture(params=['-h', '--help'])
@@ -676,6 +1464,17 @@ class TestHelpOption(object):
             u'    Another line.\n'
         )
 
+    def test_option_environment_variable(self, capsys, name):
+        argvard = Argvard()
+        argvard.option('--foo', environment_variable='FOO')(
+            lambda context: None
+        )
+        argvard.main()(lambda context: None)
+        with pytest.raises(SystemExit):
+            argvard(['application', name])
+        stdout, stderr = capsys.readouterr()
+        assert u'--foo ($FOO)\n' in stdout
+
     def test_command(self, capsys, name):
         argvard = Argvard()
         argvard.main()(lambda context: None)
@@ -0,0 +1,133 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_metrics
+    ~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import json
+
+import pytest
+
+from argvard import Argvard, Command, metrics
+from argvard.tracing import Tracer
+from argvard.metrics import MetricsRecorder, compact, load_summary
+
+
+@pytest.fixture
+def application(defer_options):
+    application = Argvard(defer_options=defer_options)
+    application.option('-v|--verbose', action='count')
+    application.main()(lambda context: None)
+    command = Command()
+    command.option('--output path', action='store')
+    command.main('argument')(lambda context, argument: None)
+    application.register_command('command', command)
+    return application
+
+
+def run(application, argvs):
+    for argv in argvs:
+        try:
+            application(argv, {})
+        except SystemExit:
+            pass
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('metrics'))
+
+
+@pytest.mark.parametrize('defer_options', [False, True])
+def test_record(application, path, defer_options):
+    recorder = MetricsRecorder(path, buffer_size=1)
+    application.tracer = Tracer(recorder)
+    run(application, [
+        ['app', '-v', '-v'],
+        ['app', '--verbose', 'command', '--output', 'x', 'y'],
+        ['app', 'command']
+    ])
+    with open(path) as file:
+        records = [json.loads(line) for line in file]
+    assert [record[1:3] + record[4:] for record in records] == [
+        [['app'], ['--verbose'], 0],
+        [['app', 'command'], ['--output', '--verbose'], 0],
+        [['app', 'command'], [], 1]
+    ]
+    assert all(record[3] >= 0 for record in records)
+
+
+def test_buffer(application, path):
+    recorder = MetricsRecorder(path, buffer_size=3)
+    application.tracer = Tracer(recorder)
+    run(application, [['app'], ['app']])
+    assert not os.path.exists(path)
+    recorder.flush()
+    with open(path) as file:
+        assert len(file.readlines()) == 2
+
+
+def test_compact(application, path, monkeypatch):
+    recorder = MetricsRecorder(path, buffer_size=1, compact_size=None)
+    application.tracer = Tracer(recorder)
+    run(application, [['app', '-v'], ['app', 'command', 'x'], ['app', 'command']])
+    summary = compact(path)
+    assert not os.path.exists(path)
+    assert summary == load_summary(path)
+    commands = summary['commands']
+    assert sorted(commands) == ['app', 'app command']
+    assert commands['app command']['calls'] == 2
+    assert commands['app command']['failures'] == 1
+    assert commands['app']['options'] == {'--verbose': 1}
+
+    run(application, [['app']])
+    # Rotated files are read again, but only from where compaction stopped.
+    monkeypatch.setattr(metrics, 'GRACE_PERIOD', -60)
+    summary = compact(path)
+    assert summary['commands']['app']['calls'] == 2
+    assert summary['offsets'] == {}
+    assert sorted(os.listdir(os.path.dirname(path))) == ['metrics.summary']
+
+
+def test_compact_size(application, path):
+    recorder = MetricsRecorder(path, buffer_size=1, compact_size=1)
+    application.tracer = Tracer(recorder)
+    run(application, [['app']])
+    assert not os.path.exists(path)
+    assert load_summary(path)['commands']['app']['calls'] == 1
+
+
+def test_compact_locked(path):
+    open(path + '.lock', 'w').close()
+    assert compact(path) is None
+
+
+def test_main(application, path, capsys):
+    recorder = MetricsRecorder(path, buffer_size=1, compact_size=None)
+    application.tracer = Tracer(recorder)
+    run(application, [
+        ['app', 'command', '--output', 'x', 'y'], ['app', 'command', 'y'],
+        ['app']
+    ])
+    capsys.readouterr()
+    metrics.application(['metrics', path], {})
+    lines = capsys.readouterr()[0].splitlines()
+    assert lines[0].startswith(u'app command: 2 calls, 0 failed, ')
+    assert lines[1] == u'    --output: 1 calls'
+    assert lines[2].startswith(u'app: 1 calls, 0 failed, ')
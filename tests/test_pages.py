@@ -0,0 +1,158 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_pages
+    ~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import sys
+import json
+
+import pytest
+
+from argvard import Context, pages
+
+
+APPLICATION = u"""
+from argvard import Argvard, Command
+
+application = Argvard()
+
+
+@application.option('--level level', environment_variable='LEVEL')
+def level(context, level):
+    \"\"\"
+    .starts with a dot and has a \\\\ backslash
+    \"\"\"
+
+
+@application.main()
+def main(context):
+    \"\"\"
+    Does -things.
+
+    Really.
+    \"\"\"
+
+
+command = Command()
+command.main('argument')(lambda context, argument: None)
+application.register_command('command', command)
+"""
+
+
+@pytest.fixture
+def module(tmpdir, monkeypatch):
+    path = tmpdir.join('argvard_test_application.py')
+    path.write(APPLICATION)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.delitem(sys.modules, 'argvard_test_application', raising=False)
+    import argvard_test_application
+    return argvard_test_application
+
+
+@pytest.fixture
+def directory(tmpdir, module):
+    directory = str(tmpdir.join('help'))
+    pages.build(module.application, 'tool', directory)
+    return directory
+
+
+def test_build(directory, module):
+    assert sorted(os.listdir(directory)) == [
+        'manifest.json', 'tool-command.1', 'tool-command.txt', 'tool.1',
+        'tool.txt'
+    ]
+    application = module.application
+    context = Context(application, 'tool')
+    with open(os.path.join(directory, 'tool.txt')) as file:
+        assert file.read() == application.format_help(context)
+    with open(os.path.join(directory, 'manifest.json')) as file:
+        manifest = json.load(file)
+    assert manifest['pages'] == {'': 'tool.txt', 'command': 'tool-command.txt'}
+    assert os.path.abspath(module.__file__) in manifest['sources']
+
+
+def test_man_page(directory):
+    with open(os.path.join(directory, 'tool.1')) as file:
+        man_page = file.read()
+    assert man_page.startswith(
+        '.TH "TOOL" 1 "" "tool"\n'
+        '.SH NAME\n'
+        'tool \\- Does \\-things.\n'
+    )
+    assert '.TP\n.B \\-\\-level <level>\nCan be set with $LEVEL.\n' in man_page
+    assert '\\&.starts with a dot and has a \\e backslash\n' in man_page
+    assert '.SH COMMANDS\n.TP\n.B command\n' in man_page
+
+
+def test_load(directory):
+    with open(os.path.join(directory, 'tool-command.txt')) as file:
+        text = file.read()
+    assert pages.load(directory, ['tool', 'command']) == text
+    assert pages.load(directory, ['/usr/bin/tool', 'command']) == (
+        text.replace('usage: tool', 'usage: /usr/bin/tool', 1)
+    )
+    assert pages.load(directory, ['tool', 'missing']) is None
+    assert pages.load(os.path.join(directory, 'missing'), ['tool']) is None
+
+
+def test_load_stale(directory, module):
+    stat = os.stat(module.__file__)
+    os.utime(module.__file__, (stat.st_atime, stat.st_mtime + 10))
+    assert pages.load(directory, ['tool']) is None
+
+
+def test_help(directory, module, capsys):
+    with open(os.path.join(directory, 'tool-command.txt'), 'a') as file:
+        file.write('prebuilt\n')
+    application = module.application
+    application.help_directory = directory
+    with pytest.raises(SystemExit):
+        application(['tool', 'command', '--help'])
+    stdout, stderr = capsys.readouterr()
+    assert stdout.endswith(u'prebuilt\n')
+
+    # Without prebuilt pages, the help is generated as usual.
+    application.help_directory = None
+    with pytest.raises(SystemExit):
+        application(['tool', 'command', '--help'])
+    stdout, stderr = capsys.readouterr()
+    assert stdout == u'usage: tool command [-h|--help] <argument>\n\noptions:\n' \
+        u'-h, --help\n    Show this text.\n'
+
+
+def test_main(tmpdir, module, capsys):
+    directory = str(tmpdir.join('pages'))
+    pages.application([
+        'pages', 'argvard_test_application:application', 'tool', directory
+    ])
+    stdout, stderr = capsys.readouterr()
+    assert os.path.join(directory, 'manifest.json') in stdout.splitlines()
+
+    with pytest.raises(SystemExit):
+        pages.application(['pages', 'argvard_test_missing:x', 'tool', directory])
+    stdout, stderr = capsys.readouterr()
+    assert stderr.startswith(u'error: cannot import target: ')
+
+    with pytest.raises(SystemExit):
+        pages.application([
+            'pages', 'argvard_test_application:command', 'tool', directory
+        ])
+    stdout, stderr = capsys.readouterr()
+    assert stderr.startswith(u'error: target is not an application\n')
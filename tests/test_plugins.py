@@ -0,0 +1,167 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_plugins
+    ~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import os
+import sys
+
+import pytest
+
+from argvard import Argvard, Command, pages, plugins
+from argvard.plugins import PluginCache, PluginCommand
+
+
+PLUGIN = u"""
+from argvard import Command
+
+command = Command()
+
+
+@command.main('argument')
+def main(context, argument):
+    \"\"\"
+    Does something.
+    \"\"\"
+    context['called'].append(('plugin', argument))
+"""
+
+
+@pytest.fixture
+def site(tmpdir, monkeypatch):
+    site = tmpdir.join('site')
+    site.join('argvard_test_plugin.py').write(PLUGIN, ensure=True)
+    dist_info = site.join('argvard_test_plugin-1.0.dist-info')
+    dist_info.join('METADATA').write(
+        u'Metadata-Version: 2.1\nName: argvard-test-plugin\nVersion: 1.0\n',
+        ensure=True
+    )
+    dist_info.join('entry_points.txt').write(
+        u'[argvard_test.commands]\n'
+        u'plugin = argvard_test_plugin:command\n'
+        u'other = argvard_test_plugin:command\n'
+    )
+    monkeypatch.syspath_prepend(str(site))
+    monkeypatch.delitem(sys.modules, 'argvard_test_plugin', raising=False)
+    return site
+
+
+@pytest.fixture
+def cache(tmpdir):
+    return PluginCache(str(tmpdir.join('cache')))
+
+
+def test_get_entry_points(site):
+    assert plugins.get_entry_points('argvard_test.commands') == [
+        ('plugin', 'argvard_test_plugin:command'),
+        ('other', 'argvard_test_plugin:command')
+    ]
+    assert plugins.get_entry_points('argvard_test.missing') == []
+
+
+def test_resolve():
+    assert plugins.resolve('os.path:join') is os.path.join
+    assert plugins.resolve('os.path') is os.path
+    assert plugins.resolve('os:path.join [extra]') is os.path.join
+
+
+class TestPluginCache(object):
+    def test_load(self, site, cache, monkeypatch):
+        entry_points = cache.load('argvard_test.commands')
+        assert entry_points == [
+            ('plugin', 'argvard_test_plugin:command'),
+            ('other', 'argvard_test_plugin:command')
+        ]
+
+        def fail(group):
+            raise AssertionError('entry points scanned')
+        monkeypatch.setattr(plugins, 'get_entry_points', fail)
+        assert cache.load('argvard_test.commands') == entry_points
+        # A new cache with the same directory reads from disk.
+        cache = PluginCache(cache.directory)
+        assert cache.load('argvard_test.commands') == entry_points
+
+    def test_invalidation(self, site, cache):
+        cache.load('argvard_test.commands')
+        dist_info = site.join('argvard_test_plugin-2.0.dist-info')
+        dist_info.join('METADATA').write(
+            u'Metadata-Version: 2.1\nName: argvard-other\nVersion: 2.0\n',
+            ensure=True
+        )
+        dist_info.join('entry_points.txt').write(
+            u'[argvard_test.commands]\nnew = argvard_test_plugin:command\n'
+        )
+        # Make sure the modification time changes, regardless of the
+        # resolution of the filesystem.
+        stat = os.stat(str(site))
+        os.utime(str(site), (stat.st_atime, stat.st_mtime + 10))
+        names = [name for name, target in cache.load('argvard_test.commands')]
+        assert 'new' in names
+
+
+class TestLoadPlugins(object):
+    def test_lazy(self, site, cache):
+        application = Argvard(defaults={'called': []})
+        application.load_plugins('argvard_test.commands', cache=cache)
+        assert list(application.commands) == ['plugin', 'other']
+        assert isinstance(application.commands['plugin'], PluginCommand)
+        assert 'argvard_test_plugin' not in sys.modules
+
+        application(['application', 'plugin', 'foo'])
+        assert 'argvard_test_plugin' in sys.modules
+
+    def test_call(self, site, cache):
+        called = []
+        application = Argvard(defaults={'called': called})
+        application.load_plugins('argvard_test.commands', cache=cache)
+        application(['application', 'plugin', 'foo'])
+        plan = application.parse(['application', 'other', 'bar'])
+        application.execute(plan)
+        assert called == [('plugin', 'foo'), ('plugin', 'bar')]
+
+    def test_existing_command(self, site, cache):
+        application = Argvard()
+        command = Command()
+        application.register_command('plugin', command)
+        application.load_plugins('argvard_test.commands', cache=cache)
+        assert application.commands['plugin'] is command
+
+    def test_help(self, site, cache, capsys):
+        application = Argvard()
+        application.load_plugins('argvard_test.commands', cache=cache)
+        with pytest.raises(SystemExit):
+            application(['application', '--help'])
+        stdout, stderr = capsys.readouterr()
+        assert u'commands:\nplugin\n    Does something.\n' in stdout
+
+    def test_prebuilt_help(self, site, cache, tmpdir, capsys):
+        directory = str(tmpdir.join('help'))
+        application = Argvard()
+        application.load_plugins('argvard_test.commands', cache=cache)
+        pages.build(application, 'tool', directory)
+        del sys.modules['argvard_test_plugin']
+
+        application = Argvard(help_directory=directory)
+        application.load_plugins('argvard_test.commands', cache=cache)
+        with pytest.raises(SystemExit):
+            application(['tool', 'plugin', '--help'])
+        stdout, stderr = capsys.readouterr()
+        with open(os.path.join(directory, 'tool-plugin.txt')) as file:
+            assert stdout == file.read()
+        assert 'argvard_test_plugin' not in sys.modules
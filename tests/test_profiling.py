@@ -0,0 +1,78 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_profiling
+    ~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import pstats
+
+import pytest
+
+from argvard import Argvard, Command
+
+
+@pytest.fixture
+def called():
+    return []
+
+
+@pytest.fixture
+def application(called):
+    application = Argvard()
+    application.add_profile_option(limit=50)
+
+    @application.main()
+    def main(context):
+        called.append('main')
+
+    command = Command()
+    command.main('argument')(lambda context, argument: busy(called))
+    application.register_command('command', command)
+    return application
+
+
+def busy(called):
+    called.append(sum(range(1000)))
+
+
+def test_profile(application, called, capsys):
+    application(['application', '--profile', 'command', 'foo'])
+    assert called == [499500]
+    stdout, stderr = capsys.readouterr()
+    assert stdout == u''
+    summary = stderr.splitlines()[0]
+    assert summary.startswith(u'profile: ')
+    assert u'argvard dispatch' in summary
+    assert u'(busy)' in stderr
+
+
+def test_profile_to(application, called, tmpdir, capsys):
+    path = str(tmpdir.join('stats'))
+    application(['application', '--profile', '--profile-to', path])
+    assert called == ['main']
+    functions = [name for _, _, name in pstats.Stats(path).stats]
+    assert 'main' in functions
+    assert capsys.readouterr()[1].count(u'profile: ') == 1
+
+
+def test_profile_help(application, capsys):
+    with pytest.raises(SystemExit):
+        application(['application', '--profile', '--help'])
+    stdout, stderr = capsys.readouterr()
+    assert u'[--profile-to <path>]' in stdout
+    assert stderr.startswith(u'profile: ')
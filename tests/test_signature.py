@@ -0,0 +1,313 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_signature
+    ~~~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import pickle
+import marshal
+
+import pytest
+
+from argvard import Argv
+from argvard.signature import (
+    Signature, Argument, Repetition, Optional, FORMAT_VERSION
+)
+from argvard.exceptions import ArgumentMissing, InvalidSignature
+
+
+def parse(signature, arguments):
+    argv = Argv(['application'] + arguments)
+    rv = Signature.from_string(signature, option=False).parse(argv)
+    return rv, argv.argv[argv.position:]
+
+
+class TestMatch(object):
+    def test_argument(self):
+        result = {}
+        assert Argument('a').match(['x', 'y'], 1, 2, result) == 2
+        assert result == {'a': 'y'}
+        assert Argument('a').match(['x', 'y'], 1, 1, result) is None
+        assert result == {'a': 'y'}
+
+    def test_repetition(self):
+        result = {}
+        repetition = Repetition(Argument('a'))
+        assert repetition.match(['x', 'y', 'z', 'w'], 1, 3, result) == 3
+        assert result == {'a': ['y', 'z']}
+        assert Repetition(Argument('b')).match(['x'], 1, 1, result) is None
+        assert result == {'a': ['y', 'z']}
+
+    def test_bounded_repetition(self):
+        result = {}
+        repetition = Repetition(Argument('a'), 2, 3)
+        assert repetition.match(['x', 'y'], 0, 1, result) is None
+        assert result == {}
+        assert repetition.match(['x', 'y', 'z', 'w'], 0, 4, result) == 3
+        assert result == {'a': ['x', 'y', 'z']}
+
+    def test_optional(self):
+        result = {}
+        optional = Optional([Argument('a'), Argument('b')])
+        assert optional.match(['x'], 0, 1, result) == 0
+        assert result == {}
+        assert optional.match(['x', 'y', 'z'], 0, 1, result) == 0
+        assert result == {}
+        assert optional.match(['x', 'y'], 0, 2, result) == 2
+        assert result == {'a': 'x', 'b': 'y'}
+
+    def test_apply(self):
+        argv = Argv(['application', 'x'])
+        result = {}
+        Argument('a').apply(result, argv)
+        assert result == {'a': 'x'}
+        assert argv.position == 2
+        with pytest.raises(ArgumentMissing):
+            Argument('b').apply(result, argv)
+
+
+class TestParse(object):
+    def test_long(self):
+        arguments = ['x%d' % i for i in range(100000)]
+        result, remaining = parse('[a] sources... [b c] destination', arguments)
+        assert result == {
+            'a': 'x0',
+            'sources': arguments[1:-1],
+            'destination': arguments[-1]
+        }
+        assert remaining == []
+
+    @pytest.mark.parametrize(('signature', 'arguments', 'expected'), [
+        ('', [], ({}, [])),
+        ('a', ['x', 'y'], ({'a': 'x'}, ['y'])),
+        ('a b...', ['x', 'y', 'z'], ({'a': 'x', 'b': ['y', 'z']}, [])),
+        ('[a [b]]', [], ({}, [])),
+        ('[a [b]]', ['x'], ({'a': 'x'}, [])),
+        ('[a b] [c]', ['x'], ({'c': 'x'}, [])),
+        ('[a b] [c]', ['x', 'y', 'z'], ({'a': 'x', 'b': 'y', 'c': 'z'}, [])),
+        ('a [b]', ['x', 'y', 'z'], ({'a': 'x', 'b': 'y'}, ['z'])),
+        ('a... b', ['x', 'y', 'z'], ({'a': ['x', 'y'], 'b': 'z'}, [])),
+        ('a... b c', ['x', 'y', 'z'], ({'a': ['x'], 'b': 'y', 'c': 'z'}, [])),
+        ('a [b...] c', ['x', 'y'], ({'a': 'x', 'c': 'y'}, [])),
+        ('a [b...] c', ['x', 'y', 'z', 'w'], (
+            {'a': 'x', 'b': ['y', 'z'], 'c': 'w'}, []
+        )),
+        ('[a] [b] c', ['x'], ({'c': 'x'}, [])),
+        ('[a] [b] c', ['x', 'y'], ({'a': 'x', 'c': 'y'}, [])),
+        ('[a] [b] c', ['x', 'y', 'z'], ({'a': 'x', 'b': 'y', 'c': 'z'}, [])),
+        ('[a [b c]] d', ['w', 'x', 'y'], ({'a': 'w', 'd': 'x'}, ['y'])),
+        ('[a [b c]] d', ['w', 'x', 'y', 'z'], (
+            {'a': 'w', 'b': 'x', 'c': 'y', 'd': 'z'}, []
+        )),
+        ('a{2}', ['x', 'y', 'z'], ({'a': ['x', 'y']}, ['z'])),
+        ('a{1,2} b...', ['x', 'y', 'z', 'w'], (
+            {'a': ['x', 'y'], 'b': ['z', 'w']}, []
+        )),
+        ('a{2,} b', ['x', 'y', 'z', 'w'], ({'a': ['x', 'y', 'z'], 'b': 'w'}, [])),
+        ('a{,2} b', ['x'], ({'a': [], 'b': 'x'}, [])),
+        ('[a{2,3}] b', ['x', 'y'], ({'b': 'x'}, ['y'])),
+        ('[a{2,3}] b', ['x', 'y', 'z', 'w', 'v'], (
+            {'a': ['x', 'y', 'z'], 'b': 'w'}, ['v']
+        )),
+        ('[a] [b c] d', ['x', 'y', 'z'], ({'b': 'x', 'c': 'y', 'd': 'z'}, [])),
+        ('[a] [b c] d', ['x', 'y', 'z', 'w'], (
+            {'a': 'x', 'b': 'y', 'c': 'z', 'd': 'w'}, []
+        )),
+        ('[a b c] [d] [e f] g', ['1', '2', '3', '4'], (
+            {'a': '1', 'b': '2', 'c': '3', 'g': '4'}, []
+        )),
+        ('[a b c] [d] [e f] g', ['1', '2', '3'], (
+            {'e': '1', 'f': '2', 'g': '3'}, []
+        )),
+        ('[a b c] [d] [e f] g', ['1', '2', '3', '4', '5', '6'], (
+            {'a': '1', 'b': '2', 'c': '3', 'e': '4', 'f': '5', 'g': '6'}, []
+        )),
+        ('[a [b c d]] e', ['1', '2', '3'], ({'a': '1', 'e': '2'}, ['3'])),
+        ('x{1,2} [y z] w', ['1', '2', '3', '4'], (
+            {'x': ['1'], 'y': '2', 'z': '3', 'w': '4'}, []
+        )),
+        ('x{1,2} [y z] w', ['1', '2', '3'], ({'x': ['1', '2'], 'w': '3'}, [])),
+        ('x{2,3} [y z] [v] w', ['1', '2', '3', '4', '5'], (
+            {'x': ['1', '2', '3'], 'v': '4', 'w': '5'}, []
+        )),
+        ('x{2,3} [y z] w', ['1', '2', '3', '4', '5'], (
+            {'x': ['1', '2'], 'y': '3', 'z': '4', 'w': '5'}, []
+        )),
+        ('[x{2}] [y{3}] w', ['1', '2', '3', '4'], (
+            {'y': ['1', '2', '3'], 'w': '4'}, []
+        ))
+    ])
+    def test_parse(self, signature, arguments, expected):
+        assert parse(signature, arguments) == expected
+
+    @pytest.mark.parametrize('signature', [
+        'a [b c] [d] e', '[a] [b c] [d e f] g', '[a [b c]] [d e] f...',
+        '[a [b c d]] [e] f', 'a{1,2} [b c] [d] e', '[a [b c]] [d{2,3}] e...',
+        '[a{2}] [b [c d]] e{0,2} [f]'
+    ])
+    def test_allocation(self, signature, arguments=['x'] * 9):
+        patterns = Signature.from_string(signature, option=False).patterns
+        for count in range(len(arguments) + 1):
+            # The patterns match as many arguments as possible and earlier
+            # patterns take as many as possible.
+            allocations = list(allocate(patterns, count))
+            if not allocations:
+                continue
+            expected = max(allocations, key=lambda counts: (sum(counts), counts))
+            result, remaining = parse(signature, arguments[:count])
+            assert len(remaining) == count - sum(expected)
+            assert [
+                get_count(pattern, result) for pattern in patterns
+            ] == list(expected)
+
+    @pytest.mark.parametrize(('signature', 'arguments', 'message'), [
+        ('a', [], 'a is missing'),
+        ('a b', ['x'], 'b is missing'),
+        ('[a] b...', [], 'b... is missing'),
+        ('a... b', ['x'], 'b is missing'),
+        ('[a b] c d', ['x'], 'd is missing'),
+        ('a{2,5} b', ['x', 'y'], 'b is missing'),
+        ('a b{2,}', ['x', 'y'], 'b{2,} is missing')
+    ])
+    def test_missing(self, signature, arguments, message):
+        with pytest.raises(ArgumentMissing) as exc_info:
+            parse(signature, arguments)
+        assert exc_info.value.args[0] == message
+
+
+class TestSignature(object):
+    @pytest.mark.parametrize(('string', 'minimum', 'maximum', 'usage'), [
+        ('a b', 2, 2, u'<a> <b>'),
+        ('a...', 1, None, u'<a...>'),
+        ('a{1,}', 1, None, u'<a...>'),
+        ('a{3}', 3, 3, u'<a{3}>'),
+        ('a{2,}', 2, None, u'<a{2,}>'),
+        ('a{,4}', 0, 4, u'<a{0,4}>'),
+        ('a [b{2,5} [c]]', 1, 7, u'<a> <[b{2,5} [c]]>')
+    ])
+    def test_bounds(self, string, minimum, maximum, usage):
+        signature = Signature.from_string(string, option=False)
+        assert signature.minimum == minimum
+        assert signature.maximum == maximum
+        assert signature.usage == usage
+
+    @pytest.mark.parametrize('string', [
+        'a{}', 'a{0}', 'a{3,2}', 'a{1,2', '{1,2}'
+    ])
+    def test_invalid_bounds(self, string):
+        with pytest.raises(InvalidSignature):
+            Signature.from_string(string, option=False)
+
+    def test_bounds_in_option(self):
+        with pytest.raises(InvalidSignature):
+            Signature.from_string('a{2}')
+
+
+class TestSerialization(object):
+    signatures = [
+        '', 'a', 'a b...', 'a [b{2,5} [c{,3}]] d{2,}', '[a [b [c d...]]]'
+    ]
+
+    @pytest.mark.parametrize('string', signatures)
+    def test_dict(self, string):
+        signature = Signature.from_string(string, option=False)
+        data = signature.to_dict()
+        assert data['version'] == FORMAT_VERSION
+        loaded = Signature.from_dict(data)
+        assert loaded.to_dict() == data
+        assert loaded.usage == signature.usage
+
+    def test_dict_format(self):
+        signature = Signature.from_string('a [b{2,}]', option=False)
+        assert signature.to_dict() == {
+            'version': FORMAT_VERSION,
+            'patterns': [
+                {'type': 'argument', 'name': 'a'},
+                {'type': 'optional', 'patterns': [
+                    {
+                        'type': 'repetition',
+                        'pattern': {'type': 'argument', 'name': 'b'},
+                        'minimum': 2,
+                        'maximum': None
+                    }
+                ]}
+            ]
+        }
+
+    @pytest.mark.parametrize('string', signatures)
+    def test_dumps(self, string):
+        signature = Signature.from_string(string, option=False)
+        loaded = Signature.loads(signature.dumps())
+        assert loaded.to_dict() == signature.to_dict()
+        assert (loaded.minimum, loaded.maximum) == (
+            signature.minimum, signature.maximum
+        )
+
+    @pytest.mark.parametrize('string', signatures)
+    def test_pickle(self, string):
+        signature = Signature.from_string(string, option=False)
+        loaded = pickle.loads(pickle.dumps(signature))
+        assert loaded.to_dict() == signature.to_dict()
+        arguments = ['x'] * 6
+        assert parse_with(loaded, arguments) == parse_with(signature, arguments)
+
+    def test_version(self):
+        data = Signature.from_string('a').to_dict()
+        data['version'] += 1
+        with pytest.raises(ValueError):
+            Signature.from_dict(data)
+        with pytest.raises(ValueError):
+            Signature.loads(marshal.dumps((FORMAT_VERSION + 1, ())))
+
+
+def parse_with(signature, arguments):
+    argv = Argv(['application'] + arguments)
+    return signature.parse(argv), argv.argv[argv.position:]
+
+
+def get_counts(pattern):
+    if isinstance(pattern, Argument):
+        return [1]
+    elif isinstance(pattern, Repetition):
+        return list(range(pattern.minimum, (pattern.maximum or 9) + 1))
+    return [0] + [
+        sum(counts) for counts in allocate_exactly(pattern.patterns)
+    ]
+
+
+def allocate_exactly(patterns):
+    if not patterns:
+        yield ()
+        return
+    for count in get_counts(patterns[0]):
+        for rest in allocate_exactly(patterns[1:]):
+            yield (count, ) + rest
+
+
+def allocate(patterns, limit):
+    for counts in allocate_exactly(patterns):
+        if sum(counts) <= limit:
+            yield counts
+
+
+def get_count(pattern, result):
+    if isinstance(pattern, Argument):
+        return int(pattern.name in result)
+    elif isinstance(pattern, Repetition):
+        return len(result.get(pattern.pattern.name, ()))
+    return sum(get_count(inner, result) for inner in pattern.patterns)
@@ -0,0 +1,92 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_stats
+    ~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import json
+
+import pytest
+
+from argvard import Argvard, Command
+
+
+@pytest.fixture
+def application():
+    application = Argvard()
+    application.main()(lambda context: None)
+    command = Command()
+
+    @command.main()
+    def main(context):
+        context['data'] = [object() for _ in range(1000)]
+
+    application.register_command('command', command)
+    return application
+
+
+def test_stats(application, capsys):
+    application.add_stats_option()
+    application(['application', '--stats', 'command'], {})
+    stdout, stderr = capsys.readouterr()
+    assert stdout == u''
+    stats = json.loads(stderr)
+    assert sorted(stats) == [
+        'allocated', 'allocated_peak', 'command_path', 'cpu_time',
+        'peak_rss', 'wall_time'
+    ]
+    assert stats['command_path'] == ['application', 'command']
+    assert stats['wall_time'] >= 0
+    assert stats['cpu_time'] >= 0
+    assert stats['peak_rss'] > 0
+    assert stats['allocated'] is None
+
+
+def test_tracemalloc(application):
+    tracemalloc = pytest.importorskip('tracemalloc')
+    results = []
+    application.add_stats_option(callback=results.append)
+    tracemalloc.start()
+    try:
+        application(['application', '--stats', 'command'], {})
+    finally:
+        tracemalloc.stop()
+    stats, = results
+    assert stats['allocated_peak'] >= stats['allocated'] > 0
+
+
+def test_environment_variable(application):
+    results = []
+    application.add_stats_option(
+        environment_variable='STATS', callback=results.append
+    )
+    application(['application'], {})
+    assert results == []
+    application(['application', 'command'], {'STATS': '1'})
+    assert [stats['command_path'] for stats in results] == [
+        ['application', 'command']
+    ]
+
+
+def test_help(application, capsys):
+    application.add_stats_option()
+    with pytest.raises(SystemExit):
+        application(['application', '--stats', '--help'], {})
+    stdout, stderr = capsys.readouterr()
+    assert u'--stats' in stdout
+    assert json.loads(stderr)['command_path'] == ['application']
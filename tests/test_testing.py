@@ -0,0 +1,108 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_testing
+    ~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+from __future__ import print_function
+import os
+import sys
+
+import pytest
+
+from argvard import Argvard, UsageError
+from argvard.testing import CliRunner
+
+
+@pytest.fixture
+def application():
+    application = Argvard()
+
+    @application.option('--name name', environment_variable='NAME')
+    def name(context, name):
+        context['name'] = name
+
+    @application.option('--exit status')
+    def exit(context, status):
+        sys.exit(int(status) if status.isdigit() else status)
+
+    @application.option('--fail')
+    def fail(context):
+        raise ValueError('failed')
+
+    @application.option('--usage-error')
+    def usage_error(context):
+        raise UsageError('wrong')
+
+    @application.main('[words...]')
+    def main(context, words=()):
+        print(u' '.join(words), context.get('name'))
+        print(sys.stdin.read(), file=sys.stderr)
+
+    return application
+
+
+def test_invoke(application):
+    result = CliRunner().invoke(
+        application, ['--name', 'foo', 'a', 'b'], input=u'input'
+    )
+    assert result.exit_code == 0
+    assert result.stdout == u'a b foo\n'
+    assert result.stderr == u'input\n'
+    assert result.exception is None
+
+
+def test_streams_restored(application):
+    stdout, stderr, argv = sys.stdout, sys.stderr, sys.argv
+    CliRunner().invoke(application, ['--fail'])
+    assert (sys.stdout, sys.stderr, sys.argv) == (stdout, stderr, argv)
+
+
+def test_environ(application, monkeypatch):
+    monkeypatch.setenv('NAME', 'os')
+    runner = CliRunner(environ={'NAME': 'runner'})
+    assert runner.invoke(application).stdout == u' runner\n'
+    assert runner.invoke(application, environ={'NAME': 'call'}).stdout == (
+        u' call\n'
+    )
+    assert CliRunner().invoke(application).stdout == u' None\n'
+    assert os.environ['NAME'] == 'os'
+
+
+@pytest.mark.parametrize(('arguments', 'exit_code', 'stderr'), [
+    (['--help'], 1, u''),
+    (['--usage-error'], 1, u'error: wrong\n'),
+    (['--exit', '3'], 3, u''),
+    (['--exit', 'message'], 1, u'message\n')
+])
+def test_exit(application, arguments, exit_code, stderr):
+    result = CliRunner(program='tool').invoke(application, arguments)
+    assert result.exit_code == exit_code
+    assert result.stderr.startswith(stderr)
+    assert result.exception is None
+    if arguments == ['--help']:
+        assert result.stdout.startswith(u'usage: tool ')
+
+
+def test_exception(application):
+    result = CliRunner().invoke(application, ['--fail'])
+    assert result.exit_code == 1
+    assert isinstance(result.exception, ValueError)
+    assert result.exc_info[0] is ValueError
+    with pytest.raises(ValueError):
+        CliRunner(catch_exceptions=False).invoke(application, ['--fail'])
@@ -0,0 +1,138 @@
+# coding: utf-8
+# Copyright 2013 Daniel Neuhäuser
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+    tests.test_tracing
+    ~~~~~~~~~~~~~~~~~~
+
+    :copyright: 2013 by Daniel Neuhäuser
+    :license: Apache License 2.0, see LICENSE for more details
+"""
+import json
+
+import pytest
+
+from argvard import Argvard, Command
+from argvard.tracing import Tracer
+
+
+class ListExporter(object):
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def application(exporter, defer_options):
+    application = Argvard(
+        tracer=Tracer(exporter), defer_options=defer_options
+    )
+    application.option('-v', action='count')
+    application.main()(lambda context: None)
+    command = Command()
+
+    @command.option('--output path')
+    def output(context, path):
+        pass
+
+    @command.main('arguments...')
+    def main(context, arguments):
+        if arguments == ['fail']:
+            raise ValueError()
+
+    application.register_command('command', command)
+    return application
+
+
+def get_tree(spans):
+    names = dict((span['span_id'], span['name']) for span in spans)
+    return sort([
+        (names.get(span['parent_id']), span['name'], span['attributes'])
+        for span in spans
+    ])
+
+
+def sort(tree):
+    return sorted(tree, key=lambda node: json.dumps(node, sort_keys=True))
+
+
+@pytest.mark.parametrize('defer_options', [False, True])
+def test_spans(application, exporter, defer_options):
+    application(['app', '-v', 'command', '--output', 'x', 'a', 'b'], {})
+    spans, = exporter.traces
+    assert len(set(span['trace_id'] for span in spans)) == 1
+    assert all(span['duration'] >= 0 for span in spans)
+    assert get_tree(spans) == sort([
+        (None, 'argvard.call', {
+            'command_path': ['app', 'command'], 'arguments': 6,
+            'exit_status': 0
+        }),
+        ('argvard.call', 'argvard.option', {'names': ['-v'], 'arguments': 0}),
+        ('argvard.call', 'argvard.command', {
+            'command_path': ['app', 'command']
+        }),
+        ('argvard.command', 'argvard.option', {
+            'names': ['--output'], 'arguments': 1
+        }),
+        ('argvard.command', 'argvard.main', {
+            'command_path': ['app', 'command'], 'arguments': 1
+        })
+    ])
+
+
+@pytest.mark.parametrize('defer_options', [False, True])
+def test_error(application, exporter, defer_options):
+    with pytest.raises(ValueError):
+        application(['app', 'command', 'fail'], {})
+    spans, = exporter.traces
+    errors = [
+        span['name'] for span in spans if 'error' in span['attributes']
+    ]
+    assert sorted(errors) == ['argvard.command', 'argvard.main']
+    call, = [span for span in spans if span['name'] == 'argvard.call']
+    assert call['attributes']['exit_status'] == 1
+
+
+@pytest.mark.parametrize('defer_options', [False, True])
+def test_usage_error_spans(application, exporter, defer_options):
+    with pytest.raises(SystemExit):
+        application(['app', '-v', 'command', '--output'], {})
+    spans, = exporter.traces
+    call, = [span for span in spans if span['name'] == 'argvard.call']
+    assert call['parent_id'] is None
+    assert call['attributes'] == {
+        'command_path': ['app', 'command'], 'arguments': 3, 'exit_status': 1
+    }
+
+
+def test_environment_variable(application, tmpdir):
+    path = tmpdir.join('trace.jsonl')
+    application.tracer = None
+    application(['app'], {})
+    assert not path.check()
+    application(['app', 'command', 'a'], {'ARGVARD_TRACE': str(path)})
+    application(['app', '-v'], {'ARGVARD_TRACE': str(path)})
+    spans = [json.loads(line) for line in path.readlines()]
+    assert [span['name'] for span in spans] == [
+        'argvard.main', 'argvard.command', 'argvard.call',
+        'argvard.option', 'argvard.main', 'argvard.call'
+    ]
+    assert spans[0]['trace_id'] != spans[-1]['trace_id']
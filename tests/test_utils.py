@@ -19,11 +19,15 @@
     :copyright: 2013 by Daniel Neuhäuser
     :license: Apache License 2.0, see LICENSE for more details
 """
+import random
+import textwrap
 from itertools import repeat
 
 import pytest
 
-from argvard.utils import is_python_identifier
+from argvard.utils import (
+    is_python_identifier, levenshtein, NgramIndex, clean_docstring
+)
 from argvard._compat import PY2
 
 
@@ -53,3 +57,74 @@ from argvard._compat import PY2
 )
 def test_is_python_identifier(possible_identifier, result):
     assert is_python_identifier(possible_identifier) == result
+
+
+@pytest.mark.parametrize('docstring', [
+    '',
+    'foo',
+    '  foo\n  bar',
+    '\n    foo\n\n    bar\n    ',
+    '\n    foo\n      bar\n  \n    baz\n',
+    '\n\tfoo\n\t  bar\n',
+    '\n  \tfoo\n  bar\n',
+    'foo\n    bar\n    baz'
+])
+def test_clean_docstring(docstring):
+    assert clean_docstring(docstring) == textwrap.dedent(docstring).strip()
+
+
+def test_clean_docstring_none():
+    assert clean_docstring(None) is None
+
+
+@pytest.mark.parametrize(('a', 'b', 'distance'), [
+    ('', '', 0),
+    ('', 'abc', 3),
+    ('abc', 'abc', 0),
+    ('abc', 'abd', 1),
+    ('abc', 'ab', 1),
+    ('kitten', 'sitting', 3),
+    ('sitting', 'kitten', 3)
+])
+def test_levenshtein(a, b, distance):
+    assert levenshtein(a, b) == distance
+
+
+class TestNgramIndex(object):
+    def test_empty(self):
+        assert NgramIndex().search('foo', 2) == []
+
+    def test_search(self):
+        index = NgramIndex()
+        words = ['book', 'books', 'cake', 'boo', 'cape', 'cart', 'boon']
+        for word in words:
+            index.add(word)
+        for max_distance in range(4):
+            expected = sorted(
+                (levenshtein('bo', word), word) for word in words
+                if levenshtein('bo', word) <= max_distance
+            )
+            assert index.search('bo', max_distance) == expected
+
+    def test_search_random(self):
+        generator = random.Random(0)
+        words = set(
+            u''.join(generator.choice(u'abcd') for _ in range(generator.randint(1, 6)))
+            for _ in range(300)
+        )
+        index = NgramIndex()
+        for word in words:
+            index.add(word)
+        for query in [u'a', u'abc', u'abcd', u'dcba', u'aabbcc']:
+            for max_distance in range(3):
+                expected = sorted(
+                    (levenshtein(query, word), word) for word in words
+                    if levenshtein(query, word) <= max_distance
+                )
+                assert index.search(query, max_distance) == expected
+
+    def test_duplicates(self):
+        index = NgramIndex()
+        index.add('foo')
+        index.add('foo')
+        assert index.search('foo', 0) == [(0, 'foo')]